@@ -0,0 +1,89 @@
+# coding: UTF-8
+
+from FreeCAD import Placement, activeDocument
+import json
+from Legify.Brick import *
+
+
+class BrickAssembly:
+
+    def __init__(self, doc=None, solid=False, cache=None, detail=Detail.FULL, undo=RENDER_UNDO_TRANSACTION):
+        log.debug("BrickAssembly({0}, {1}, {2})", solid, detail, undo)
+
+        if doc is None:
+            doc = activeDocument()
+
+        self.doc = doc
+        self.solid = solid
+        self.cache = cache
+        self.detail = check_detail(detail)
+        self.undo = undo
+
+        # normalized spec JSON => prototype brick, each unique brick is only rendered once
+        self.prototypes = {}
+        self.links = []
+
+    def _renderer(self, options):
+
+        if self.solid:
+            # only imported when used as it pulls in Part
+            from Legify.Solid import SolidBrickRenderer
+            return SolidBrickRenderer(*options, detail=self.detail)
+
+        return BrickRenderer(*options, detail=self.detail)
+
+    def _prototype(self, options):
+
+        spec, adjustments = plan_brick(*options)
+
+        key = json.dumps(spec.as_dict(), sort_keys=True)
+
+        prototype = self.prototypes.get(key)
+
+        if prototype is None:
+            log.info("Rendering prototype: {}", key)
+
+            renderer = self._renderer(options)
+
+            if self.solid:
+                prototype = renderer.render(cache=self.cache, doc=self.doc, undo=self.undo)
+            else:
+                prototype = renderer.render(deferred_recompute=True, cache=self.cache, doc=self.doc, undo=self.undo)
+
+            if prototype is None:
+                raise Exception("Failed to render: {}".format(key))
+
+            prototype.Label = "brick_prototype"
+
+            # only the links are shown
+            set_visibility(prototype, False)
+
+            self.prototypes[key] = prototype
+
+        return prototype
+
+    def add(self, dimensions, top_studs, side_studs, pins, holes, placement=None, name="brick"):
+        log.debug("add({0}, {1})", dimensions, placement)
+
+        prototype = self._prototype((dimensions, top_studs, side_studs, pins, holes))
+
+        link = self.doc.addObject("App::Link", name)
+        link.setLink(prototype)
+        link.Placement = placement if placement is not None else Placement()
+
+        self.links.append(link)
+
+        return link
+
+    def add_spec(self, spec, placement=None):
+
+        # the same JSON specs as used by legify-batch.py, the detail of the assembly is used for every brick
+        dimensions, top_studs, side_studs, pins, holes, detail = parse_spec(spec)
+
+        return self.add(dimensions, top_studs, side_studs, pins, holes, placement, spec.get("name", "brick"))
+
+    def recompute(self):
+        log.info("Assembly: {0} bricks from {1} prototypes", len(self.links), len(self.prototypes))
+
+        # only the links and their prototypes, not whatever else is in the document
+        self.doc.recompute(self.links)
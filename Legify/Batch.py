@@ -0,0 +1,144 @@
+# coding: UTF-8
+
+from FreeCAD import closeDocument, newDocument
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import Import
+import Mesh
+from Legify.Brick import *
+from Legify.Solid import *
+
+BATCH_FORMATS = ("step", "stl", "fcstd")
+
+
+def spec_name(spec, index):
+
+    name = spec.get("name", "brick_{:05d}".format(index))
+
+    # the name becomes a file name in the output directory so it may not point anywhere else
+    if not isinstance(name, str) or name in ("", ".", "..") or os.path.basename(name) != name or \
+            "/" in name or "\\" in name:
+        raise Exception("Invalid name: {}".format(name))
+
+    return name
+
+
+def render_spec(spec, index, output_directory, formats, solid=False, cache=None):
+    log.debug("render_spec({0}, {1})", index, spec)
+
+    name = spec_name(spec, index)
+
+    # one document per job so that nothing leaks between bricks
+    doc = newDocument("legify_{}".format(index))
+
+    try:
+        if solid:
+            brick = SolidBrickRenderer(*parse_spec(spec)).render(cache=cache, doc=doc, undo=RENDER_UNDO_SUSPENDED)
+        else:
+            brick = BrickRenderer(*parse_spec(spec)).render(deferred_recompute=True, cache=cache, doc=doc,
+                                                            undo=RENDER_UNDO_SUSPENDED)
+
+        if brick is None:
+            raise Exception("Failed to render: {}".format(name))
+
+        path = os.path.join(output_directory, name)
+
+        if "step" in formats:
+            Import.export([brick], path + ".step")
+        if "stl" in formats:
+            Mesh.export([brick], path + ".stl")
+        if "fcstd" in formats:
+            doc.saveAs(path + ".FCStd")
+
+    finally:
+        closeDocument(doc.Name)
+
+
+def run_worker(input_path, first, last, output_directory, formats, solid=False, cache_directory=None,
+               report_path=None):
+    log.debug("run_worker({0}, {1}, {2})", input_path, first, last)
+
+    cache = ShapeCache(cache_directory) if cache_directory else None
+
+    failed = []
+
+    with open(input_path) as input_file:
+        for index, line in enumerate(input_file):
+            if index < first:
+                continue
+            if index >= last:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                render_spec(json.loads(line), index, output_directory, formats, solid, cache)
+            except Exception as inst:
+                log.error("Line {0}: {1}", index + 1, inst)
+                failed.append(index + 1)
+
+    # the batch reads back the failed lines, the exit code alone cannot tell how many specs failed
+    if report_path is not None:
+        with open(report_path, "w") as report_file:
+            json.dump(failed, report_file)
+
+    return len(failed)
+
+
+def run_batch(input_path, output_directory, formats, processes, chunk_size, freecad_cmd, script_path,
+              solid=False, cache_directory=None, verbose=False):
+    log.debug("run_batch({0}, {1}, {2})", input_path, processes, chunk_size)
+
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+
+    with open(input_path) as input_file:
+        lines = [line.strip() != "" for line in input_file]
+
+    line_count = len(lines)
+    spec_count = sum(lines)
+
+    # each worker reports its failed lines in its own file
+    report_directory = tempfile.mkdtemp(prefix="legify-batch-")
+
+    # each worker is a separate FreeCADCmd process rendering a contiguous range of lines
+    commands = []
+    ranges = []
+    for first in range(0, line_count, chunk_size):
+        last = min(first + chunk_size, line_count)
+        report_path = os.path.join(report_directory, "{}.json".format(first))
+        command = [freecad_cmd, script_path, "--pass", "--worker",
+                   "--first", str(first), "--last", str(last), "--report", report_path,
+                   "--formats", ",".join(formats), input_path, output_directory]
+        if solid:
+            command.append("--solid")
+        if cache_directory:
+            command.extend(["--cache", cache_directory])
+        if verbose:
+            command.append("--verbose")
+        commands.append(command)
+        ranges.append((first, last, report_path))
+
+    try:
+        with ThreadPoolExecutor(max_workers=processes) as executor:
+            return_codes = list(executor.map(subprocess.call, commands))
+
+        failed = 0
+        for (first, last, report_path), code in zip(ranges, return_codes):
+            if os.path.isfile(report_path):
+                with open(report_path) as report_file:
+                    failed += len(json.load(report_file))
+            else:
+                # a worker that died before reporting is counted as failing every spec in its range
+                log.error("Worker for lines {0}..{1} exited with {2}", first + 1, last, code)
+                failed += sum(lines[first:last])
+    finally:
+        shutil.rmtree(report_directory, ignore_errors=True)
+
+    log.info("Rendered {0} specs in {1} workers, {2} failed", spec_count, len(commands), failed)
+
+    return failed
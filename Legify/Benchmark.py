@@ -0,0 +1,239 @@
+# coding: UTF-8
+
+from FreeCAD import Version, closeDocument, newDocument
+import itertools
+import json
+import os
+import subprocess
+import time
+from Legify.Brick import *
+from Legify.Solid import *
+
+BENCHMARK_DEFAULT_THRESHOLD = 0.2
+BENCHMARK_MIN_REGRESSION_SECONDS = 0.05
+BENCHMARK_IMPORT_MODULES = ("Legify.Spec", "Legify.Brick", "Legify.Common", "Legify.Solid")
+BENCHMARK_IMPORT_MARKER = "LEGIFY_IMPORT "
+
+# run in a fresh interpreter so that nothing is already imported by the benchmark itself
+_IMPORT_TIMING_CODE = """
+import json, sys, time
+sys.path.append({path!r})
+start = time.perf_counter()
+import {module}
+result = {{"time": time.perf_counter() - start, "part": "Part" in sys.modules, "sketcher": "Sketcher" in sys.modules}}
+print({marker!r} + json.dumps(result))
+"""
+
+
+def _matrix_options(width, depth, height, top_studs_style, side_studs_style, pins_style, hole_style,
+                    sides, pins_offset, holes_offset):
+
+    dimensions = {"width": width, "depth": depth, "height": height}
+    top_studs = {"style": top_studs_style, "width_count": width, "depth_count": depth}
+    side_studs = {"style": side_studs_style, "front": sides[0], "back": sides[1], "left": sides[2], "right": sides[3]}
+
+    # pins go on the sides without side studs
+    pins = {"style": pins_style, "front": not sides[0], "back": not sides[1], "left": not sides[2],
+            "right": not sides[3], "offset": pins_offset}
+    holes = {"style": hole_style, "offset": holes_offset}
+
+    return dimensions, top_studs, side_studs, pins, holes
+
+
+def benchmark_matrix(name):
+    log.debug("benchmark_matrix({})", name)
+
+    styles = list(itertools.product((TopStudStyle.NONE, TopStudStyle.CLOSED, TopStudStyle.OPEN),
+                                    (SideStudStyle.NONE, SideStudStyle.OPEN, SideStudStyle.HOLE),
+                                    (PinStyle.NONE, PinStyle.PIN, PinStyle.AXLE),
+                                    (HoleStyle.NONE, HoleStyle.HOLE, HoleStyle.AXLE)))
+
+    # side flags for side studs, pins take the remaining sides, each arrangement of sides up to symmetry
+    sides = ((False, False, False, False), (True, False, False, False), (True, True, False, False),
+             (True, False, True, False), (True, True, True, False), (True, True, True, True))
+
+    # (pins_offset, holes_offset)
+    offsets = list(itertools.product((False, True), (False, True)))
+
+    plain = (TopStudStyle.CLOSED, SideStudStyle.NONE, PinStyle.NONE, HoleStyle.NONE)
+
+    if name == "full":
+        # the size sweep is only done for a plain brick, and every combination of features only on a few small sizes
+        # (single row, odd and even counts) tall enough for side studs
+        sizes = (1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20)
+        cases = itertools.chain(itertools.product([plain], sizes, sizes, (1, 3, 9), sides[0:1], offsets[0:1]),
+                                itertools.product(styles, (1, 2, 3), (1, 4), (3,), sides, offsets))
+    elif name == "quick":
+        # a subset of full: a few plain sizes, and each style of each feature at least once on one small brick
+        featured = ((TopStudStyle.NONE, SideStudStyle.OPEN, PinStyle.PIN, HoleStyle.HOLE),
+                    (TopStudStyle.OPEN, SideStudStyle.HOLE, PinStyle.AXLE, HoleStyle.AXLE),
+                    (TopStudStyle.CLOSED, SideStudStyle.OPEN, PinStyle.AXLE, HoleStyle.NONE))
+        sizes = (1, 2, 4, 8)
+        cases = itertools.chain(itertools.product([plain], sizes, sizes, (1, 3), sides[0:1], offsets[0:1]),
+                                itertools.product(featured, (2, 3), (4,), (3,), sides[1:3], offsets[0::3]))
+    else:
+        raise Exception("matrix must be: quick|full")
+
+    # many combinations normalize to the same brick e.g. side studs are dropped for low bricks
+    seen = set()
+
+    for style, width, depth, height, side, (pins_offset, holes_offset) in cases:
+
+        options = _matrix_options(width, depth, height, style[0], style[1], style[2], style[3], side,
+                                  pins_offset, holes_offset)
+
+        try:
+            spec, adjustments = plan_brick(*options)
+        except BrickSpecError:
+            continue
+
+        key = json.dumps(spec.as_dict(), sort_keys=True)
+
+        if key in seen:
+            continue
+        seen.add(key)
+
+        yield key, options
+
+
+def _current_rss_bytes():
+
+    # only available on Linux, None elsewhere
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def run_case(options, solid=False, repeat=1):
+
+    durations = []
+    object_count = None
+    rss_delta = None
+
+    for i in range(0, repeat):
+        doc = newDocument("legify_benchmark")
+        try:
+            rss = _current_rss_bytes()
+            start = time.perf_counter()
+            if solid:
+                brick = SolidBrickRenderer(*options).render(doc=doc, undo=RENDER_UNDO_SUSPENDED)
+            else:
+                brick = BrickRenderer(*options).render(doc=doc, undo=RENDER_UNDO_SUSPENDED)
+            durations.append(time.perf_counter() - start)
+
+            if brick is None:
+                raise Exception("Failed to render")
+
+            object_count = len(doc.Objects)
+
+            # memory held by this case alone, the process peak would only ever grow across the matrix
+            if rss is not None:
+                rss_delta = _current_rss_bytes() - rss
+        finally:
+            closeDocument(doc.Name)
+
+    # the fastest run is the least disturbed by the rest of the system
+    return {
+        "time": min(durations),
+        "objects": object_count,
+        "rss_delta": rss_delta
+    }
+
+
+def run_benchmark(matrix, solid=False, repeat=1, stride=1):
+    log.debug("run_benchmark({0}, {1}, {2}, {3})", matrix, solid, repeat, stride)
+
+    results = {}
+
+    for i, (key, options) in enumerate(benchmark_matrix(matrix)):
+        if i % stride != 0:
+            continue
+        try:
+            results[key] = run_case(options, solid, repeat)
+        except Exception as inst:
+            log.error("{0}: {1}", key, inst)
+            results[key] = {"error": str(inst)}
+
+    return {
+        "freecad_version": ".".join(Version()[0:3]),
+        "renderer": "SolidBrickRenderer" if solid else "BrickRenderer",
+        "matrix": matrix,
+        "cases": results
+    }
+
+
+def measure_import_times(freecad_cmd, modules=BENCHMARK_IMPORT_MODULES):
+    log.debug("measure_import_times({0}, {1})", freecad_cmd, modules)
+
+    path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+    results = {}
+
+    for module in modules:
+        code = _IMPORT_TIMING_CODE.format(path=path, module=module, marker=BENCHMARK_IMPORT_MARKER)
+        try:
+            output = subprocess.run([freecad_cmd, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    universal_newlines=True).stdout
+        except OSError as inst:
+            log.error("{0}: {1}", module, inst)
+            results[module] = {"error": str(inst)}
+            continue
+
+        lines = [line for line in output.splitlines() if line.startswith(BENCHMARK_IMPORT_MARKER)]
+
+        if len(lines) == 0:
+            log.error("{0}: {1}", module, output.strip())
+            results[module] = {"error": output.strip()}
+            continue
+
+        results[module] = json.loads(lines[-1][len(BENCHMARK_IMPORT_MARKER):])
+        log.info("Import {0}: {1:.3f}s Part: {2} Sketcher: {3}", module, results[module]["time"],
+                 results[module]["part"], results[module]["sketcher"])
+
+    return results
+
+
+def compare_benchmark(results, baseline, threshold=BENCHMARK_DEFAULT_THRESHOLD):
+
+    regressions = []
+
+    for key, result in results["cases"].items():
+        previous = baseline["cases"].get(key)
+
+        if previous is None or "time" not in previous or "time" not in result:
+            continue
+
+        # ignore noise on very fast cases
+        if result["time"] > previous["time"] * (1 + threshold) and \
+                result["time"] - previous["time"] > BENCHMARK_MIN_REGRESSION_SECONDS:
+            regressions.append({
+                "case": json.loads(key),
+                "time": result["time"],
+                "baseline_time": previous["time"],
+                "ratio": result["time"] / previous["time"]
+            })
+
+    for module, result in results.get("imports", {}).items():
+        previous = baseline.get("imports", {}).get(module)
+
+        if previous is None or "time" not in previous or "time" not in result:
+            continue
+
+        if result["time"] > previous["time"] * (1 + threshold) and \
+                result["time"] - previous["time"] > BENCHMARK_MIN_REGRESSION_SECONDS:
+            regressions.append({
+                "case": {"import": module},
+                "time": result["time"],
+                "baseline_time": previous["time"],
+                "ratio": result["time"] / previous["time"]
+            })
+
+    regressions.sort(key=lambda regression: regression["ratio"], reverse=True)
+
+    for regression in regressions:
+        log.warning("Regression {0:.2f}x ({1:.3f}s vs {2:.3f}s): {3}", regression["ratio"], regression["time"],
+                    regression["baseline_time"], json.dumps(regression["case"]))
+
+    return regressions
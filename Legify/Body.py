@@ -1,6 +1,6 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Vector, Placement, Rotation
+from FreeCAD import Vector, Placement, Rotation
 import Part
 import Sketcher
 from Legify.Common import *
@@ -9,7 +9,7 @@ from Legify.Common import *
 class BodyRenderer(object):
 
     def __init__(self):
-        Console.PrintMessage("BodyRenderer\n")
+        log.debug("BodyRenderer")
 
         self.width = None
         self.depth = None
@@ -18,133 +18,19 @@ class BodyRenderer(object):
         self.hole_style = None
         self.holes_offset = None
 
+        self.detail = None
+        self.layout = None
+
         self.doc = None
         self.brick = None
+        self.context = None
 
-        self.top_datum_plane = None
-        self.top_inside_datum_plane = None
-        self.front_inside_datum_plane = None
-        self.back_inside_datum_plane = None
-        self.left_inside_datum_plane = None
-        self.right_inside_datum_plane = None
         self.xy_plane = None
 
-    @staticmethod
-    def _add_horizontal_sketch_segment(geometries, constraints, length, hor_vec_start, hor_vec_end, reverse):
-        Console.PrintMessage("_add_horizontal_sketch_segment({},{})\n".format(length, reverse))
-
-        segment_count = len(geometries)
-
-        geometries.append(Part.LineSegment(hor_vec_start, hor_vec_end))
-        constraints.append(Sketcher.Constraint("Horizontal", segment_count))
-        if segment_count > 0:
-            constraints.append(Sketcher.Constraint("Coincident", segment_count - 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceX", segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * length))
-
-    @staticmethod
-    def _add_vertical_sketch_segment(geometries, constraints, length, ver_vec_start, ver_vec_end, reverse):
-        Console.PrintMessage("_add_vertical_sketch_segment({},{})\n".format(length, reverse))
-
-        segment_count = len(geometries)
-
-        geometries.append(Part.LineSegment(ver_vec_start, ver_vec_end))
-        constraints.append(Sketcher.Constraint("Vertical", segment_count))
-        if segment_count > 0:
-            constraints.append(Sketcher.Constraint("Coincident", segment_count - 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceY", segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * length))
-
-    @staticmethod
-    def _add_horizontal_sketch_segment_with_rib(geometries, constraints, length,
-                                                hor_vec_start, hor_vec_end, ver_vec_start, ver_vec_end,
-                                                reverse):
-        Console.PrintMessage("_add_horizontal_sketch_segment_with_rib({},{})\n".format(length, reverse))
-
-        segment_count = len(geometries)
-
-        geometries.append(Part.LineSegment(ver_vec_start, ver_vec_end))
-        constraints.append(Sketcher.Constraint("Vertical", segment_count))
-        if segment_count > 0:
-            constraints.append(Sketcher.Constraint("Coincident", segment_count - 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceY", segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * DIMS_SIDE_RIB_DEPTH))
-
-        geometries.append(Part.LineSegment(hor_vec_start, hor_vec_end))
-        constraints.append(Sketcher.Constraint("Horizontal", segment_count + 1))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceX", segment_count + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * DIMS_SIDE_RIB_WIDTH))
-
-        geometries.append(Part.LineSegment(ver_vec_start, ver_vec_end))
-        constraints.append(Sketcher.Constraint("Vertical", segment_count + 2))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceY", segment_count + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (1 if reverse else -1) * DIMS_SIDE_RIB_DEPTH))
-
-        geometries.append(Part.LineSegment(hor_vec_start, hor_vec_end))
-        constraints.append(Sketcher.Constraint("Horizontal", segment_count + 3))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 3, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceX", segment_count + 3, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * (length - DIMS_SIDE_RIB_WIDTH)))
-
-    @staticmethod
-    def _add_vertical_sketch_segment_with_rib(geometries, constraints, length,
-                                              ver_vec_start, ver_vec_end, hor_vec_start, hor_vec_end,
-                                              reverse):
-        Console.PrintMessage("_add_vertical_sketch_segment_with_rib({},{})\n".format(length, reverse))
-
-        segment_count = len(geometries)
-
-        geometries.append(Part.LineSegment(hor_vec_start, hor_vec_end))
-        constraints.append(Sketcher.Constraint("Horizontal", segment_count))
-        if segment_count > 0:
-            constraints.append(Sketcher.Constraint("Coincident", segment_count - 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceX", segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (1 if reverse else -1) * DIMS_SIDE_RIB_DEPTH))
-
-        geometries.append(Part.LineSegment(ver_vec_start, ver_vec_end))
-        constraints.append(Sketcher.Constraint("Vertical", segment_count + 1))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceY", segment_count + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * DIMS_SIDE_RIB_WIDTH))
-
-        geometries.append(Part.LineSegment(hor_vec_start, hor_vec_end))
-        constraints.append(Sketcher.Constraint("Horizontal", segment_count + 2))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceX", segment_count + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * DIMS_SIDE_RIB_DEPTH))
-
-        geometries.append(Part.LineSegment(ver_vec_start, ver_vec_end))
-        constraints.append(Sketcher.Constraint("Vertical", segment_count + 3))
-        constraints.append(Sketcher.Constraint("Coincident", segment_count + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               segment_count + 3, SKETCH_GEOMETRY_VERTEX_START_INDEX))
-        constraints.append(Sketcher.Constraint("DistanceY", segment_count + 3, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               segment_count + 3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               (-1 if reverse else 1) * (length - DIMS_SIDE_RIB_WIDTH)))
-
     @staticmethod
     def _add_rib_sketch(geometries, constraints, tube_index, rib_thickness, bottom_offset,
                         hor_vec_start, hor_vec_end, ver_vec_start, ver_vec_end):
-        Console.PrintMessage("_add_rib_sketch({})\n".format(tube_index))
+        log.debug("_add_rib_sketch({})", tube_index)
 
         segment_count = len(geometries)
 
@@ -198,8 +84,20 @@ class BodyRenderer(object):
         constraints.append(Sketcher.Constraint("Coincident", segment_count + 3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
                                                segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
 
-    def _render_body_pad_and_fillets(self):
-        Console.PrintMessage("_render_body_pad_and_edge_fillets()\n")
+    def _body_width(self, side_thickness):
+        return (self.width * DIMS_STUD_SPACING) - (2 * side_thickness) - (2 * DIMS_BRICK_OUTER_REDUCTION)
+
+    def _body_depth(self, side_thickness):
+        return (self.depth * DIMS_STUD_SPACING) - (2 * side_thickness) - (2 * DIMS_BRICK_OUTER_REDUCTION)
+
+    def _side_thickness(self):
+
+        # the walls are thinner where side ribs are added, the ribs themselves are padded by render_ribs()
+        return DIMS_RIBBED_SIDE_THICKNESS if self.layout.side_ribs else DIMS_FLAT_SIDE_THICKNESS
+
+    @profiled("BodyRenderer._render_body_pad")
+    def _render_body_pad(self):
+        log.debug("_render_body_pad()")
 
         # body pad
 
@@ -242,38 +140,31 @@ class BodyRenderer(object):
 
             # Width
             Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, 0, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                (self.width * DIMS_STUD_SPACING) - (2 * DIMS_BRICK_OUTER_REDUCTION)),
+                                self._body_width(0)),
             # Depth
             Sketcher.Constraint("DistanceY", 1, SKETCH_GEOMETRY_VERTEX_START_INDEX, 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                (self.depth * DIMS_STUD_SPACING) - (2 * DIMS_BRICK_OUTER_REDUCTION))
+                                self._body_depth(0))
         ])
 
+        # named so that update() can set them in place
+        body_pad_sketch.renameConstraint(len(body_pad_sketch.Constraints) - 2, "width")
+        body_pad_sketch.renameConstraint(len(body_pad_sketch.Constraints) - 1, "depth")
+
         body_pad = self.brick.newObject("PartDesign::Pad", "body_pad")
         body_pad.Type = PAD_TYPE_UP_TO_FACE
         body_pad.Profile = body_pad_sketch
-        body_pad.UpToFace = (self.top_datum_plane, [""])
-
-        self.doc.recompute()
-
-        # body edge fillets
-
-        edge_names = []
-        for i in range(0, len(body_pad.Shape.Edges)):
-            edge_names.append("Edge" + repr(i + 1))
-
-        body_edge_fillets = self.brick.newObject("PartDesign::Fillet", "body_edge_fillets")
-        body_edge_fillets.Radius = DIMS_EDGE_FILLET
-        body_edge_fillets.Base = (body_pad, edge_names)
+        body_pad.UpToFace = (self.context.datum_plane("top_datum_plane"), [""])
 
         self.doc.recompute()
-        body_pad_sketch.ViewObject.Visibility = False
+        set_visibility(body_pad_sketch, False)
 
         # TODO: support modern tile where the bottom has a small outside pocket (and check if fillet is also required)
 
         return body_pad_sketch
 
+    @profiled("BodyRenderer._render_body_pocket")
     def _render_body_pocket(self, body_pad_sketch):
-        Console.PrintMessage("_render_body_pocket()\n")
+        log.debug("_render_body_pocket()")
 
         # body pocket
 
@@ -281,428 +172,288 @@ class BodyRenderer(object):
         body_pocket_sketch.AttachmentSupport = (body_pad_sketch, '')
         body_pocket_sketch.MapMode = 'ObjectXY'
 
-        side_ribs = self.height > 2 and self.depth > 1 and self.width > 1
+        side_thickness = self._side_thickness()
 
         geometries = []
         constraints = []
 
-        if side_ribs:
-
-            # complex rectangle with ribs
-            # First horizontal => 1st half stud
-            self._add_horizontal_sketch_segment(geometries, constraints,
-                                                (DIMS_STUD_SPACING / 2)
-                                                - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                - (DIMS_SIDE_RIB_WIDTH / 2),
-                                                xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                False)
-
-            # => N-1 studs
-            for i in range(0, self.width - 1):
-                self._add_horizontal_sketch_segment_with_rib(geometries, constraints,
-                                                             DIMS_STUD_SPACING,
-                                                             xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                             xy_plane_top_right_vector(),
-                                                             xy_plane_bottom_right_vector(),
-                                                             False)
-
-            # => Last half stud
-            self._add_horizontal_sketch_segment_with_rib(geometries, constraints,
-                                                         (DIMS_STUD_SPACING / 2)
-                                                         - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                         + (DIMS_SIDE_RIB_WIDTH / 2),
-                                                         xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                         xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                         False)
-
-            # First vertical => 1st half stud
-            self._add_vertical_sketch_segment(geometries, constraints,
-                                              (DIMS_STUD_SPACING / 2)
-                                              - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                              - (DIMS_SIDE_RIB_WIDTH / 2),
-                                              xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                              False)
-
-            # => N-1 studs
-            for i in range(0, self.depth - 1):
-                self._add_vertical_sketch_segment_with_rib(geometries, constraints,
-                                                           DIMS_STUD_SPACING,
-                                                           xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                           xy_plane_bottom_right_vector(),
-                                                           xy_plane_bottom_left_vector(),
-                                                           False)
-
-            # => Last half stud
-            self._add_vertical_sketch_segment_with_rib(geometries, constraints,
-                                                       (DIMS_STUD_SPACING / 2)
-                                                       - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                       + (DIMS_SIDE_RIB_WIDTH / 2),
-                                                       xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                       xy_plane_bottom_right_vector(), xy_plane_bottom_left_vector(),
-                                                       False)
-
-            # Second horizontal => 1st half stud
-            self._add_horizontal_sketch_segment(geometries, constraints,
-                                                (DIMS_STUD_SPACING / 2)
-                                                - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                - (DIMS_SIDE_RIB_WIDTH / 2),
-                                                xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                True)
-
-            # => N-1 studs
-            for i in range(0, self.width - 1):
-                self._add_horizontal_sketch_segment_with_rib(geometries, constraints,
-                                                             DIMS_STUD_SPACING,
-                                                             xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                             xy_plane_top_right_vector(),
-                                                             xy_plane_bottom_right_vector(),
-                                                             True)
-
-            # => Last half stud
-            self._add_horizontal_sketch_segment_with_rib(geometries, constraints,
-                                                         (DIMS_STUD_SPACING / 2)
-                                                         - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                         + (DIMS_SIDE_RIB_WIDTH / 2),
-                                                         xy_plane_top_left_vector(), xy_plane_top_right_vector(),
-                                                         xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                         True)
-
-            # Second vertical => 1st half stud
-            self._add_vertical_sketch_segment(geometries, constraints,
-                                              (DIMS_STUD_SPACING / 2)
-                                              - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                              - (DIMS_SIDE_RIB_WIDTH / 2),
-                                              xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                              True)
-
-            # => N-1 studs
-            for i in range(0, self.depth - 1):
-                self._add_vertical_sketch_segment_with_rib(geometries, constraints,
-                                                           DIMS_STUD_SPACING,
-                                                           xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                           xy_plane_bottom_right_vector(),
-                                                           xy_plane_bottom_left_vector(),
-                                                           True)
-
-            # => Last half stud
-            self._add_vertical_sketch_segment_with_rib(geometries, constraints,
-                                                       (DIMS_STUD_SPACING / 2)
-                                                       - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
-                                                       + (DIMS_SIDE_RIB_WIDTH / 2),
-                                                       xy_plane_top_right_vector(), xy_plane_bottom_right_vector(),
-                                                       xy_plane_bottom_right_vector(), xy_plane_bottom_left_vector(),
-                                                       True)
-
-            # Half stud offsets from origin (-1, 1 chooses the origin point)
-            constraints.append(Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, -1,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   (DIMS_STUD_SPACING / 2)
-                                                   - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION))
-            constraints.append(Sketcher.Constraint("DistanceY", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, -1,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   (DIMS_STUD_SPACING / 2)
-                                                   - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION))
-        else:
-
-            # simple rectangle
-            geometries.append(Part.LineSegment(xy_plane_top_left_vector(), xy_plane_top_right_vector()))
-            constraints.append(Sketcher.Constraint("Horizontal", 0))
-
-            geometries.append(Part.LineSegment(xy_plane_top_right_vector(), xy_plane_bottom_right_vector()))
-            constraints.append(Sketcher.Constraint("Vertical", 1))
-            constraints.append(Sketcher.Constraint("Coincident", 0, SKETCH_GEOMETRY_VERTEX_END_INDEX, 1,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX))
-
-            geometries.append(Part.LineSegment(xy_plane_bottom_right_vector(), xy_plane_bottom_left_vector()))
-            constraints.append(Sketcher.Constraint("Horizontal", 2))
-            constraints.append(Sketcher.Constraint("Coincident", 1, SKETCH_GEOMETRY_VERTEX_END_INDEX, 2,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX))
-
-            geometries.append(Part.LineSegment(xy_plane_bottom_left_vector(), xy_plane_top_left_vector()))
-            constraints.append(Sketcher.Constraint("Vertical", 3))
-            constraints.append(Sketcher.Constraint("Coincident", 2, SKETCH_GEOMETRY_VERTEX_END_INDEX, 3,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX))
-
-            # Complete the rectangle
-            constraints.append(Sketcher.Constraint("Coincident", 3, SKETCH_GEOMETRY_VERTEX_END_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX))
+        # simple rectangle
+        geometries.append(Part.LineSegment(xy_plane_top_left_vector(), xy_plane_top_right_vector()))
+        constraints.append(Sketcher.Constraint("Horizontal", 0))
+
+        geometries.append(Part.LineSegment(xy_plane_top_right_vector(), xy_plane_bottom_right_vector()))
+        constraints.append(Sketcher.Constraint("Vertical", 1))
+        constraints.append(Sketcher.Constraint("Coincident", 0, SKETCH_GEOMETRY_VERTEX_END_INDEX, 1,
+                                               SKETCH_GEOMETRY_VERTEX_START_INDEX))
+
+        geometries.append(Part.LineSegment(xy_plane_bottom_right_vector(), xy_plane_bottom_left_vector()))
+        constraints.append(Sketcher.Constraint("Horizontal", 2))
+        constraints.append(Sketcher.Constraint("Coincident", 1, SKETCH_GEOMETRY_VERTEX_END_INDEX, 2,
+                                               SKETCH_GEOMETRY_VERTEX_START_INDEX))
+
+        geometries.append(Part.LineSegment(xy_plane_bottom_left_vector(), xy_plane_top_left_vector()))
+        constraints.append(Sketcher.Constraint("Vertical", 3))
+        constraints.append(Sketcher.Constraint("Coincident", 2, SKETCH_GEOMETRY_VERTEX_END_INDEX, 3,
+                                               SKETCH_GEOMETRY_VERTEX_START_INDEX))
+
+        # Complete the rectangle
+        constraints.append(Sketcher.Constraint("Coincident", 3, SKETCH_GEOMETRY_VERTEX_END_INDEX, 0,
+                                               SKETCH_GEOMETRY_VERTEX_START_INDEX))
+
+        # Width
+        width_index = len(constraints)
+        constraints.append(Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
+                                               SKETCH_GEOMETRY_VERTEX_END_INDEX, self._body_width(side_thickness)))
+        # Depth
+        depth_index = len(constraints)
+        constraints.append(Sketcher.Constraint("DistanceY", 1, SKETCH_GEOMETRY_VERTEX_START_INDEX, 1,
+                                               SKETCH_GEOMETRY_VERTEX_END_INDEX, self._body_depth(side_thickness)))
 
-            # Width
-            constraints.append(Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   (self.width * DIMS_STUD_SPACING)
-                                                   - (2 * DIMS_FLAT_SIDE_THICKNESS)
-                                                   - (2 * DIMS_BRICK_OUTER_REDUCTION)))
-            # Depth
-            constraints.append(Sketcher.Constraint("DistanceY", 1, SKETCH_GEOMETRY_VERTEX_START_INDEX, 1,
-                                                   SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                                   (self.depth * DIMS_STUD_SPACING)
-                                                   - (2 * DIMS_FLAT_SIDE_THICKNESS)
-                                                   - (2 * DIMS_BRICK_OUTER_REDUCTION)))
-
-            # Half stud offsets from origin
-            constraints.append(Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   (DIMS_STUD_SPACING / 2)
-                                                   - DIMS_FLAT_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION))
-            constraints.append(Sketcher.Constraint("DistanceY", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                                   (DIMS_STUD_SPACING / 2)
-                                                   - DIMS_FLAT_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION))
+        # Half stud offsets from origin
+        constraints.append(Sketcher.Constraint("DistanceX", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               (DIMS_STUD_SPACING / 2)
+                                               - side_thickness - DIMS_BRICK_OUTER_REDUCTION))
+        constraints.append(Sketcher.Constraint("DistanceY", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               (DIMS_STUD_SPACING / 2)
+                                               - side_thickness - DIMS_BRICK_OUTER_REDUCTION))
 
         body_pocket_sketch.addGeometry(geometries, False)
         body_pocket_sketch.addConstraint(constraints)
 
+        # named so that update() can set them in place
+        body_pocket_sketch.renameConstraint(width_index, "width")
+        body_pocket_sketch.renameConstraint(depth_index, "depth")
+
         body_pocket = self.brick.newObject("PartDesign::Pocket", "body_pocket")
         body_pocket.Type = POCKET_TYPE_UP_TO_FACE
         body_pocket.Profile = body_pocket_sketch
-        body_pocket.UpToFace = (self.top_inside_datum_plane, [""])
+        body_pocket.UpToFace = (self.context.datum_plane("top_inside_datum_plane"), [""])
         body_pocket.Reversed = True
 
         self.doc.recompute()
-        body_pocket_sketch.ViewObject.Visibility = False
+        set_visibility(body_pocket_sketch, False)
+
+    def _fill_front_tube_ribs_sketch(self, sketch):
+
+        geometries = []
+        constraints = []
+
+        for i in self.layout.tube_rib_width_indices.tolist():
+            self._add_rib_sketch(geometries, constraints, i,
+                                 DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET,
+                                 xz_plane_bottom_left_vector(), xz_plane_bottom_right_vector(),
+                                 xz_plane_bottom_right_vector(), xz_plane_top_right_vector())
+
+        sketch.addGeometry(geometries, False)
+        sketch.addConstraint(constraints)
+
+    def _fill_side_tube_ribs_sketch(self, sketch):
+
+        geometries = []
+        constraints = []
+
+        for i in self.layout.tube_rib_depth_indices.tolist():
+            self._add_rib_sketch(geometries, constraints, i,
+                                 DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET,
+                                 yz_plane_bottom_left_vector(), yz_plane_bottom_right_vector(),
+                                 yz_plane_bottom_right_vector(), yz_plane_top_right_vector())
+
+        sketch.addGeometry(geometries, False)
+        sketch.addConstraint(constraints)
 
+    @profiled("BodyRenderer._render_tube_ribs")
     def _render_tube_ribs(self):
-        Console.PrintMessage("_render_tube_ribs()\n")
+        log.debug("_render_tube_ribs()")
 
         # TODO: determine a replacement for tube ribs if technic holes exist
 
-        if self.width > 2:
+        if len(self.layout.tube_rib_width_indices) > 0:
 
             # front tube ribs pad
 
             front_tube_ribs_sketch = self.brick.newObject("Sketcher::SketchObject", "front_tube_ribs_sketch")
-            front_tube_ribs_sketch.AttachmentSupport = (self.front_inside_datum_plane, '')
+            front_tube_ribs_sketch.AttachmentSupport = (self.context.datum_plane("front_inside_datum_plane"), '')
             front_tube_ribs_sketch.MapMode = 'FlatFace'
 
             # add top_inside_datum_plane to sketch as an edge so that it can be referenced
             # this will add a line geometry element to the sketch as item 0
-            front_tube_ribs_sketch.addExternal(self.top_inside_datum_plane.Label, '')
+            front_tube_ribs_sketch.addExternal(self.context.datum_plane("top_inside_datum_plane").Label, '')
 
-            geometries = []
-            constraints = []
-
-            # choose correct tubes to render ribs on
-            indices = []
-            if self.width % 2 == 0:
-                for i in range(2, self.width, 2):
-                    indices.append(i)
-            else:
-                for i in range(((self.width - 1) // 2), 0, -2):
-                    indices.append(i)
-                for i in range(((self.width - 1) // 2) + 1, self.width, 2):
-                    indices.append(i)
-            for i in indices:
-                self._add_rib_sketch(geometries, constraints, i,
-                                     DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET,
-                                     xz_plane_bottom_left_vector(), xz_plane_bottom_right_vector(),
-                                     xz_plane_bottom_right_vector(), xz_plane_top_right_vector())
-
-            front_tube_ribs_sketch.addGeometry(geometries, False)
-            front_tube_ribs_sketch.addConstraint(constraints)
+            self._fill_front_tube_ribs_sketch(front_tube_ribs_sketch)
 
             front_tube_ribs_pad = self.brick.newObject("PartDesign::Pad", "front_tube_ribs_pad")
             front_tube_ribs_pad.Type = PAD_TYPE_UP_TO_FACE
-            front_tube_ribs_pad.UpToFace = (self.back_inside_datum_plane, [""])
+            front_tube_ribs_pad.UpToFace = (self.context.datum_plane("back_inside_datum_plane"), [""])
             front_tube_ribs_pad.Profile = front_tube_ribs_sketch
             front_tube_ribs_pad.Reversed = True
 
             self.doc.recompute()
-            front_tube_ribs_sketch.ViewObject.Visibility = False
+            set_visibility(front_tube_ribs_sketch, False)
 
-        if self.depth > 2:
+        if len(self.layout.tube_rib_depth_indices) > 0:
 
             # side tube ribs pad
 
             side_tube_ribs_sketch = self.brick.newObject("Sketcher::SketchObject", "side_tube_ribs_sketch")
-            side_tube_ribs_sketch.AttachmentSupport = (self.left_inside_datum_plane, '')
+            side_tube_ribs_sketch.AttachmentSupport = (self.context.datum_plane("left_inside_datum_plane"), '')
             side_tube_ribs_sketch.MapMode = 'FlatFace'
 
             # add top_inside_datum_plane to sketch as an edge so that it can be referenced
             # this will add a line geometry element to the sketch as item 0
-            side_tube_ribs_sketch.addExternal(self.top_inside_datum_plane.Label, '')
+            side_tube_ribs_sketch.addExternal(self.context.datum_plane("top_inside_datum_plane").Label, '')
 
-            geometries = []
-            constraints = []
-
-            # choose correct tubes to render ribs on
-            indices = []
-            if self.depth % 2 == 0:
-                for i in range(2, self.depth, 2):
-                    indices.append(i)
-            else:
-                for i in range(((self.depth - 1) // 2), 0, -2):
-                    indices.append(i)
-                for i in range(((self.depth - 1) // 2) + 1, self.depth, 2):
-                    indices.append(i)
-            for i in indices:
-                self._add_rib_sketch(geometries, constraints, i,
-                                     DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET,
-                                     yz_plane_bottom_left_vector(), yz_plane_bottom_right_vector(),
-                                     yz_plane_bottom_right_vector(), yz_plane_top_right_vector())
-
-            side_tube_ribs_sketch.addGeometry(geometries, False)
-            side_tube_ribs_sketch.addConstraint(constraints)
+            self._fill_side_tube_ribs_sketch(side_tube_ribs_sketch)
 
             side_tube_ribs_pad = self.brick.newObject("PartDesign::Pad", "side_tube_ribs_pad")
             side_tube_ribs_pad.Type = PAD_TYPE_UP_TO_FACE
-            side_tube_ribs_pad.UpToFace = (self.right_inside_datum_plane, [""])
+            side_tube_ribs_pad.UpToFace = (self.context.datum_plane("right_inside_datum_plane"), [""])
             side_tube_ribs_pad.Profile = side_tube_ribs_sketch
 
             self.doc.recompute()
-            side_tube_ribs_sketch.ViewObject.Visibility = False
+            set_visibility(side_tube_ribs_sketch, False)
 
-    def _render_tubes(self, body_pad_sketch):
-        Console.PrintMessage("_render_tubes()\n")
+    def _fill_tubes_pocket_sketch(self, sketch):
 
-        # tubes pad
-
-        tubes_pad_sketch = self.brick.newObject("Sketcher::SketchObject", "tubes_pad_sketch")
-        tubes_pad_sketch.AttachmentSupport = (body_pad_sketch, '')
-        tubes_pad_sketch.MapMode = 'ObjectXY'
-        tubes_pad_sketch.Placement = Placement(Vector(0, 0, DIMS_STICK_AND_TUBE_BOTTOM_INSET),
-                                               Rotation(Vector(0, 0, 1), 0))
-
-        # Outer circle
-        add_circle_to_sketch(tubes_pad_sketch, DIMS_TUBE_OUTER_RADIUS, 0.5 * DIMS_STUD_SPACING,
-                             0.5 * DIMS_STUD_SPACING, True)
-
-        self.doc.recompute()
+        x_offset, y_offset = self.layout.tube_centres[0].tolist()
+        add_inner_circle_with_flats_to_sketch(sketch, DIMS_TUBE_OUTER_RADIUS,
+                                              DIMS_TUBE_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
+                                              x_offset, y_offset)
+        self.doc.solve(sketch)
 
         # create array if needed
         if self.width > 2 or self.depth > 2:
-            geometry_indices = [range(0, len(tubes_pad_sketch.Geometry) - 1)]
+            geometry_indices = [range(0, len(sketch.Geometry) - 1)]
             if self.width > 2 and self.depth == 2:
-                tubes_pad_sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                     self.width - 1, self.depth - 1, True)
+                sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
+                                           self.width - 1, self.depth - 1, True)
             else:
-                tubes_pad_sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                     self.depth - 1, self.width - 1, True)
-        self.doc.recompute()
+                sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
+                                           self.depth - 1, self.width - 1, True)
 
-        tubes_pad = self.brick.newObject("PartDesign::Pad", "tubes_pad")
-        tubes_pad.Type = PAD_TYPE_UP_TO_FACE
-        tubes_pad.UpToFace = (self.top_inside_datum_plane, [""])
-        tubes_pad.Profile = tubes_pad_sketch
+    @profiled("BodyRenderer._render_tube_ribs_trim")
+    def _render_tube_ribs_trim(self):
+        log.debug("_render_tube_ribs_trim()")
 
-        self.doc.recompute()
-        tubes_pad_sketch.ViewObject.Visibility = False
-
-        # tubes pocket
+        # the ribs run through the hollow tubes so the inside of the tubes is cleared again
 
         tubes_pocket_sketch = self.brick.newObject("Sketcher::SketchObject", "tubes_pocket_sketch")
-        tubes_pocket_sketch.AttachmentSupport = (self.top_inside_datum_plane, '')
+        tubes_pocket_sketch.AttachmentSupport = (self.context.datum_plane("top_inside_datum_plane"), '')
         tubes_pocket_sketch.MapMode = 'FlatFace'
 
-        add_inner_circle_with_flats_to_sketch(tubes_pocket_sketch, DIMS_TUBE_OUTER_RADIUS,
-                                              DIMS_TUBE_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
-                                              0.5 * DIMS_STUD_SPACING,
-                                              0.5 * DIMS_STUD_SPACING)
+        self._fill_tubes_pocket_sketch(tubes_pocket_sketch)
         self.doc.recompute()
 
+        tubes_pocket = self.brick.newObject("PartDesign::Pocket", "tubes_pocket")
+        tubes_pocket.Type = POCKET_TYPE_THROUGH_ALL
+        tubes_pocket.Profile = tubes_pocket_sketch
+
+        self.doc.recompute()
+        set_visibility(tubes_pocket_sketch, False)
+
+    def _fill_tubes_sketch(self, sketch):
+
+        x_offset, y_offset = self.layout.tube_centres[0].tolist()
+        add_circle_to_sketch(sketch, DIMS_TUBE_OUTER_RADIUS, x_offset, y_offset, True)
+        add_inner_circle_with_flats_to_sketch(sketch, DIMS_TUBE_OUTER_RADIUS,
+                                              DIMS_TUBE_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
+                                              x_offset, y_offset)
+        self.doc.solve(sketch)
+
         # create array if needed
         if self.width > 2 or self.depth > 2:
-            geometry_indices = [range(0, len(tubes_pocket_sketch.Geometry) - 1)]
+            geometry_indices = list(range(0, len(sketch.Geometry)))
             if self.width > 2 and self.depth == 2:
-                tubes_pocket_sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                        self.width - 1, self.depth - 1, True)
+                sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
+                                           self.width - 1, self.depth - 1, True)
             else:
-                tubes_pocket_sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                        self.depth - 1, self.width - 1, True)
+                sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
+                                           self.depth - 1, self.width - 1, True)
+
+    @profiled("BodyRenderer._render_hollow_tubes")
+    def _render_hollow_tubes(self, body_pad_sketch):
+        log.debug("_render_hollow_tubes()")
+
+        # outside and inside of the tubes in one sketch so that a single pad renders hollow tubes
+
+        tubes_sketch = self.brick.newObject("Sketcher::SketchObject", "tubes_sketch")
+        tubes_sketch.AttachmentSupport = (body_pad_sketch, '')
+        tubes_sketch.MapMode = 'ObjectXY'
+        tubes_sketch.Placement = Placement(Vector(0, 0, DIMS_STICK_AND_TUBE_BOTTOM_INSET),
+                                           Rotation(Vector(0, 0, 1), 0))
+
+        self._fill_tubes_sketch(tubes_sketch)
         self.doc.recompute()
 
-        tubes_pocket = self.brick.newObject("PartDesign::Pocket", "tubes_pocket")
-        tubes_pocket.Type = POCKET_TYPE_THROUGH_ALL
-        tubes_pocket.Profile = tubes_pocket_sketch
+        tubes_pad = self.brick.newObject("PartDesign::Pad", "tubes_pad")
+        tubes_pad.Type = PAD_TYPE_UP_TO_FACE
+        tubes_pad.UpToFace = (self.context.datum_plane("top_inside_datum_plane"), [""])
+        tubes_pad.Profile = tubes_sketch
 
         self.doc.recompute()
-        tubes_pocket_sketch.ViewObject.Visibility = False
+        set_visibility(tubes_sketch, False)
+
+    def _fill_stick_ribs_sketch(self, sketch):
+
+        geometries = []
+        constraints = []
 
+        for i in self.layout.stick_rib_indices.tolist():
+            self._add_rib_sketch(geometries, constraints, i,
+                                 DIMS_STICK_RIB_THICKNESS, DIMS_STICK_RIB_BOTTOM_OFFSET,
+                                 xz_plane_bottom_left_vector(), xz_plane_bottom_right_vector(),
+                                 xz_plane_bottom_right_vector(), xz_plane_top_right_vector())
+
+        sketch.addGeometry(geometries, False)
+        sketch.addConstraint(constraints)
+
+    @profiled("BodyRenderer._render_stick_ribs")
     def _render_stick_ribs(self):
-        Console.PrintMessage("_render_stick_ribs()\n")
+        log.debug("_render_stick_ribs()")
 
         # stick ribs pad
 
         stick_ribs_sketch = self.brick.newObject("Sketcher::SketchObject", "stick_ribs_sketch")
         if self.width > 1:
-            stick_ribs_sketch.AttachmentSupport = (self.front_inside_datum_plane, '')
+            stick_ribs_sketch.AttachmentSupport = (self.context.datum_plane("front_inside_datum_plane"), '')
         else:
-            stick_ribs_sketch.AttachmentSupport = (self.left_inside_datum_plane, '')
+            stick_ribs_sketch.AttachmentSupport = (self.context.datum_plane("left_inside_datum_plane"), '')
         stick_ribs_sketch.MapMode = 'FlatFace'
 
         # add top_inside_datum_plane to sketch as an edge so that it can be referenced
         # this will add a line geometry element to the sketch as item 0
-        stick_ribs_sketch.addExternal(self.top_inside_datum_plane.Label, '')
-
-        geometries = []
-        constraints = []
-
-        # choose correct sticks to render ribs on
-        indices = []
-        if self.width > 1:
-            studs = self.width
-        else:
-            studs = self.depth
+        stick_ribs_sketch.addExternal(self.context.datum_plane("top_inside_datum_plane").Label, '')
 
-        # for stud count between from 2 to 4 each stick has rib
-        if studs < 5:
-            for i in range(1, studs):
-                indices.append(i)
-        # otherwise every second
-        else:
-            if studs % 2 == 0:
-                for i in range(2, studs, 2):
-                    indices.append(i)
-            else:
-                for i in range(((studs - 1) // 2), 0, -2):
-                    indices.append(i)
-                for i in range(((studs - 1) // 2) + 1, studs, 2):
-                    indices.append(i)
-
-        for i in indices:
-            self._add_rib_sketch(geometries, constraints, i,
-                                 DIMS_STICK_RIB_THICKNESS, DIMS_STICK_RIB_BOTTOM_OFFSET,
-                                 xz_plane_bottom_left_vector(), xz_plane_bottom_right_vector(),
-                                 xz_plane_bottom_right_vector(), xz_plane_top_right_vector())
-
-        stick_ribs_sketch.addGeometry(geometries, False)
-        stick_ribs_sketch.addConstraint(constraints)
+        self._fill_stick_ribs_sketch(stick_ribs_sketch)
 
         stick_ribs_pad = self.brick.newObject("PartDesign::Pad", "stick_ribs_pad")
         stick_ribs_pad.Type = PAD_TYPE_UP_TO_FACE
         if self.width > 1:
-            stick_ribs_pad.UpToFace = (self.back_inside_datum_plane, [""])
+            stick_ribs_pad.UpToFace = (self.context.datum_plane("back_inside_datum_plane"), [""])
         else:
-            stick_ribs_pad.UpToFace = (self.right_inside_datum_plane, [""])
+            stick_ribs_pad.UpToFace = (self.context.datum_plane("right_inside_datum_plane"), [""])
         stick_ribs_pad.Profile = stick_ribs_sketch
         if self.width > 1:
             stick_ribs_pad.Reversed = True
 
         self.doc.recompute()
-        stick_ribs_sketch.ViewObject.Visibility = False
-
-    def _render_sticks(self, body_pad_sketch):
-        Console.PrintMessage("_render_sticks()\n")
-
-        # sticks pad
+        set_visibility(stick_ribs_sketch, False)
 
-        sticks_pad_sketch = self.brick.newObject("Sketcher::SketchObject", "sticks_pad_sketch")
-        sticks_pad_sketch.AttachmentSupport = (body_pad_sketch, '')
-        sticks_pad_sketch.MapMode = 'ObjectXY'
-        sticks_pad_sketch.Placement = Placement(Vector(0, 0, DIMS_STICK_AND_TUBE_BOTTOM_INSET),
-                                                Rotation(Vector(0, 0, 1), 0))
+    def _fill_sticks_pocket_sketch(self, sketch):
 
         geometries = []
         constraints = []
 
         geometries.append(Part.Circle())
-        constraints.append(Sketcher.Constraint("Radius", 0, DIMS_STICK_OUTER_RADIUS))
+        constraints.append(Sketcher.Constraint("Radius", 0, DIMS_STICK_INNER_RADIUS))
 
         # Half stud offsets from origin
         if self.width > 1:
             constraints.append(Sketcher.Constraint("DistanceX", SKETCH_GEOMETRY_ORIGIN_INDEX,
                                                    SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0.5 * DIMS_STUD_SPACING))
+                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                                   0.5 * DIMS_STUD_SPACING))
             constraints.append(Sketcher.Constraint("DistanceY", SKETCH_GEOMETRY_ORIGIN_INDEX,
                                                    SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
                                                    SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0))
@@ -712,101 +463,139 @@ class BodyRenderer(object):
                                                    SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0))
             constraints.append(Sketcher.Constraint("DistanceY", SKETCH_GEOMETRY_ORIGIN_INDEX,
                                                    SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0.5 * DIMS_STUD_SPACING))
+                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                                   0.5 * DIMS_STUD_SPACING))
 
-        sticks_pad_sketch.addGeometry(geometries, False)
-        sticks_pad_sketch.addConstraint(constraints)
+        sketch.addGeometry(geometries, False)
+        sketch.addConstraint(constraints)
 
-        self.doc.recompute()
+        self.doc.solve(sketch)
 
         if self.width > 1:
-            sticks_pad_sketch.addRectangularArray([0], Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                  self.width - 1, 1, True)
-        else:
-            sticks_pad_sketch.addRectangularArray([0], Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                  self.depth - 1, 1, True)
+            sketch.addRectangularArray([0], Vector(DIMS_STUD_SPACING, 0, 0), False, self.width - 1, 1, True)
+        if self.depth > 1:
+            sketch.addRectangularArray([0], Vector(0, DIMS_STUD_SPACING, 0), False, self.depth - 1, 1, True)
+
+    @profiled("BodyRenderer._render_stick_ribs_trim")
+    def _render_stick_ribs_trim(self):
+        log.debug("_render_stick_ribs_trim()")
+
+        # the ribs run through the hollow sticks so the inside of the sticks is cleared again
+
+        sticks_pocket_sketch = self.brick.newObject("Sketcher::SketchObject", "sticks_pocket_sketch")
+        sticks_pocket_sketch.AttachmentSupport = (self.context.datum_plane("top_inside_datum_plane"), '')
+        sticks_pocket_sketch.MapMode = 'FlatFace'
+
+        self._fill_sticks_pocket_sketch(sticks_pocket_sketch)
         self.doc.recompute()
 
-        sticks_pad = self.brick.newObject("PartDesign::Pad", "sticks_pad")
-        sticks_pad.Type = PAD_TYPE_UP_TO_FACE
-        sticks_pad.UpToFace = (self.top_inside_datum_plane, [""])
-        sticks_pad.Profile = sticks_pad_sketch
+        sticks_pocket = self.brick.newObject("PartDesign::Pocket", "sticks_pocket")
+        sticks_pocket.Type = POCKET_TYPE_THROUGH_ALL
+        sticks_pocket.Profile = sticks_pocket_sketch
 
         self.doc.recompute()
-        sticks_pad_sketch.ViewObject.Visibility = False
+        set_visibility(sticks_pocket_sketch, False)
 
-        # sticks pocket
+    def _fill_sticks_sketch(self, sketch):
 
-        sticks_pocket_sketch = self.brick.newObject("Sketcher::SketchObject", "sticks_pocket_sketch")
-        sticks_pocket_sketch.AttachmentSupport = (self.top_inside_datum_plane, '')
-        sticks_pocket_sketch.MapMode = 'FlatFace'
+        # first stick, arrayed to the others
+        x_offset, y_offset = self.layout.stick_centres[0].tolist()
 
-        geometries = []
-        constraints = []
+        add_circle_to_sketch(sketch, DIMS_STICK_OUTER_RADIUS, x_offset, y_offset, False)
+        add_circle_to_sketch(sketch, DIMS_STICK_INNER_RADIUS, x_offset, y_offset, False)
 
-        geometries.append(Part.Circle())
-        constraints.append(Sketcher.Constraint("Radius", 0, DIMS_STICK_INNER_RADIUS))
+        self.doc.solve(sketch)
 
-        # Half stud offsets from origin
+        geometry_indices = list(range(0, len(sketch.Geometry)))
         if self.width > 1:
-            constraints.append(Sketcher.Constraint("DistanceX", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                                   0.5 * DIMS_STUD_SPACING))
-            constraints.append(Sketcher.Constraint("DistanceY", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0))
+            sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
+                                       self.width - 1, 1, True)
         else:
-            constraints.append(Sketcher.Constraint("DistanceX", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX, 0))
-            constraints.append(Sketcher.Constraint("DistanceY", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                                   SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
-                                                   SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                                   0.5 * DIMS_STUD_SPACING))
+            sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
+                                       self.depth - 1, 1, True)
 
-        sticks_pocket_sketch.addGeometry(geometries, False)
-        sticks_pocket_sketch.addConstraint(constraints)
+    @profiled("BodyRenderer._render_hollow_sticks")
+    def _render_hollow_sticks(self, body_pad_sketch):
+        log.debug("_render_hollow_sticks()")
 
-        self.doc.recompute()
+        # outside and inside of the sticks in one sketch so that a single pad renders hollow sticks
 
-        if self.width > 1:
-            sticks_pocket_sketch.addRectangularArray([0], Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                     self.width - 1, 1, True)
-        if self.depth > 1:
-            sticks_pocket_sketch.addRectangularArray([0], Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                     self.depth - 1, 1, True)
+        sticks_sketch = self.brick.newObject("Sketcher::SketchObject", "sticks_sketch")
+        sticks_sketch.AttachmentSupport = (body_pad_sketch, '')
+        sticks_sketch.MapMode = 'ObjectXY'
+        sticks_sketch.Placement = Placement(Vector(0, 0, DIMS_STICK_AND_TUBE_BOTTOM_INSET),
+                                            Rotation(Vector(0, 0, 1), 0))
+
+        self._fill_sticks_sketch(sticks_sketch)
         self.doc.recompute()
 
-        sticks_pocket = self.brick.newObject("PartDesign::Pocket", "sticks_pocket")
-        sticks_pocket.Type = POCKET_TYPE_THROUGH_ALL
-        sticks_pocket.Profile = sticks_pocket_sketch
+        sticks_pad = self.brick.newObject("PartDesign::Pad", "sticks_pad")
+        sticks_pad.Type = PAD_TYPE_UP_TO_FACE
+        sticks_pad.UpToFace = (self.context.datum_plane("top_inside_datum_plane"), [""])
+        sticks_pad.Profile = sticks_sketch
 
         self.doc.recompute()
-        sticks_pocket_sketch.ViewObject.Visibility = False
+        set_visibility(sticks_sketch, False)
+
+    def _fill_side_ribs_sketch(self, sketch):
+
+        inner_offset = (DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
+        far_width = ((self.width - 1) * DIMS_STUD_SPACING) + inner_offset
+        far_depth = ((self.depth - 1) * DIMS_STUD_SPACING) + inner_offset
+
+        # (x min, y min, x max, y max) of each rib
+        ribs = []
+        for x in self.layout.side_rib_width_offsets.tolist():
+            ribs.append((x - (DIMS_SIDE_RIB_WIDTH / 2), -1 * inner_offset,
+                         x + (DIMS_SIDE_RIB_WIDTH / 2), DIMS_SIDE_RIB_DEPTH - inner_offset))
+            ribs.append((x - (DIMS_SIDE_RIB_WIDTH / 2), far_depth - DIMS_SIDE_RIB_DEPTH,
+                         x + (DIMS_SIDE_RIB_WIDTH / 2), far_depth))
+        for y in self.layout.side_rib_depth_offsets.tolist():
+            ribs.append((-1 * inner_offset, y - (DIMS_SIDE_RIB_WIDTH / 2),
+                         DIMS_SIDE_RIB_DEPTH - inner_offset, y + (DIMS_SIDE_RIB_WIDTH / 2)))
+            ribs.append((far_width - DIMS_SIDE_RIB_DEPTH, y - (DIMS_SIDE_RIB_WIDTH / 2),
+                         far_width, y + (DIMS_SIDE_RIB_WIDTH / 2)))
+
+        # placed from the layout without constraints, there is nothing for the solver to do
+        geometries = []
+        for x_min, y_min, x_max, y_max in ribs:
+            corners = [Vector(x_min, y_min, 0), Vector(x_max, y_min, 0), Vector(x_max, y_max, 0),
+                       Vector(x_min, y_max, 0)]
+            for i in range(0, 4):
+                geometries.append(Part.LineSegment(corners[i], corners[(i + 1) % 4]))
+        sketch.addGeometry(geometries, False)
 
-    def _render_tubes_or_sticks(self, body_pad_sketch):
-        Console.PrintMessage("_render_tubes_or_sticks()\n")
+    @profiled("BodyRenderer._render_side_ribs")
+    def _render_side_ribs(self):
+        log.debug("_render_side_ribs()")
 
-        tubes = self.depth > 1 and self.width > 1
-        tube_ribs = tubes and self.height > 1 and (self.depth > 2 or self.width > 2)
-        sticks = not tubes and (self.depth > 1 or self.width > 1)
-        stick_ribs = sticks and self.height > 1 and not self.hole_style == HoleStyle.HOLE
+        # one rib per stud on the inside of each wall, from the bottom up to the top inside
 
-        if tube_ribs:
-            self._render_tube_ribs()
+        side_ribs_sketch = self.brick.newObject("Sketcher::SketchObject", "side_ribs_sketch")
+        side_ribs_sketch.AttachmentSupport = (self.xy_plane, '')
+        side_ribs_sketch.MapMode = 'ObjectXY'
 
-        if tubes:
-            self._render_tubes(body_pad_sketch)
+        self._fill_side_ribs_sketch(side_ribs_sketch)
 
-        if stick_ribs:
-            self._render_stick_ribs()
+        side_ribs_pad = self.brick.newObject("PartDesign::Pad", "side_ribs_pad")
+        side_ribs_pad.Type = PAD_TYPE_UP_TO_FACE
+        side_ribs_pad.UpToFace = (self.context.datum_plane("top_inside_datum_plane"), [""])
+        side_ribs_pad.Profile = side_ribs_sketch
 
-        if sticks:
-            self._render_sticks(body_pad_sketch)
+        self.doc.recompute()
+        set_visibility(side_ribs_sketch, False)
 
-    def render(self, context):
-        Console.PrintMessage("render\n")
+    def _render_tubes_or_sticks(self, body_pad_sketch):
+        log.debug("_render_tubes_or_sticks()")
+
+        # the outside and inside of the tubes and sticks are a single pad, any ribs are added by render_ribs()
+        if self.layout.tubes:
+            self._render_hollow_tubes(body_pad_sketch)
+
+        if self.layout.sticks:
+            self._render_hollow_sticks(body_pad_sketch)
+
+    def _setup(self, context):
 
         self.width = context.width
         self.depth = context.depth
@@ -815,18 +604,22 @@ class BodyRenderer(object):
         self.hole_style = context.hole_style
         self.holes_offset = context.holes_offset
 
+        self.detail = context.detail
+        self.layout = context.layout
+
         self.doc = context.doc
         self.brick = context.brick
+        self.context = context
 
-        self.top_datum_plane = context.top_datum_plane
-        self.top_inside_datum_plane = context.top_inside_datum_plane
-        self.front_inside_datum_plane = context.front_inside_datum_plane
-        self.back_inside_datum_plane = context.back_inside_datum_plane
-        self.left_inside_datum_plane = context.left_inside_datum_plane
-        self.right_inside_datum_plane = context.right_inside_datum_plane
         self.xy_plane = context.xy_plane
 
-        body_pad_sketch = self._render_body_pad_and_fillets()
+    @profiled("BodyRenderer.render")
+    def render(self, context):
+        log.debug("render")
+
+        self._setup(context)
+
+        body_pad_sketch = self._render_body_pad()
 
         # TODO: support side rib variation for modern 2x1 tile and technic bricks with non-offset holes
         # TODO: 0.25 fillet on inner corners
@@ -834,3 +627,83 @@ class BodyRenderer(object):
 
         # TODO: determine a replacement for internal ribs if side studs exist with holes
         self._render_tubes_or_sticks(body_pad_sketch)
+
+    @profiled("BodyRenderer.update")
+    def update(self, context):
+        log.debug("update")
+
+        self._setup(context)
+
+        # a new width or depth only changes sketch values and the number of tubes or sticks
+        body_pad_sketch = context.stage_object("body_pad_sketch")
+        body_pad_sketch.setDatum("width", self._body_width(0))
+        body_pad_sketch.setDatum("depth", self._body_depth(0))
+
+        body_pocket_sketch = context.stage_object("body_pocket_sketch")
+        body_pocket_sketch.setDatum("width", self._body_width(self._side_thickness()))
+        body_pocket_sketch.setDatum("depth", self._body_depth(self._side_thickness()))
+
+        if self.layout.tubes:
+            refill_sketch(context.stage_object("tubes_sketch"), self._fill_tubes_sketch)
+
+        if self.layout.sticks:
+            refill_sketch(context.stage_object("sticks_sketch"), self._fill_sticks_sketch)
+
+    @profiled("BodyRenderer.render_ribs")
+    def render_ribs(self, context):
+        log.debug("render_ribs")
+
+        self._setup(context)
+
+        if self.layout.side_ribs:
+            self._render_side_ribs()
+
+        # ribs run through the hollow tubes and sticks so they are trimmed back to the inside afterwards, the ribs are
+        # extruded across the brick and the trim down from the top so they cannot share a single sketch
+        if self.layout.tube_ribs:
+            self._render_tube_ribs()
+            self._render_tube_ribs_trim()
+
+        if self.layout.stick_ribs:
+            self._render_stick_ribs()
+            self._render_stick_ribs_trim()
+
+    @profiled("BodyRenderer.update_ribs")
+    def update_ribs(self, context):
+        log.debug("update_ribs")
+
+        self._setup(context)
+
+        # the same ribs sketches with the ribs of the new width and depth
+        if self.layout.side_ribs:
+            refill_sketch(context.stage_object("side_ribs_sketch"), self._fill_side_ribs_sketch)
+
+        if self.layout.tube_ribs:
+            if len(self.layout.tube_rib_width_indices) > 0:
+                refill_sketch(context.stage_object("front_tube_ribs_sketch"), self._fill_front_tube_ribs_sketch)
+            if len(self.layout.tube_rib_depth_indices) > 0:
+                refill_sketch(context.stage_object("side_tube_ribs_sketch"), self._fill_side_tube_ribs_sketch)
+            refill_sketch(context.stage_object("tubes_pocket_sketch"), self._fill_tubes_pocket_sketch)
+
+        if self.layout.stick_ribs:
+            refill_sketch(context.stage_object("stick_ribs_sketch"), self._fill_stick_ribs_sketch)
+            refill_sketch(context.stage_object("sticks_pocket_sketch"), self._fill_sticks_pocket_sketch)
+
+    @profiled("BodyRenderer.render_fillets")
+    def render_fillets(self, context):
+        log.debug("render_fillets")
+
+        self._setup(context)
+
+        # the outside edges of the body, the features above are not rendered yet
+        self.doc.recompute(shape_required=True)
+
+        body = self.brick.Tip
+        edge_names = get_outer_edge_names(body)
+
+        if len(edge_names) > 0:
+            body_edge_fillets = self.brick.newObject("PartDesign::Fillet", "body_edge_fillets")
+            body_edge_fillets.Radius = DIMS_EDGE_FILLET
+            body_edge_fillets.Base = (body, edge_names)
+
+            self.doc.recompute()
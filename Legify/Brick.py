@@ -1,11 +1,13 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Placement, Rotation, Vector, activeDocument
-from Legify.Body import *
-from Legify.Holes import *
-from Legify.Pins import *
-from Legify.SideStuds import *
-from Legify.TopStuds import *
+from FreeCAD import Placement, Rotation, Vector, activeDocument
+import json
+from Legify.Cache import *
+from Legify.Dimensions import *
+from Legify.Log import *
+from Legify.Profiler import *
+from Legify.Spec import *
+from Legify.Transaction import *
 
 
 class BrickContext:
@@ -35,409 +37,257 @@ class BrickContext:
         self.hole_style = None
         self.holes_offset = None
 
-        self.top_datum_plane = None
-        self.left_datum_plane = None
-        self.right_datum_plane = None
-        self.front_datum_plane = None
-        self.back_datum_plane = None
+        self.detail = None
+        self.layout = None
 
-        self.top_inside_datum_plane = None
-        self.front_inside_datum_plane = None
-        self.back_inside_datum_plane = None
-        self.left_inside_datum_plane = None
-        self.right_inside_datum_plane = None
-        self.depth_mirror_datum_plane = None
+        # datum planes are only created when first asked for, see datum_plane()
+        self.datum_planes = {}
+        self.datum_plane_names = {}
+        self.datum_plane_factory = None
 
         self.xz_plane = None
         self.yz_plane = None
         self.xy_plane = None
 
+        # objects of the stage being updated in place, see stage_object()
+        self.stage_object_names = []
+
         self.doc = None
         self.brick = None
 
+    def datum_plane(self, name):
 
-class BrickRenderer:
-
-    def __init__(self, dimensions, top_studs, side_studs, pins, holes):
-
-        try:
-
-            self._parse_dimensions(dimensions)
-            self._parse_top_studs(top_studs)
-            self._parse_side_studs(side_studs)
-            self._parse_pins(pins)
-            self._parse_holes(holes)
-
-        except Exception as inst:
-            Console.PrintError(inst)
-
-    def _parse_dimensions(self, dimensions):
-
-        width = int(dimensions["width"])
-        depth = int(dimensions["depth"])
-        height = int(dimensions["height"])
-
-        if depth < 1 or depth > 20:
-            raise Exception("dimensions[\"depth\"] must be: 1..20")
-        if width < 1 or width > 20:
-            raise Exception("dimensions[\"width\"] must be: 1..20")
-        if height < 1 or height > 9:
-            raise Exception("dimensions[\"height\"] must be: 1..9")
-
-        self.width = width
-        self.depth = depth
-        self.height = height
-
-        Console.PrintMessage("Dimensions: {0}x{1}x{2}\n"
-                             .format(self.width, self.depth, self.height))
-
-    def _parse_top_studs(self, top_studs):
-
-        style = top_studs["style"]
-
-        if style not in (TopStudStyle.NONE, TopStudStyle.CLOSED, TopStudStyle.OPEN):
-            raise Exception("top_studs[\"style\"] must be: TopStudStyle.NONE|TopStudStyle.CLOSED|TopStudStyle.OPEN")
-
-        self.top_studs_style = style
-
-        if self.top_studs_style == TopStudStyle.NONE:
-
-            Console.PrintMessage("Top Studs: NONE\n")
-
-        else:
-
-            width_count = int(top_studs["width_count"])
-            depth_count = int(top_studs["depth_count"])
-
-            if width_count < 1 or width_count > self.width:
-                raise Exception("top_studs[\"width_count\"] must be: 1..dimensions[\"width\"]")
-
-            if depth_count < 1 or depth_count > self.depth:
-                raise Exception("top_studs[\"depth_count\"] must be: 1..dimensions[\"depth\"]")
-
-            self.top_studs_width_count = width_count
-            self.top_studs_depth_count = depth_count
-
-            Console.PrintMessage("Top Studs: {0} {1}x{2}\n".format(
-                "CLOSED" if self.top_studs_style == TopStudStyle.CLOSED else "OPEN",
-                self.top_studs_width_count,
-                self.top_studs_depth_count))
-
-    def _parse_side_studs(self, side_studs):
-
-        style = side_studs["style"]
-
-        if style not in (SideStudStyle.NONE, SideStudStyle.OPEN, SideStudStyle.HOLE):
-            raise Exception("side_studs[\"style\"] must be: "
-                            "SideStudStyle.NONE|SideStudStyle.OPEN|SideStudStyle.HOLE")
-
-        if style != SideStudStyle.NONE and self.height < 3:
-            Console.PrintMessage("side_studs[\"style\"] set to SideStudStyle.NONE as "
-                                 "dimensions[\"width\"] < 3\n")
-            style = SideStudStyle.NONE
-
-        front = bool(side_studs["front"])
-        back = bool(side_studs["back"])
-        left = bool(side_studs["left"])
-        right = bool(side_studs["right"])
-
-        if style != SideStudStyle.NONE and not front and not back and not left and not right:
-
-            Console.PrintMessage("side_studs[\"style\"] set to SideStudStyle.NONE as "
-                                 "none of Front, Back, Left, Right are True\n")
-            style = SideStudStyle.NONE
-
-        self.side_studs_style = style
-
-        if self.side_studs_style == SideStudStyle.NONE:
-
-            Console.PrintMessage("Side Studs: NONE\n")
-
-        else:
-
-            self.side_studs_front = front
-            self.side_studs_back = back
-            self.side_studs_left = left
-            self.side_studs_right = right
-
-            Console.PrintMessage("Side Studs: {0} {1}{2}{3}{4}\n".format(
-                "OPEN" if self.side_studs_style == SideStudStyle.OPEN else "HOLE",
-                "FRONT " if self.side_studs_front else "",
-                "BACK" if self.side_studs_back else "",
-                "LEFT " if self.side_studs_left else "",
-                "RIGHT " if self.side_studs_right else ""))
-
-    def _parse_pins(self, pins):
-
-        style = pins["style"]
-
-        if style not in (PinStyle.NONE, PinStyle.PIN, PinStyle.AXLE):
-            raise Exception("pins[\"style\"] must be: PinStyle.NONE|PinStyle.PIN|PinStyle.AXLE")
-
-        if style != PinStyle.NONE and self.height < 3:
-            Console.PrintMessage("pins[\"style\"] set to PinStyle.NONE as "
-                                 "dimensions[\"width\"] < 3\n")
-            style = PinStyle.NONE
+        datum_plane = self.datum_planes.get(name)
 
-        front = bool(pins["front"])
-        back = bool(pins["back"])
-        left = bool(pins["left"])
-        right = bool(pins["right"])
+        if datum_plane is None:
+            datum_plane = self.datum_plane_factory(self, name)
+            self.datum_planes[name] = datum_plane
+            self.datum_plane_names[name] = datum_plane.Name
 
-        if style != PinStyle.NONE and self.side_studs_style != SideStudStyle.NONE:
+        return datum_plane
 
-            if front and self.side_studs_front:
-                Console.PrintMessage("pins[\"front\"] set to False as "
-                                     "side_studs[\"style\"] != SideStudStyle.NONE and "
-                                     "side_studs[\"front\"] == True\n")
-                front = False
+    def stage_object(self, name):
 
-            if back and self.side_studs_back:
-                Console.PrintMessage("pins[\"back\"] set to False as "
-                                     "side_studs[\"style\"] != SideStudStyle.NONE and "
-                                     "side_studs[\"back\"] == True\n")
-                back = False
+        # FreeCAD appends a number to a name which is already taken in the document, e.g. by another brick
+        for object_name in self.stage_object_names:
+            if object_name == name or (object_name.startswith(name) and object_name[len(name):].isdigit()):
+                return self.doc.getObject(object_name)
 
-            if left and self.side_studs_left:
+        raise Exception("Missing stage object: {}".format(name))
 
-                Console.PrintMessage("pins[\"left\"] set to False as "
-                                     "side_studs[\"style\"] != SideStudStyle.NONE and "
-                                     "side_studs[\"left\"] == True\n")
-                left = False
 
-            if right and self.side_studs_right:
-                Console.PrintMessage("pins[\"right\"] set to False as "
-                                     "side_studs[\"style\"] != SideStudStyle.NONE and "
-                                     "side_studs[\"right\"] == True\n")
-                right = False
-
-        if style != PinStyle.NONE and not front and not back and not left and not right:
-
-            Console.PrintMessage("pins[\"style\"] set to PinStyle.NONE as "
-                                 "none of Front, Back, Left, Right are True\n")
-            style = PinStyle.NONE
-
-        offset = bool(pins["offset"])
-
-        if offset and (left or right) and self.depth == 1:
-
-            Console.PrintMessage("pins[\"offset\"] set to False as "
-                                 "Left or Right are True and dimensions[\"depth\"] == 1\n")
-            style = PinStyle.NONE
-
-        if offset and (front or back) and self.width == 1:
-
-            Console.PrintMessage("pins[\"offset\"] set to False as "
-                                 "Front or Back are True and dimensions[\"width\"] == 1\n")
-            style = PinStyle.NONE
-
-        self.pins_style = style
-
-        if self.pins_style == PinStyle.NONE:
-
-            Console.PrintMessage("Pins: NONE\n")
-
-        else:
+class BrickRenderer:
 
-            self.pins_front = front
-            self.pins_back = back
-            self.pins_left = left
-            self.pins_right = right
+    def __init__(self, dimensions, top_studs, side_studs, pins, holes, detail=Detail.FULL):
 
-            self.pins_offset = offset
+        try:
+            self.brick_spec, adjustments = plan_brick(dimensions, top_studs, side_studs, pins, holes)
 
-            Console.PrintMessage("Pins: {0} {1}{2}{3}{4}{5}\n".format(
-                "NONE" if self.pins_style == PinStyle.NONE else "PIN" if self.pins_style == PinStyle.PIN else "AXLE",
-                "FRONT " if self.pins_front else "",
-                "BACK " if self.pins_back else "",
-                "LEFT " if self.pins_left else "",
-                "RIGHT " if self.pins_right else "",
-                "OFFSET" if self.pins_offset else ""))
+            for adjustment in adjustments:
+                log.info("{}", adjustment)
 
-    def _parse_holes(self, holes):
+            for line in self.brick_spec.describe():
+                log.info("{}", line)
 
-        style = holes["style"]
+            # the renderers read the normalized options as attributes
+            for field in BRICK_SPEC_FIELDS:
+                setattr(self, field, getattr(self.brick_spec, field))
 
-        if style not in (HoleStyle.NONE, HoleStyle.HOLE, HoleStyle.AXLE):
-            raise Exception("holes[\"style\"] must be: HoleStyle.NONE|HoleStyle.HOLE|HoleStyle.AXLE")
-
-        if style != HoleStyle.NONE and self.height < 3:
-            Console.PrintMessage("holes[\"style\"] set to HoleStyle.NONE as "
-                                 "dimensions[\"width\"] < 3\n")
-            style = HoleStyle.NONE
+            self.detail = check_detail(detail)
 
-        if style != HoleStyle.NONE and self.side_studs_style != SideStudStyle.NONE:
-
-            if self.side_studs_front or self.side_studs_back:
-
-                Console.PrintMessage("holes[\"style\"] set to HoleStyle.NONE as "
-                                     "side_studs[\"style\"] != SideStudStyle.NONE and "
-                                     "side_studs[\"front\"] == True or side_studs[\"back\"] == True\n")
-                style = HoleStyle.NONE
-
-        if style != HoleStyle.NONE and self.pins_style != PinStyle.NONE:
-
-            if self.pins_front or self.pins_back:
-
-                Console.PrintMessage("holes[\"style\"] set to HoleStyle.NONE as "
-                                     "pins[\"style\"] != PinStyle.NONE and "
-                                     "pins[\"front\"] == True or pins[\"back\"] == True\n")
-                style = HoleStyle.NONE
-
-        offset = bool(holes["offset"])
-
-        if not offset and self.width == 1:
-            Console.PrintMessage("holes[\"style\"] set to HoleStyle.NONE as "
-                                 "dimensions[\"width\"] == 1 and holes[\"offset\"] == False\n")
-            style = HoleStyle.NONE
-
-        self.hole_style = style
-
-        if self.hole_style == HoleStyle.NONE:
-
-            Console.PrintMessage("Holes: NONE\n")
-
-        else:
-
-            self.holes_offset = offset
-
-            Console.PrintMessage("Holes: {0} {1}\n".format(
-                "NONE" if self.hole_style == HoleStyle.NONE else "HOLE"
-                if self.hole_style == HoleStyle.HOLE else "AXLE",
-                "OFFSET" if self.holes_offset else ""))
-
-    def _create_datum_planes(self, context):
-        Console.PrintMessage("_create_datum_planes()\n")
-
-        # Create top datum plane
-        top_datum_plane = context.brick.newObject("PartDesign::Plane", "top_datum_plane")
-        top_datum_plane.MapReversed = False
-        top_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XY_PLANE_INDEX], '')]
-        top_datum_plane.MapMode = 'FlatFace'
-        top_datum_plane.AttachmentOffset = Placement(Vector(0, 0, (self.height * DIMS_PLATE_HEIGHT)), Rotation(0, 0, 0))
-        top_datum_plane.ViewObject.Visibility = False
-        context.top_datum_plane = top_datum_plane
-
-        # Create front datum plane
-        front_datum_plane = context.brick.newObject("PartDesign::Plane", "front_datum_plane")
-        front_datum_plane.MapReversed = False
-        front_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XZ_PLANE_INDEX], '')]
-        front_datum_plane.MapMode = 'FlatFace'
-        front_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, (DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION), Rotation(0, 0, 0))
-        front_datum_plane.ViewObject.Visibility = False
-        context.front_datum_plane = front_datum_plane
-
-        # Create back datum plane
-        back_datum_plane = context.brick.newObject("PartDesign::Plane", "back_datum_plane")
-        back_datum_plane.MapReversed = False
-        back_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XZ_PLANE_INDEX], '')]
-        back_datum_plane.MapMode = 'FlatFace'
-        back_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, -1 *
-                   ((DIMS_STUD_SPACING / 2) + (DIMS_STUD_SPACING * (context.depth - 1)) - DIMS_BRICK_OUTER_REDUCTION)),
-            Rotation(0, 0, 0))
-        back_datum_plane.ViewObject.Visibility = False
-        context.back_datum_plane = back_datum_plane
-
-        # Create left datum plane
-        left_datum_plane = context.brick.newObject("PartDesign::Plane", "left_datum_plane")
-        left_datum_plane.MapReversed = False
-        left_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_YZ_PLANE_INDEX], '')]
-        left_datum_plane.MapMode = 'FlatFace'
-        left_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, -1 * ((DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION)),
-            Rotation(0, 0, 0))
-        left_datum_plane.ViewObject.Visibility = False
-        context.left_datum_plane = left_datum_plane
-
-        # Create right datum plane
-        right_datum_plane = context.brick.newObject("PartDesign::Plane", "right_datum_plane")
-        right_datum_plane.MapReversed = False
-        right_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_YZ_PLANE_INDEX], '')]
-        right_datum_plane.MapMode = 'FlatFace'
-        right_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0,
-                   (DIMS_STUD_SPACING / 2) + (DIMS_STUD_SPACING * (context.width - 1) - DIMS_BRICK_OUTER_REDUCTION)),
-            Rotation(0, 0, 0))
-        right_datum_plane.ViewObject.Visibility = False
-        context.right_datum_plane = right_datum_plane
-
-        # Create top inside datum plane
-        top_inside_datum_plane = context.brick.newObject("PartDesign::Plane", "top_inside_datum_plane")
-        top_inside_datum_plane.MapReversed = False
-        top_inside_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XY_PLANE_INDEX], '')]
-        top_inside_datum_plane.MapMode = 'FlatFace'
-        top_inside_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS), Rotation(0, 0, 0))
-        top_inside_datum_plane.ViewObject.Visibility = False
-        context.top_inside_datum_plane = top_inside_datum_plane
-
-        # Create front inside datum plane
-        front_inside_datum_plane = context.brick.newObject("PartDesign::Plane", "front_inside_datum_plane")
-        front_inside_datum_plane.MapReversed = False
-        front_inside_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XZ_PLANE_INDEX], '')]
-        front_inside_datum_plane.MapMode = 'FlatFace'
-        front_inside_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, (DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION),
-            Rotation(0, 0, 0))
-        front_inside_datum_plane.ViewObject.Visibility = False
-        context.front_inside_datum_plane = front_inside_datum_plane
-
-        # Create back inside datum plane
-        back_inside_datum_plane = context.brick.newObject("PartDesign::Plane", "back_inside_datum_plane")
-        back_inside_datum_plane.MapReversed = False
-        back_inside_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XZ_PLANE_INDEX], '')]
-        back_inside_datum_plane.MapMode = 'FlatFace'
-        back_inside_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, -1 * ((self.depth - 1) * DIMS_STUD_SPACING +
-                               ((DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION))),
-            Rotation(0, 0, 0))
-        back_inside_datum_plane.ViewObject.Visibility = False
-        context.back_inside_datum_plane = back_inside_datum_plane
-
-        # Create left inside datum plane
-        left_inside_datum_plane = context.brick.newObject("PartDesign::Plane", "left_inside_datum_plane")
-        left_inside_datum_plane.MapReversed = False
-        left_inside_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_YZ_PLANE_INDEX], '')]
-        left_inside_datum_plane.MapMode = 'FlatFace'
-        left_inside_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, -1 * ((DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION)),
-            Rotation(0, 0, 0))
-        left_inside_datum_plane.ViewObject.Visibility = False
-        context.left_inside_datum_plane = left_inside_datum_plane
-
-        # Create right inside datum plane
-        right_inside_datum_plane = context.brick.newObject("PartDesign::Plane", "right_inside_datum_plane")
-        right_inside_datum_plane.MapReversed = False
-        right_inside_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_YZ_PLANE_INDEX], '')]
-        right_inside_datum_plane.MapMode = 'FlatFace'
-        right_inside_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, (self.width - 1) * DIMS_STUD_SPACING +
-                   ((DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION)),
-            Rotation(0, 0, 0))
-        right_inside_datum_plane.ViewObject.Visibility = False
-        context.right_inside_datum_plane = right_inside_datum_plane
-
-        # Create depth mirror datum plane
-        depth_mirror_datum_plane = context.brick.newObject("PartDesign::Plane", "depth_mirror_datum_plane")
-        depth_mirror_datum_plane.MapReversed = False
-        depth_mirror_datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[ORIGIN_XZ_PLANE_INDEX], '')]
-        depth_mirror_datum_plane.MapMode = 'FlatFace'
-        depth_mirror_datum_plane.AttachmentOffset = Placement(
-            Vector(0, 0, -1 * ((self.depth - 1) * DIMS_STUD_SPACING / 2)), Rotation(0, 0, 0))
-        depth_mirror_datum_plane.ViewObject.Visibility = False
-        context.depth_mirror_datum_plane = depth_mirror_datum_plane
-
-        context.xz_plane = context.doc.XZ_Plane
-        context.yz_plane = context.doc.YZ_Plane
-        context.xy_plane = context.doc.XY_Plane
-
-    def render(self):
+        except Exception as inst:
+            log.error("{}", inst)
+
+    def spec(self):
+
+        # normalized parameters: options which were disabled while parsing are left out
+        spec = self.brick_spec.as_dict()
+        spec["detail"] = self.detail
+        return spec
+
+    def _render_cached(self, doc, cache_key, cache):
+        log.debug("_render_cached()")
+
+        shape = cache.load(cache_key)
+
+        if shape is None:
+            return None
+
+        brick = doc.addObject("Part::Feature", "brick")
+        brick.Shape = shape
+        doc.scope = brick
+        doc.recompute()
+
+        return brick
+
+    def _datum_plane_offsets(self):
+
+        outside_offset = (DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION
+        inside_offset = outside_offset - DIMS_RIBBED_SIDE_THICKNESS
+
+        # (name, origin plane, offset along the origin plane normal)
+        return [
+            ("top_datum_plane", ORIGIN_XY_PLANE_INDEX, self.height * DIMS_PLATE_HEIGHT),
+            ("front_datum_plane", ORIGIN_XZ_PLANE_INDEX, outside_offset),
+            ("back_datum_plane", ORIGIN_XZ_PLANE_INDEX,
+             -1 * (((self.depth - 1) * DIMS_STUD_SPACING) + outside_offset)),
+            ("left_datum_plane", ORIGIN_YZ_PLANE_INDEX, -1 * outside_offset),
+            ("right_datum_plane", ORIGIN_YZ_PLANE_INDEX, ((self.width - 1) * DIMS_STUD_SPACING) + outside_offset),
+            ("top_inside_datum_plane", ORIGIN_XY_PLANE_INDEX, (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS),
+            ("front_inside_datum_plane", ORIGIN_XZ_PLANE_INDEX, inside_offset),
+            ("back_inside_datum_plane", ORIGIN_XZ_PLANE_INDEX,
+             -1 * (((self.depth - 1) * DIMS_STUD_SPACING) + inside_offset)),
+            ("left_inside_datum_plane", ORIGIN_YZ_PLANE_INDEX, -1 * inside_offset),
+            ("right_inside_datum_plane", ORIGIN_YZ_PLANE_INDEX,
+             ((self.width - 1) * DIMS_STUD_SPACING) + inside_offset),
+            ("depth_mirror_datum_plane", ORIGIN_XZ_PLANE_INDEX, -1 * ((self.depth - 1) * DIMS_STUD_SPACING / 2))
+        ]
+
+    @profiled("BrickRenderer._create_datum_plane")
+    def _create_datum_plane(self, context, name):
+        log.debug("_create_datum_plane({})", name)
+
+        for plane_name, origin_index, offset in self._datum_plane_offsets():
+            if plane_name == name:
+                datum_plane = context.brick.newObject("PartDesign::Plane", name)
+                datum_plane.MapReversed = False
+                datum_plane.AttachmentSupport = [(context.brick.Origin.OriginFeatures[origin_index], '')]
+                datum_plane.MapMode = 'FlatFace'
+                datum_plane.AttachmentOffset = Placement(Vector(0, 0, offset), Rotation(0, 0, 0))
+                set_visibility(datum_plane, False)
+                return datum_plane
+
+        raise Exception("Unknown datum plane: {}".format(name))
+
+    @profiled("BrickRenderer._update_datum_planes")
+    def _update_datum_planes(self, context):
+        log.debug("_update_datum_planes()")
+
+        moved = False
+
+        for name, origin_index, offset in self._datum_plane_offsets():
+            if name not in context.datum_plane_names:
+                continue
+
+            datum_plane = context.doc.getObject(context.datum_plane_names[name])
+
+            # deleted since the last render, created again when needed
+            if datum_plane is None:
+                del context.datum_plane_names[name]
+                continue
+
+            # only touch planes which moved so that unaffected features are not recomputed
+            if datum_plane.AttachmentOffset.Base.z != offset:
+                log.info("Moving {0} to {1}", name, offset)
+                datum_plane.AttachmentOffset = Placement(Vector(0, 0, offset), Rotation(0, 0, 0))
+                moved = True
+
+            context.datum_planes[name] = datum_plane
+
+        return moved
+
+    def _stages(self):
+
+        # the renderers pull in Part and Sketcher so they are only imported once a brick is actually rendered
+        from Legify.Body import BodyRenderer
+        from Legify.Holes import HolesRenderer
+        from Legify.Layout import brick_layout
+        from Legify.Pins import PinsRenderer
+        from Legify.SideStuds import SideStudsRenderer
+        from Legify.TopStuds import TopStudsRenderer
+
+        spec = self.spec()
+        layout = brick_layout(self.brick_spec)
+        full = self.detail == Detail.FULL
+
+        # the inputs of a stage are the options which change which features it has, e.g. a stud style, and the
+        # stage is rebuilt when they change; its values only change the sketches, e.g. the width or the number of
+        # studs, so they are updated in place; anything else (e.g. the height) only moves the datum planes
+        body_inputs = [layout.side_ribs, layout.tubes, layout.sticks, layout.sticks_along_width]
+        ribs_inputs = body_inputs + [layout.tube_ribs, layout.stick_ribs, len(layout.tube_rib_width_indices) > 0,
+                                     len(layout.tube_rib_depth_indices) > 0]
+        top_studs_inputs = [self.top_studs_style, layout.top_studs_inside]
+        side_studs_inputs = [self.side_studs_style, layout.side_stud_sides]
+        pins_inputs = [self.pins_style, layout.pin_sides]
+        holes_inputs = [self.hole_style]
+        size = [self.width, self.depth]
+
+        # ribs and fillets are stages of their own which are only enabled at the levels of detail they belong to, so
+        # a change of detail only adds or removes those stages
+        ribs = self.detail != Detail.PREVIEW and (layout.side_ribs or layout.tube_ribs or layout.stick_ribs)
+        top_studs = self.top_studs_style != TopStudStyle.NONE
+        side_studs = self.side_studs_style != SideStudStyle.NONE
+
+        # (name, inputs, values, render, update, enabled, looks up edges) in render order, each stage builds on the
+        # features of the previous one
+        return [
+            ("body", body_inputs, size, lambda context: BodyRenderer().render(context),
+             lambda context: BodyRenderer().update(context), True, False),
+            ("ribs", ribs_inputs, size, lambda context: BodyRenderer().render_ribs(context),
+             lambda context: BodyRenderer().update_ribs(context), ribs, False),
+            ("body_fillets", [], [], lambda context: BodyRenderer().render_fillets(context), None, full, True),
+            ("top_studs", top_studs_inputs, size + [spec["top_studs"]],
+             lambda context: TopStudsRenderer().render(context),
+             lambda context: TopStudsRenderer().update(context), top_studs, False),
+            ("top_stud_fillets", [], [], lambda context: TopStudsRenderer().render_fillets(context), None,
+             full and top_studs, True),
+            ("side_studs", side_studs_inputs, size, lambda context: SideStudsRenderer().render(context),
+             lambda context: SideStudsRenderer().update(context), side_studs, False),
+            ("side_stud_fillets", [], [], lambda context: SideStudsRenderer().render_fillets(context), None,
+             full and side_studs, True),
+            ("pins", pins_inputs, size + [spec["pins"]], lambda context: PinsRenderer().render(context),
+             lambda context: PinsRenderer().update(context), self.pins_style != PinStyle.NONE, False),
+            ("holes", holes_inputs, [self.width, spec["holes"]], lambda context: HolesRenderer().render(context),
+             lambda context: HolesRenderer().update(context), self.hole_style != HoleStyle.NONE, False),
+            ("hole_fillets", [], [], lambda context: HolesRenderer().render_fillets(context), None,
+             full and self.hole_style == HoleStyle.HOLE, True)
+        ]
+
+    @staticmethod
+    def _last_feature(context, names, previous):
+
+        # the last solid feature of a stage, datum features and sketches are not part of the body shape
+        for name in reversed(names):
+            obj = context.doc.getObject(name)
+            if obj is not None and obj.isDerivedFrom("PartDesign::Feature"):
+                return obj
+
+        return previous
+
+    @staticmethod
+    def _remove_stage_objects(context, names):
+
+        # remove in reverse creation order so nothing is removed while still referenced
+        for name in reversed(names):
+            obj = context.doc.getObject(name)
+            if obj is None:
+                continue
+            if obj in context.brick.Group:
+                context.brick.removeObject(obj)
+            context.doc.removeObject(name)
+
+    def render(self, deferred_recompute=False, cache=None, doc=None, brick=None, profiler=None,
+               undo=RENDER_UNDO_TRANSACTION, view=RENDER_VIEW_SUSPENDED, deviation=None, progress=None):
 
         context = BrickContext()
 
         try:
+            if doc is None:
+                doc = activeDocument()
+
+            # the whole render is a single undo step
+            context.doc = RenderTransaction(doc, deferred_recompute, profiler, undo, view)
+            context.doc.begin()
+
+            # a cached brick is a plain shape so it cannot be used to re-render an existing body
+            if cache is not None and brick is None:
+                cache_key = cache.key(self.__class__.__name__, self.spec())
+                cached_brick = self._render_cached(context.doc, cache_key, cache)
+                if cached_brick is not None:
+                    context.doc.commit()
+                    context.doc.show(cached_brick, deviation)
+                    return cached_brick
+
             context.width = self.width
             context.depth = self.depth
             context.height = self.height
@@ -466,28 +316,137 @@ class BrickRenderer:
             if self.hole_style != HoleStyle.NONE:
                 context.holes_offset = self.holes_offset
 
-            context.doc = activeDocument()
-            context.brick = context.doc.addObject("PartDesign::Body", "brick")
+            context.detail = self.detail
 
-            self._create_datum_planes(context)
+            # numpy is only imported once a brick is actually rendered
+            from Legify.Layout import brick_layout
+            context.layout = brick_layout(self.brick_spec)
+
+            if brick is None:
+                context.brick = context.doc.addObject("PartDesign::Body", "brick")
+                context.brick.addProperty("App::PropertyString", "LegifyState", "Legify",
+                                          "Render inputs and created objects used for re-rendering")
+                state = {"datum_planes": {}, "stages": {}}
+            else:
+                context.brick = brick
+                state = json.loads(brick.LegifyState)
+
+            context.doc.scope = context.brick
 
-            BodyRenderer().render(context)
+            # planes created by any stage are recorded in the state as they are created
+            context.datum_plane_names = state["datum_planes"]
+            context.datum_plane_factory = self._create_datum_plane
 
-            if self.top_studs_style != TopStudStyle.NONE:
-                TopStudsRenderer().render(context)
+            moved = False
+            if brick is not None:
+                moved = self._update_datum_planes(context)
 
-            if self.side_studs_style != SideStudStyle.NONE:
-                SideStudsRenderer().render(context)
+            context.xz_plane = context.doc.XZ_Plane
+            context.yz_plane = context.doc.YZ_Plane
+            context.xy_plane = context.doc.XY_Plane
 
-            if self.pins_style != PinStyle.NONE:
-                PinsRenderer().render(context)
+            stages = self._stages()
 
-            if self.hole_style != HoleStyle.NONE:
-                HolesRenderer().render(context)
+            # JSON round trip so that inputs and values compare equal to the stored state
+            inputs = [json.loads(json.dumps([enabled] + stage_inputs))
+                      for name, stage_inputs, stage_values, render_stage, update_stage, enabled, edges in stages]
+            values = [json.loads(json.dumps(stage_values))
+                      for name, stage_inputs, stage_values, render_stage, update_stage, enabled, edges in stages]
+
+            # a stage is only rebuilt if its own inputs changed and only updated in place if its values changed,
+            # later stages are kept and recomputed on top of it, but edges are looked up on the shape before a stage
+            # so those stages are rebuilt if that may change
+            rebuild = []
+            update = []
+            for i in range(0, len(stages)):
+                name, stage_inputs, stage_values, render_stage, update_stage, enabled, edges = stages[i]
+                stored = state["stages"].get(name)
+                changed = stored is not None and stored.get("values") != values[i]
+                rebuild.append(stored is None or stored["inputs"] != inputs[i] or
+                               (changed and update_stage is None) or
+                               (edges and (moved or any(rebuild) or any(update))))
+                update.append(changed and not rebuild[i])
+
+            # nothing comes before the first stage to insert its features after
+            if rebuild[0]:
+                rebuild = [True] * len(stages)
+                update = [False] * len(stages)
+
+            for i in reversed(range(0, len(stages))):
+                name = stages[i][0]
+                if rebuild[i] and name in state["stages"]:
+                    log.info("Removing stage: {}", name)
+                    self._remove_stage_objects(context, state["stages"][name]["objects"])
+
+            previous = None
+
+            for i in range(0, len(stages)):
+                name, stage_inputs, stage_values, render_stage, update_stage, enabled, edges = stages[i]
+
+                if not rebuild[i]:
+
+                    # the same features with new sketch values, recomputed with the kept stages below
+                    if update[i] and enabled:
+                        if progress is not None and not progress(name, i, len(stages)):
+                            raise Exception("Render cancelled")
+
+                        log.info("Updating stage: {}", name)
+                        context.stage_object_names = state["stages"][name]["objects"]
+                        update_stage(context)
+                        context.stage_object_names = []
+                    else:
+                        log.info("Keeping stage: {}", name)
+
+                    state["stages"][name]["values"] = values[i]
+                    previous = self._last_feature(context, state["stages"][name]["objects"], previous)
+                    continue
+
+                existing = set(obj.Name for obj in context.doc.Objects)
+
+                # new features are inserted after the tip, i.e. after the earlier stages and before any kept stages
+                context.brick.Tip = previous
+
+                if enabled:
+
+                    # the caller may stop the render between stages, everything done so far is aborted
+                    if progress is not None and not progress(name, i, len(stages)):
+                        raise Exception("Render cancelled")
+
+                    log.info("Rendering stage: {}", name)
+                    render_stage(context)
+
+                # datum planes are shared by the stages so they are never removed with a stage
+                datum_plane_names = set(context.datum_plane_names.values())
+
+                state["stages"][name] = {
+                    "inputs": inputs[i],
+                    "values": values[i],
+                    "objects": [obj.Name for obj in context.doc.Objects
+                                if obj.Name not in existing and obj.Name not in datum_plane_names]
+                }
+
+                previous = self._last_feature(context, state["stages"][name]["objects"], previous)
+
+            # the tip is left wherever the last rebuilt stage ended
+            context.brick.Tip = previous
+
+            # kept and updated stages are recomputed on top of moved datum planes and rebuilt stages
+            context.doc.recompute()
+
+            context.brick.LegifyState = json.dumps(state)
+
+            context.doc.commit()
+
+            if cache is not None and brick is None:
+                cache.store(cache_key, context.brick.Shape)
+
+            context.doc.show(context.brick.Tip, deviation)
 
-            context.brick.Tip.ViewObject.Visibility = True
+            return context.brick
 
         except Exception as inst:
-            Console.PrintError(inst)
+            if context.doc is not None:
+                context.doc.abort()
+            log.error("{}", inst)
         finally:
             del context
@@ -0,0 +1,104 @@
+# coding: UTF-8
+
+from FreeCAD import Version, getUserCachePath
+import hashlib
+import json
+import os
+import Legify.Dimensions
+from Legify.Log import *
+
+CACHE_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_FILE_EXTENSION = ".brep"
+
+# bump whenever a renderer change alters the shape of a brick with unchanged options
+CACHE_RENDER_VERSION = 1
+
+
+class ShapeCache:
+
+    def __init__(self, directory=None, max_bytes=CACHE_DEFAULT_MAX_BYTES):
+        log.debug("ShapeCache({0}, {1})", directory, max_bytes)
+
+        if directory is None:
+            directory = os.path.join(getUserCachePath(), "Legify")
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, renderer, spec):
+
+        # any change to the brick dimensions must invalidate every cached shape
+        dims = dict((name, getattr(Legify.Dimensions, name))
+                    for name in dir(Legify.Dimensions) if name.startswith("DIMS_"))
+
+        # shapes rendered by an older renderer or a different FreeCAD (OpenCascade) version are not reused
+        content = json.dumps({"renderer": renderer, "render_version": CACHE_RENDER_VERSION,
+                              "freecad_version": Version()[0:4], "spec": spec, "dims": dims}, sort_keys=True)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def load(self, key):
+        log.debug("load({})", key)
+
+        path = self._path(key)
+
+        if not os.path.isfile(path):
+            return None
+
+        # Part is only needed once there is a shape to read
+        import Part
+
+        shape = Part.Shape()
+        shape.read(path)
+
+        # mark as most recently used
+        os.utime(path, None)
+
+        return shape
+
+    def store(self, key, shape):
+        log.debug("store({})", key)
+
+        path = self._path(key)
+
+        # write to a temporary file first so that a concurrent reader never sees a partial file
+        temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        shape.exportBrep(temp_path)
+        os.replace(temp_path, path)
+
+        self._evict()
+
+    def _evict(self):
+
+        entries = []
+        total_bytes = 0
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # removed by another process sharing the cache
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+        # least recently used first
+        entries.sort()
+
+        for mtime, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            log.info("Evicting: {}", path)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
@@ -1,106 +1,18 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Placement, Rotation, Vector
+from FreeCAD import Placement, Rotation, Vector, Version
 import math
 import Part
 import Sketcher
+import Legify.Dimensions
+from Legify.Log import *
+from Legify.Profiler import *
+from Legify.Spec import *
+from Legify.Dimensions import *
+from Legify.Transaction import *
 
-
-def _enum(*args):
-    enums = dict(zip(args, range(len(args))))
-    return type("Enum", (), enums)
-
-
-# Brick Options
-
-TopStudStyle = _enum("NONE", "CLOSED", "OPEN")
-SideStudStyle = _enum("NONE", "OPEN", "HOLE")
-PinStyle = _enum("NONE", "PIN", "AXLE")
-HoleStyle = _enum("NONE", "HOLE", "AXLE")
-
-# Brick Dimensions
-
-DIMS_STUD_SPACING = 8
-DIMS_PLATE_HEIGHT = 3.2
-DIMS_BRICK_OUTER_REDUCTION = 0.1
-
-DIMS_EDGE_FILLET = 0.1
-DIMS_STUD_FILLET = 0.25
-
-DIMS_TOP_THICKNESS = 1.1
-DIMS_FLAT_SIDE_THICKNESS = 1.5
-DIMS_RIBBED_SIDE_THICKNESS = 1.2
-
-DIMS_SIDE_RIB_WIDTH = 0.7
-DIMS_SIDE_RIB_DEPTH = 0.3
-
-DIMS_STUD_OUTER_RADIUS = 2.45
-DIMS_STUD_INNER_RADIUS = 1.6
-DIMS_STUD_FLAT_THICKNESS = 0.9
-DIMS_STUD_HEIGHT = 1.8
-DIMS_STUD_INSIDE_HOLE_RADIUS = 1.2
-DIMS_STUD_INSIDE_HOLE_TOP_OFFSET = 1.7
-
-DIMS_STICK_OUTER_RADIUS = 1.5
-DIMS_STICK_INNER_RADIUS = 0.75
-DIMS_STICK_RIB_THICKNESS = 0.9
-DIMS_STICK_RIB_BOTTOM_OFFSET = 2.15
-DIMS_STICK_AND_TUBE_BOTTOM_INSET = 0.2
-
-DIMS_TUBE_OUTER_RADIUS = 3.25
-DIMS_TUBE_INNER_RADIUS = 2.45
-DIMS_TUBE_FLAT_THICKNESS = 0.9
-DIMS_TUBE_RIB_THICKNESS = 0.8
-DIMS_TUBE_RIB_BOTTOM_OFFSET = 2.15
-
-DIMS_SIDE_STUD_CENTRE_HEIGHT = 5.7
-
-DIMS_TECHNIC_HOLE_CENTRE_HEIGHT = 5.8
-DIMS_TECHNIC_HOLE_OUTER_RADIUS = 3.55
-DIMS_TECHNIC_HOLE_INNER_RADIUS = 2.4
-DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS = 3.05
-DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH = 0.85
-
-DIMS_PIN_COLLAR_DEPTH = 0.8
-DIMS_PIN_COLLAR_RADIUS = 2.95
-DIMS_PIN_OUTER_RADIUS = 2.35
-DIMS_PIN_INNER_RADIUS = 1.7
-DIMS_PIN_LENGTH = 8
-DIMS_PIN_FLANGE_HEIGHT = 0.25
-DIMS_PIN_FLANGE_DEPTH = 0.75
-DIMS_PIN_NOTCH_WIDTH = 0.9
-DIMS_PIN_NOTCH_DEPTH = 2.8
-DIMS_PIN_NOTCH_OPENING_FILLET_RADIUS = 0.35
-
-# Part Design Constants
-
-SKETCH_GEOMETRY_VERTEX_START_INDEX = 1
-SKETCH_GEOMETRY_VERTEX_END_INDEX = 2
-SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX = 3
-
-# Origin geometry is indexed at -1
-SKETCH_GEOMETRY_ORIGIN_INDEX = -1
-# External geometry is indexed from -3 descending! https://forum.freecadweb.org/viewtopic.php?t=24211
-SKETCH_GEOMETRY_FIRST_EXTERNAL_INDEX = -3
-
-PAD_TYPE_DIMENSION = 0
-PAD_TYPE_THROUGH_ALL = 1
-PAD_TYPE_TO_FIRST = 2
-PAD_TYPE_UP_TO_FACE = 3
-PAD_TYPE_TWO_DIMENSIONS = 4
-
-POCKET_TYPE_DIMENSION = 0
-POCKET_TYPE_THROUGH_ALL = 1
-POCKET_TYPE_TO_FIRST = 2
-POCKET_TYPE_UP_TO_FACE = 3
-POCKET_TYPE_TWO_DIMENSIONS = 4
-
-ORIGIN_X_AXIS_INDEX = 0
-ORIGIN_Y_AXIS_INDEX = 1
-ORIGIN_Z_AXIS_INDEX = 2
-ORIGIN_XY_PLANE_INDEX = 3
-ORIGIN_XZ_PLANE_INDEX = 4
-ORIGIN_YZ_PLANE_INDEX = 5
+# a Part Design Boolean fusing a plain shape, rather than another body, is only relied on from this version
+PIN_BOOLEAN_MIN_VERSION = (1, 0)
 
 
 def xy_plane_top_left_vector():
@@ -152,7 +64,10 @@ def yz_plane_bottom_left_vector():
 
 
 def add_circle_to_sketch(sketch, radius, x, y, as_arcs):
-    Console.PrintMessage("add_circle_to_sketch({},{},{},{})\n".format(radius, x, y, as_arcs))
+    log.debug("add_circle_to_sketch({},{},{},{})", radius, x, y, as_arcs)
+
+    # geometry indices are relative to any geometry already in the sketch so that loops can be combined
+    g = len(sketch.Geometry)
 
     geometries = []
     constraints = []
@@ -161,10 +76,10 @@ def add_circle_to_sketch(sketch, radius, x, y, as_arcs):
 
         # Construction lines
         geometries.append(Part.LineSegment(xy_plane_bottom_left_vector(), xy_plane_top_right_vector()))
-        constraints.append(Sketcher.Constraint('Angle', 0, 45 * math.pi / 180))
+        constraints.append(Sketcher.Constraint('Angle', g, 45 * math.pi / 180))
         constraints.append(Sketcher.Constraint("Distance",
-                                               0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               0, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                               g, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               g, SKETCH_GEOMETRY_VERTEX_END_INDEX,
                                                radius * 2))
 
         # Drawn as two arcs instead of one circle so that an edge appears in geometry - this allows
@@ -181,71 +96,113 @@ def add_circle_to_sketch(sketch, radius, x, y, as_arcs):
         # position arc midpoint
         constraints.append(Sketcher.Constraint("DistanceX",
                                                SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g + 1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
                                                x))
         constraints.append(Sketcher.Constraint("DistanceY",
                                                SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g + 1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
                                                y))
         constraints.append(Sketcher.Constraint('PointOnObject',
-                                               1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                               0))
+                                               g + 1, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g))
         constraints.append(Sketcher.Constraint('PointOnObject',
-                                               2, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                               0))
+                                               g + 2, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g))
 
         # position arc and construction endpoints
         constraints.append(Sketcher.Constraint('Coincident',
-                                               0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               1, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                               g, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               g + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX))
         constraints.append(Sketcher.Constraint('Coincident',
-                                               0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               2, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                               g, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                               g + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX))
         constraints.append(Sketcher.Constraint('Coincident',
-                                               0, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               1, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                               g, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                               g + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX))
         constraints.append(Sketcher.Constraint('Coincident',
-                                               0, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                               2, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                               g, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                               g + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX))
 
         sketch.addGeometry(geometries, False)
         sketch.addConstraint(constraints)
 
         # Set construction lines
-        sketch.toggleConstruction(0)
+        sketch.toggleConstruction(g)
     else:
         geometries.append(Part.Circle())
-        constraints.append(Sketcher.Constraint("Radius", 0, radius))
+        constraints.append(Sketcher.Constraint("Radius", g, radius))
         constraints.append(Sketcher.Constraint("DistanceX",
                                                SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               0, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
                                                x))
         constraints.append(Sketcher.Constraint("DistanceY",
                                                SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                               0, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                               g, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
                                                y))
         sketch.addGeometry(geometries, False)
         sketch.addConstraint(constraints)
 
 
+def circle_geometry(radius, x, y, as_arcs):
+
+    # unconstrained equivalent of add_circle_to_sketch, for sketches with too many copies to constrain
+    circle = Part.Circle(Vector(x, y, 0), Vector(0, 0, 1), radius)
+
+    if not as_arcs:
+        return [circle]
+
+    # split on the same diagonal as add_circle_to_sketch
+    return [Part.ArcOfCircle(circle, math.pi / 4, 5 * math.pi / 4),
+            Part.ArcOfCircle(circle, 5 * math.pi / 4, 9 * math.pi / 4)]
+
+
+def inner_circle_with_flats_geometry(outer_radius, inner_radius, flat_thickness, x, y):
+
+    # unconstrained equivalent of add_inner_circle_with_flats_to_sketch: flats on the diagonals, flat_thickness
+    # inside the outer radius, joined by arcs of the inner radius
+    centre = Vector(x, y, 0)
+    circle = Part.Circle(centre, Vector(0, 0, 1), inner_radius)
+    flat_distance = outer_radius - flat_thickness
+
+    if flat_distance >= inner_radius:
+        return [circle]
+
+    half_angle = math.acos(flat_distance / inner_radius)
+
+    geometries = []
+    for i in range(0, 4):
+        normal = (45 + (90 * i)) * math.pi / 180
+        start = normal - half_angle
+        end = normal + half_angle
+        geometries.append(Part.LineSegment(
+            centre + Vector(inner_radius * math.cos(start), inner_radius * math.sin(start), 0),
+            centre + Vector(inner_radius * math.cos(end), inner_radius * math.sin(end), 0)))
+        geometries.append(Part.ArcOfCircle(circle, end, normal + (math.pi / 2) - half_angle))
+
+    return geometries
+
+
 def add_inner_circle_with_flats_to_sketch(sketch, outer_radius, inner_radius, flat_thickness, x_offset, y_offset):
-    Console.PrintMessage("add_inner_circle_with_flats_to_sketch({},{},{},{},{})\n"
-                         .format(outer_radius, inner_radius, flat_thickness, x_offset, y_offset))
+    log.debug("add_inner_circle_with_flats_to_sketch({},{},{},{},{})", outer_radius, inner_radius, flat_thickness,
+              x_offset, y_offset)
+
+    # geometry indices are relative to any geometry already in the sketch so that loops can be combined
+    g = len(sketch.Geometry)
 
     geometries = []
     constraints = []
 
     # Construction line
     geometries.append(Part.LineSegment(xy_plane_bottom_left_vector(), xy_plane_top_right_vector()))
-    constraints.append(Sketcher.Constraint('Angle', 0, 45 * math.pi / 180))
+    constraints.append(Sketcher.Constraint('Angle', g, 45 * math.pi / 180))
     constraints.append(Sketcher.Constraint("DistanceX", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                           SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
+                                           SKETCH_GEOMETRY_VERTEX_START_INDEX, g,
                                            SKETCH_GEOMETRY_VERTEX_END_INDEX, x_offset))
     constraints.append(Sketcher.Constraint("DistanceY", SKETCH_GEOMETRY_ORIGIN_INDEX,
-                                           SKETCH_GEOMETRY_VERTEX_START_INDEX, 0,
+                                           SKETCH_GEOMETRY_VERTEX_START_INDEX, g,
                                            SKETCH_GEOMETRY_VERTEX_END_INDEX, y_offset))
-    constraints.append(Sketcher.Constraint("Distance", 0, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_END_INDEX, outer_radius))
+    constraints.append(Sketcher.Constraint("Distance", g, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           g, SKETCH_GEOMETRY_VERTEX_END_INDEX, outer_radius))
 
     # Four Line Segments
     x1 = (DIMS_STUD_SPACING / 2) - 2
@@ -278,175 +235,210 @@ def add_inner_circle_with_flats_to_sketch(sketch, outer_radius, inner_radius, fl
     geometries.append(Part.ArcOfCircle(Part.Circle(Vector(4, 4, 0), Vector(0, 0, 1), inner_radius), rad7, rad8))
 
     # Lines equal
-    constraints.append(Sketcher.Constraint('Equal', 1, 2))
-    constraints.append(Sketcher.Constraint('Equal', 1, 3))
-    constraints.append(Sketcher.Constraint('Equal', 1, 4))
+    constraints.append(Sketcher.Constraint('Equal', g + 1, g + 2))
+    constraints.append(Sketcher.Constraint('Equal', g + 1, g + 3))
+    constraints.append(Sketcher.Constraint('Equal', g + 1, g + 4))
 
     # Lines parallel/perpendicular to construction line
     # Use angle constrain instead of parallel/perpendicular so that they
     # can't 'flip' and fail to resolve the constraints
-    constraints.append(Sketcher.Constraint('Angle', 1, 135 * math.pi / 180))
-    constraints.append(Sketcher.Constraint('Angle', 2, 45 * math.pi / 180))
-    constraints.append(Sketcher.Constraint('Angle', 3, -45 * math.pi / 180))
-    constraints.append(Sketcher.Constraint('Angle', 4, -135 * math.pi / 180))
+    constraints.append(Sketcher.Constraint('Angle', g + 1, 135 * math.pi / 180))
+    constraints.append(Sketcher.Constraint('Angle', g + 2, 45 * math.pi / 180))
+    constraints.append(Sketcher.Constraint('Angle', g + 3, -45 * math.pi / 180))
+    constraints.append(Sketcher.Constraint('Angle', g + 4, -135 * math.pi / 180))
 
     # All arcs centred
     constraints.append(Sketcher.Constraint('Coincident',
-                                           5, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 5, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                           g, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           6, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 6, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                           g, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           7, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 7, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                           g, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           8, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 8, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
+                                           g, SKETCH_GEOMETRY_VERTEX_END_INDEX))
 
     # All equal radius arcs
-    constraints.append(Sketcher.Constraint('Radius', 5, inner_radius))
-    constraints.append(Sketcher.Constraint('Equal', 5, 6))
-    constraints.append(Sketcher.Constraint('Equal', 5, 7))
-    constraints.append(Sketcher.Constraint('Equal', 5, 8))
+    constraints.append(Sketcher.Constraint('Radius', g + 5, inner_radius))
+    constraints.append(Sketcher.Constraint('Equal', g + 5, g + 6))
+    constraints.append(Sketcher.Constraint('Equal', g + 5, g + 7))
+    constraints.append(Sketcher.Constraint('Equal', g + 5, g + 8))
 
     # Link arcs to segments
     constraints.append(Sketcher.Constraint('Coincident',
-                                           1, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           8, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                           g + 1, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           g + 8, SKETCH_GEOMETRY_VERTEX_START_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                           5, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 1, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                           g + 5, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           2, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           5, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                           g + 2, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           g + 5, SKETCH_GEOMETRY_VERTEX_START_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                           6, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 2, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                           g + 6, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           3, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           6, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                           g + 3, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           g + 6, SKETCH_GEOMETRY_VERTEX_START_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                           7, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                           g + 7, SKETCH_GEOMETRY_VERTEX_END_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           4, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           7, SKETCH_GEOMETRY_VERTEX_START_INDEX))
+                                           g + 4, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           g + 7, SKETCH_GEOMETRY_VERTEX_START_INDEX))
     constraints.append(Sketcher.Constraint('Coincident',
-                                           4, SKETCH_GEOMETRY_VERTEX_END_INDEX,
-                                           8, SKETCH_GEOMETRY_VERTEX_END_INDEX))
+                                           g + 4, SKETCH_GEOMETRY_VERTEX_END_INDEX,
+                                           g + 8, SKETCH_GEOMETRY_VERTEX_END_INDEX))
 
     # The critical measurement: distance to end of construction line
-    constraints.append(Sketcher.Constraint('Distance', 0, SKETCH_GEOMETRY_VERTEX_START_INDEX, 1, flat_thickness))
+    constraints.append(Sketcher.Constraint('Distance', g, SKETCH_GEOMETRY_VERTEX_START_INDEX, g + 1, flat_thickness))
 
     sketch.addGeometry(geometries, False)
     sketch.addConstraint(constraints)
 
     # Set construction lines
-    sketch.toggleConstruction(0)
+    sketch.toggleConstruction(g)
 
 
-def get_circle_edge_names(plane, inverted, offset, feature, radius):
-    Console.PrintMessage("get_circle_edge_names({},{},{},{})\n".format(plane, inverted, offset, radius))
+def refill_sketch(sketch, fill):
+    log.debug("refill_sketch({})", sketch.Name)
 
-    plane_normal = plane.Shape.normalAt(0, 0)
-    plane_normal = plane_normal if inverted else plane_normal.negative()
+    # the sketch object is kept with its attachment, external geometry and the features using it as a profile, only
+    # its own geometry and constraints are drawn again
+    sketch.deleteAllGeometry()
+    fill(sketch)
 
-    edge_names = []
-    potential_edges = []
 
-    for i in range(0, len(feature.Shape.Faces)):
-        face = feature.Shape.Faces[i]
+def _curve_key(radius, centre, axis):
 
-        # desired faces are normal to plane
-        face_normal = face.normalAt(0, 0)
-        if face_normal.isEqual(plane_normal, 1e-7):
+    # curves which are the same circle share a key, rounding absorbs floating point noise
+    return (round(radius, 4), round(centre.x, 4), round(centre.y, 4), round(centre.z, 4),
+            round(axis.x, 4), round(axis.y, 4), round(axis.z, 4))
 
-            # desired faces have a circle edge
-            for j in range(0, len(face.Edges)):
-                edge = face.Edges[j]
 
-                # circles have only one vertex and a LastParameter of 2 PI
-                if len(edge.Vertexes) == 1 and edge.LastParameter > 6.28:
+class EdgeIndex:
 
-                    # circle needs to have desired radius
-                    if edge.Curve.Radius == radius:
+    def __init__(self, shape):
+        log.debug("EdgeIndex({} edges)", len(shape.Edges))
 
-                        # face with negative offset along normal lies in plane
-                        offset_centre = edge.Vertexes[0].Point - (offset * face_normal)
+        self.shape = shape
+        self.edges = shape.Edges
 
-                        if plane.Shape.isInside(offset_centre, 1e-7, True):
-                            potential_edges.append(edge)
+        # curve key => edge indices, and rounded radius => curve keys so that a lookup only visits the curves of
+        # the radius it is after
+        self.circles = {}
+        self.arcs = {}
+        self.circle_radii = {}
+        self.arc_radii = {}
 
-    for i in range(0, len(feature.Shape.Edges)):
-        edge = feature.Shape.Edges[i]
+        for i in range(0, len(self.edges)):
+            edge = self.edges[i]
 
-        # circles have only one vertex and a LastParameter of 2 PI
-        if len(edge.Vertexes) == 1 and edge.LastParameter > 6.28:
+            if not hasattr(edge, 'Curve') or not hasattr(edge.Curve, 'Radius'):
+                continue
 
-            # circle needs to have desired radius
-            if edge.Curve.Radius == radius:
+            key = _curve_key(edge.Curve.Radius, edge.Curve.Center, edge.Curve.Axis)
 
-                # circle needs to be in potential edges
-                for j in range(0, len(potential_edges)):
-                    potential_edge = potential_edges[j]
-                    c1 = potential_edge.Curve
-                    c2 = edge.Curve
-                    if c1.Center == c2.Center and c1.Axis == c2.Axis:
-                        edge_names.append("Edge" + repr(i + 1))
-    return edge_names
+            # circles have only one vertex and a LastParameter of 2 PI
+            if len(edge.Vertexes) == 1 and edge.LastParameter > 6.28:
+                if key not in self.circles:
+                    self.circle_radii.setdefault(key[0], []).append(key)
+                self.circles.setdefault(key, []).append(i)
+
+            # arcs have two vertices and a curve with a radius
+            elif len(edge.Vertexes) == 2:
+                if key not in self.arcs:
+                    self.arc_radii.setdefault(key[0], []).append(key)
+                self.arcs.setdefault(key, []).append(i)
+
+    def circles_with_radius(self, radius):
+        return [(key, self.circles[key]) for key in self.circle_radii.get(round(radius, 4), [])]
+
+    def arcs_with_radius(self, radius):
+        return [(key, self.arcs[key]) for key in self.arc_radii.get(round(radius, 4), [])]
 
+    def on_face_with_normal(self, edge_indices, normal):
 
-def get_arc_edge_names(plane, inverted, offset, feature, radius):
-    Console.PrintMessage("get_arc_edge_names({},{},{})\n".format(inverted, offset, radius))
+        # only the faces of the candidate edges are looked at, not every face of the shape
+        for i in edge_indices:
+            for face in self.shape.ancestorsOfType(self.edges[i], Part.Face):
+                if face.normalAt(0, 0).isEqual(normal, 1e-7):
+                    return True
+
+        return False
+
+
+def _get_curve_edge_names(plane, inverted, offset, curves, edge_index, tolerance):
 
     plane_normal = plane.Shape.normalAt(0, 0)
     plane_normal = plane_normal if inverted else plane_normal.negative()
 
-    edge_names = []
-    potential_edges = []
+    edge_indices = set()
+
+    for key, indices in curves:
 
-    for i in range(0, len(feature.Shape.Faces)):
-        face = feature.Shape.Faces[i]
+        # desired curves are parallel to the plane
+        axis = Vector(key[4], key[5], key[6])
+        if abs(abs(axis.dot(plane_normal)) - 1) > 1e-4:
+            continue
 
-        # desired faces are normal to plane
-        face_normal = face.normalAt(0, 0)
-        if face_normal.isEqual(plane_normal, 1e-7):
+        # curve with negative offset along normal lies in plane
+        offset_point = edge_index.edges[indices[0]].Vertexes[0].Point - (offset * plane_normal)
+        if not plane.Shape.isInside(offset_point, tolerance, True):
+            continue
 
-            # desired faces have an arc edge
-            for j in range(0, len(face.Edges)):
-                edge = face.Edges[j]
+        # desired curves are an edge of a face normal to plane
+        if edge_index.on_face_with_normal(indices, plane_normal):
+            edge_indices.update(indices)
 
-                # arcs have two vertices and arc needs to have a curve with desired radius
-                if len(edge.Vertexes) == 2 and hasattr(edge, 'Curve') and hasattr(edge.Curve, 'Radius') \
-                        and abs(edge.Curve.Radius - radius) < 1e-4:
+    return ["Edge" + repr(i + 1) for i in sorted(edge_indices)]
 
-                    # face with negative offset along normal lies in plane
-                    offset_centre = edge.Vertexes[0].Point - (offset * face_normal)
 
-                    if plane.Shape.isInside(offset_centre, 1e-6, True):
-                        potential_edges.append(edge)
+def get_circle_edge_names(plane, inverted, offset, feature, radius, edge_index=None):
+    log.debug("get_circle_edge_names({},{},{},{})", plane, inverted, offset, radius)
 
-    for i in range(0, len(feature.Shape.Edges)):
-        edge = feature.Shape.Edges[i]
+    if edge_index is None:
+        edge_index = EdgeIndex(feature.Shape)
 
-        # arcs have two vertices and arc needs to have a curve with desired radius
-        if len(edge.Vertexes) == 2 and hasattr(edge, 'Curve') and hasattr(edge.Curve, 'Radius') \
-                and abs(edge.Curve.Radius - radius) < 1e-4:
+    return _get_curve_edge_names(plane, inverted, offset, edge_index.circles_with_radius(radius), edge_index, 1e-7)
+
+
+def get_arc_edge_names(plane, inverted, offset, feature, radius, edge_index=None):
+    log.debug("get_arc_edge_names({},{},{})", inverted, offset, radius)
+
+    if edge_index is None:
+        edge_index = EdgeIndex(feature.Shape)
+
+    return _get_curve_edge_names(plane, inverted, offset, edge_index.arcs_with_radius(radius), edge_index, 1e-6)
+
+
+def get_outer_edge_names(feature):
+    log.debug("get_outer_edge_names()")
+
+    shape = feature.Shape
+    bound_box = shape.BoundBox
+
+    edge_names = []
+
+    for i in range(0, len(shape.Edges)):
+        edge_box = shape.Edges[i].BoundBox
+
+        # an outside edge of a box shaped solid lies in two faces of its bounding box
+        sides = [edge_box.XMax - bound_box.XMin, bound_box.XMax - edge_box.XMin,
+                 edge_box.YMax - bound_box.YMin, bound_box.YMax - edge_box.YMin,
+                 edge_box.ZMax - bound_box.ZMin, bound_box.ZMax - edge_box.ZMin]
+
+        if len([side for side in sides if side < 1e-4]) >= 2:
+            edge_names.append("Edge" + repr(i + 1))
 
-            # arc needs to be in potential edges
-            for j in range(0, len(potential_edges)):
-                potential_edge = potential_edges[j]
-                c1 = potential_edge.Curve
-                c2 = edge.Curve
-                if c1.Center == c2.Center and c1.Axis == c2.Axis:
-                    edge_names.append("Edge" + repr(i + 1))
-                    break
     return edge_names
 
 
 def _render_pin_revolution(label, datum_line, body, doc):
-    Console.PrintMessage("_render_pin_revolution({})\n".format(label))
+    log.debug("_render_pin_revolution({})", label)
 
     pin_revolution_sketch = body.newObject("Sketcher::SketchObject", label + "_pin_revolution_sketch")
     pin_revolution_sketch.AttachmentSupport = [(datum_line, '')]
@@ -547,102 +539,71 @@ def _render_pin_revolution(label, datum_line, body, doc):
     pin_revolution.ReferenceAxis = (pin_revolution_sketch, ['Axis0'])
 
     doc.recompute()
-    pin_revolution_sketch.ViewObject.Visibility = False
+    set_visibility(pin_revolution_sketch, False)
 
     return pin_revolution
 
 
 def _render_pin_flange(label, datum_line, body, doc):
-    Console.PrintMessage("_render_pin_flange({})\n".format(label))
-
-    # path for additive pipe
-
-    pin_pipe_path_sketch = body.newObject("Sketcher::SketchObject", label + "_pin_pipe_path_sketch")
-    pin_pipe_path_sketch.AttachmentSupport = [(datum_line.AttachmentSupport[1][0]), (datum_line, '')]
-    pin_pipe_path_sketch.MapMode = 'OZX'
-    # note 0.005 adjustment to prevent seemingly a bug in freecad rendering
-    pin_pipe_path_sketch.AttachmentOffset = Placement(Vector(0, 0, ((-1 * DIMS_PIN_FLANGE_DEPTH) / 2) - 0.005),
-                                                      Rotation(0, 0, 0))
-
-    geometries = []
-    constraints = []
-
-    geometries.append(Part.Ellipse(Vector(DIMS_PIN_OUTER_RADIUS, 0, 0),
-                                   Vector(0, -1 * (DIMS_PIN_OUTER_RADIUS - DIMS_PIN_FLANGE_HEIGHT), 0),
-                                   Vector(0, 0, 0)))
-
-    pin_pipe_path_sketch.addGeometry(geometries, False)
-    pin_pipe_path_sketch.exposeInternalGeometry(0)
-
-    # constrain ellipse position
+    log.debug("_render_pin_flange({})", label)
 
-    constraints.append(Sketcher.Constraint('Coincident',
-                                           SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
-                                           0, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX))
-
-    # constrain ellipse shape
+    # the flange is rotationally symmetric so its elliptical cross-section is revolved about the pin axis,
+    # the sketch is attached in the same way as the pin revolution sketch so the pin runs along -X
 
-    constraints.append(Sketcher.Constraint('Horizontal', 1))
-    constraints.append(Sketcher.Constraint('Distance', 1, 2 * DIMS_PIN_OUTER_RADIUS))
-    constraints.append(Sketcher.Constraint('Distance', 2, 2 * (DIMS_PIN_OUTER_RADIUS - DIMS_PIN_FLANGE_HEIGHT)))
+    pin_flange_sketch = body.newObject("Sketcher::SketchObject", label + "_pin_flange_sketch")
+    pin_flange_sketch.AttachmentSupport = [(datum_line, '')]
+    pin_flange_sketch.MapMode = 'ObjectXY'
+    pin_flange_sketch.AttachmentOffset = Placement(Vector(0, 0, 0), Rotation(0, 90, 0))
 
-    pin_pipe_path_sketch.addConstraint(constraints)
-
-    doc.recompute()
-
-    # profile for additive pipe
-
-    pin_pipe_profile_sketch = body.newObject("Sketcher::SketchObject", label + "_pin_pipe_profile_sketch")
-    pin_pipe_profile_sketch.AttachmentSupport = [(pin_pipe_path_sketch, 'Edge1')]
-    pin_pipe_profile_sketch.MapMode = 'ObjectXZ'
+    flange_centre = Vector(-1 * (DIMS_PIN_LENGTH - (DIMS_PIN_FLANGE_DEPTH / 2)), DIMS_PIN_OUTER_RADIUS, 0)
 
     geometries = []
     constraints = []
 
-    geometries.append(Part.Ellipse(Vector(0, DIMS_PIN_FLANGE_DEPTH / 2, 0),
-                                   Vector(-1 * DIMS_PIN_FLANGE_HEIGHT, 0, 0),
-                                   Vector(0, 0, 0)))
+    geometries.append(Part.Ellipse(flange_centre + Vector(DIMS_PIN_FLANGE_DEPTH / 2, 0, 0),
+                                   flange_centre + Vector(0, DIMS_PIN_FLANGE_HEIGHT, 0),
+                                   flange_centre))
 
-    pin_pipe_profile_sketch.addGeometry(geometries, False)
-    pin_pipe_profile_sketch.exposeInternalGeometry(0)
+    pin_flange_sketch.addGeometry(geometries, False)
+    pin_flange_sketch.exposeInternalGeometry(0)
 
-    # constrain ellipse position
+    # constrain ellipse position: centred on the outside of the pin, half the flange depth from the tip
 
     constraints.append(Sketcher.Constraint('DistanceX',
-                                           SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
                                            0, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           DIMS_PIN_OUTER_RADIUS))
+                                           SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
+                                           DIMS_PIN_LENGTH - (DIMS_PIN_FLANGE_DEPTH / 2)))
     constraints.append(Sketcher.Constraint('DistanceY',
                                            SKETCH_GEOMETRY_ORIGIN_INDEX, SKETCH_GEOMETRY_VERTEX_START_INDEX,
                                            0, SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX,
-                                           0))
+                                           DIMS_PIN_OUTER_RADIUS))
 
     # constrain ellipse shape
 
-    constraints.append(Sketcher.Constraint('Horizontal', 2))
+    constraints.append(Sketcher.Constraint('Horizontal', 1))
     constraints.append(Sketcher.Constraint('Distance', 1, DIMS_PIN_FLANGE_DEPTH))
     constraints.append(Sketcher.Constraint('Distance', 2, DIMS_PIN_FLANGE_HEIGHT * 2))
 
-    pin_pipe_profile_sketch.addConstraint(constraints)
+    pin_flange_sketch.addConstraint(constraints)
 
     doc.recompute()
 
-    # additive pipe for pin flange
+    # revolution for pin flange
 
-    pin_pipe = body.newObject("PartDesign::AdditivePipe", label + "_pin_pipe")
-    pin_pipe.Profile = pin_pipe_profile_sketch
-    pin_pipe.Spine = pin_pipe_path_sketch
+    pin_flange = body.newObject("PartDesign::Revolution", label + "_pin_flange")
+    pin_flange.Angle = 360
+    pin_flange.Profile = pin_flange_sketch
+    pin_flange.ReferenceAxis = (pin_flange_sketch, ['H_Axis'])
 
     doc.recompute()
 
-    pin_pipe_path_sketch.ViewObject.Visibility = False
-    pin_pipe_profile_sketch.ViewObject.Visibility = False
+    set_visibility(pin_flange_sketch, False)
 
-    return pin_pipe
+    return pin_flange
 
 
 def _render_pin_notch(label, datum_line, body, doc):
-    Console.PrintMessage("_render_pin_notch({})\n".format(label))
+    log.debug("_render_pin_notch({})", label)
 
     # sketch for notch
 
@@ -778,13 +739,225 @@ def _render_pin_notch(label, datum_line, body, doc):
 
     doc.recompute()
 
-    pin_notch_sketch.ViewObject.Visibility = False
+    set_visibility(pin_notch_sketch, False)
 
     return pin_notch_pocket
 
 
-def render_pin(label, datum_line, body, doc):
-    Console.PrintMessage("render_pin()\n")
+def _make_pin_shape(dims):
+    log.debug("_make_pin_shape()")
+
+    # the same dimension values as the template cache key, not the copies imported when this module was loaded
+    inner_radius = dims["DIMS_PIN_INNER_RADIUS"]
+    outer_radius = dims["DIMS_PIN_OUTER_RADIUS"]
+    collar_radius = dims["DIMS_PIN_COLLAR_RADIUS"]
+    collar_depth = dims["DIMS_PIN_COLLAR_DEPTH"]
+    length = dims["DIMS_PIN_LENGTH"]
+    flange_depth = dims["DIMS_PIN_FLANGE_DEPTH"]
+    flange_height = dims["DIMS_PIN_FLANGE_HEIGHT"]
+    notch_depth = dims["DIMS_PIN_NOTCH_DEPTH"]
+    notch_width = dims["DIMS_PIN_NOTCH_WIDTH"]
+    fillet_radius = dims["DIMS_PIN_NOTCH_OPENING_FILLET_RADIUS"]
+
+    # pin along +Z with its base at the origin, the hollow pin and collar are a single revolved profile
+    profile = Part.makePolygon([Vector(inner_radius, 0, 0),
+                                Vector(collar_radius, 0, 0),
+                                Vector(collar_radius, 0, collar_depth),
+                                Vector(outer_radius, 0, collar_depth),
+                                Vector(outer_radius, 0, length),
+                                Vector(inner_radius, 0, length),
+                                Vector(inner_radius, 0, 0)])
+    pin = Part.Face(profile).revolve(Vector(0, 0, 0), Vector(0, 0, 1), 360)
+
+    # the flange is a revolved ellipse centred on the outside of the pin, Part.Ellipse needs the major axis first
+    flange_centre = Vector(outer_radius, 0, length - (flange_depth / 2))
+    flange_axes = [Vector(0, 0, flange_depth / 2), Vector(flange_height, 0, 0)]
+    if flange_height > flange_depth / 2:
+        flange_axes.reverse()
+    flange = Part.Ellipse(flange_centre + flange_axes[0], flange_centre + flange_axes[1], flange_centre)
+    pin = pin.fuse(Part.Face(Part.Wire(flange.toShape())).revolve(Vector(0, 0, 0), Vector(0, 0, 1), 360))
+
+    # the notch has to reach past the flange
+    reach = outer_radius + flange_height
+    notch_bottom = length - notch_depth
+    notch_offset = (notch_width / 2) + fillet_radius
+
+    notch = Part.makeBox(notch_width, 2 * reach, notch_depth + 1,
+                         Vector(-1 * notch_width / 2, -1 * reach, notch_bottom))
+    notch_end = Part.makeCylinder(notch_width / 2, 2 * reach, Vector(0, -1 * reach, notch_bottom), Vector(0, 1, 0))
+
+    notch_opening = Part.makeBox(2 * notch_offset, 2 * reach, fillet_radius + 1,
+                                 Vector(-1 * notch_offset, -1 * reach, length - fillet_radius))
+    notch_opening = notch_opening.cut([
+        Part.makeCylinder(fillet_radius, 2 * reach, Vector(notch_offset, -1 * reach, length - fillet_radius),
+                          Vector(0, 1, 0)),
+        Part.makeCylinder(fillet_radius, 2 * reach, Vector(-1 * notch_offset, -1 * reach, length - fillet_radius),
+                          Vector(0, 1, 0))])
+
+    return pin.cut([notch, notch_end, notch_opening]).removeSplitter()
+
+
+# pin dimensions => pin shape, every pin is a placed copy of the same template
+_pin_templates = {}
+
+
+def pin_template():
+
+    # keyed on the pin dimensions so that changing them builds a new template
+    key = tuple((name, getattr(Legify.Dimensions, name))
+                for name in sorted(dir(Legify.Dimensions)) if name.startswith("DIMS_PIN_"))
+
+    template = _pin_templates.get(key)
+
+    if template is None:
+        template = _make_pin_shape(dict(key))
+        _pin_templates[key] = template
+
+    # shared, so callers place a copy
+    return template
+
+
+def pin_rotation(direction):
+
+    # pin Z along the direction with the notch opening kept vertical, so that the notch is the same way round on
+    # every side of a brick whichever way the datum line happens to be rolled
+    direction = Vector(direction).normalize()
+    up = Vector(0, 0, 1)
+    if abs(direction.z) > 1 - 1e-6:
+        up = Vector(0, 1, 0)
+    return Rotation(up.cross(direction), up, direction, "ZYX")
+
+
+def place_pin(base, direction):
+
+    pin = pin_template().copy()
+    pin.Placement = Placement(base, pin_rotation(direction))
+    return pin
+
+
+def _place_pins(datum_lines, occurrences, spacing, pattern_plane):
+
+    # the roll of a datum line is arbitrary so it cannot give the direction of a row
+    if occurrences > 1 and pattern_plane is None:
+        raise Exception("A pattern plane is required to repeat pins")
+
+    direction = Vector(0, 0, 0)
+    if pattern_plane is not None:
+        pattern_plane.recompute(True)
+        direction = pattern_plane.Placement.Rotation.multVec(Vector(1, 0, 0))
+
+    pins = []
+
+    for datum_line in datum_lines:
+
+        # the pins are placed once rather than on every recompute so the datum placements have to be up to date
+        datum_line.recompute(True)
+
+        # a datum line runs along its Z axis from the base of the pin to the tip
+        pin = place_pin(datum_line.Placement.Base, datum_line.Placement.Rotation.multVec(Vector(0, 0, 1)))
+
+        for i in range(0, max(occurrences, 1)):
+            placed = pin.copy()
+            placed.translate(direction * (i * spacing))
+            pins.append(placed)
+
+    return pins
+
+
+def _render_pin_feature(label, datum_lines, body, doc, occurrences=1, spacing=0, pattern_plane=None):
+    log.debug("_render_pin_feature({0}, {1}, {2})", label, len(datum_lines), occurrences)
+
+    if len(datum_lines) == 0:
+        raise Exception("No datum lines for pins: {}".format(label))
+
+    # the placed pins are a plain shape fused by a stock boolean so that saved documents open without Legify
+    pin_shape = doc.addObject("Part::Feature", label + "_pin_shape")
+    pin_shape.Shape = Part.makeCompound(_place_pins(datum_lines, occurrences, spacing, pattern_plane))
+    set_visibility(pin_shape, False)
+
+    pin = body.newObject("PartDesign::Boolean", label + "_pin")
+    pin.Type = "Fuse"
+    pin.addObject(pin_shape)
+
+    doc.recompute()
+
+    return pin
+
+
+@profiled("update_pins")
+def update_pins(label, pin_shape, datum_lines, occurrences=1, spacing=0, pattern_plane=None):
+    log.debug("update_pins({0}, {1}, {2})", label, len(datum_lines), occurrences)
+
+    # the pin shape is not parametric, so the pins are placed again along the datum lines as they are now
+    pin_shape.Shape = Part.makeCompound(_place_pins(datum_lines, occurrences, spacing, pattern_plane))
+
+
+def pin_boolean_supported():
+    return tuple(int(part) for part in Version()[0:2]) >= PIN_BOOLEAN_MIN_VERSION
+
+
+def _render_pin_linear_pattern(label, features, body, doc, occurrences, spacing, pattern_plane):
+    log.debug("_render_pin_linear_pattern({0}, {1})", label, occurrences)
+
+    # the row runs along the X axis of the pattern plane, as for the placed pins
+    pattern_datum_line = body.newObject('PartDesign::Line', label + "_pin_pattern_datum_line")
+    pattern_datum_line.AttachmentSupport = [(pattern_plane, '')]
+    pattern_datum_line.MapMode = 'ObjectX'
+    set_visibility(pattern_datum_line, False)
+
+    # do not use body.newObject("PartDesign::LinearPattern", ...) here as the body Tip will not be updated
+    pin_linear_pattern = doc.addObject("PartDesign::LinearPattern", label + "_pin_linear_pattern")
+    pin_linear_pattern.Originals = features
+    pin_linear_pattern.Direction = (pattern_datum_line, [''])
+    update_pin_linear_pattern(pin_linear_pattern, occurrences, spacing)
+    body.addObject(pin_linear_pattern)
+
+    doc.recompute()
+
+    return pin_linear_pattern
+
+
+def update_pin_linear_pattern(pin_linear_pattern, occurrences, spacing):
+
+    # the length is ignored for a single pin but must not be zero
+    pin_linear_pattern.Length = spacing * max(occurrences - 1, 1)
+    pin_linear_pattern.Occurrences = max(occurrences, 1)
+
+
+def _render_sketched_pins(label, datum_lines, body, doc, occurrences, spacing, pattern_plane):
+
+    # the sketched pins are attached to the datum lines so they follow them, a row is a linear pattern of them
+    features = []
+
+    for datum_line in datum_lines:
+        pin_features = render_pin(label, datum_line, body, doc, sketched=True)
+        if pattern_plane is not None:
+            _render_pin_linear_pattern(label, pin_features, body, doc, occurrences, spacing, pattern_plane)
+        features.extend(pin_features)
+
+    return features
+
+
+@profiled("render_pins")
+def render_pins(label, datum_lines, body, doc, occurrences=1, spacing=0, pattern_plane=None):
+    log.debug("render_pins({0}, {1}, {2})", label, len(datum_lines), occurrences)
+
+    # a single feature for all of the pins, however many there are, where the Boolean can take a plain shape
+    if not pin_boolean_supported():
+        if occurrences > 1 and pattern_plane is None:
+            raise Exception("A pattern plane is required to repeat pins")
+        return _render_sketched_pins(label, datum_lines, body, doc, occurrences, spacing, pattern_plane)
+
+    return [_render_pin_feature(label, datum_lines, body, doc, occurrences, spacing, pattern_plane)]
+
+
+@profiled("render_pin")
+def render_pin(label, datum_line, body, doc, sketched=False):
+    log.debug("render_pin({0}, {1})", label, sketched)
+
+    # the sketched pin can be edited like any other feature, otherwise the shared pin template is placed
+    if not sketched and pin_boolean_supported():
+        return [_render_pin_feature(label, [datum_line], body, doc)]
 
     pin_revolution = _render_pin_revolution(label, datum_line, body, doc)
 
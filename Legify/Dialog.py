@@ -1,8 +1,16 @@
 # coding: UTF-8
 
+from FreeCAD import activeDocument
 from PySide import QtGui, QtCore
+import FreeCADGui
 from Legify.Brick import *
 
+DIALOG_PREVIEW_DELAY_MS = 400
+DIALOG_PREVIEW_NAME = "brick_preview"
+
+# the dialog is not modal so a reference is kept until it is closed
+_open_dialog = None
+
 
 class Dialog:
 
@@ -19,8 +27,8 @@ class Dialog:
         self.normal_font.setBold(False)
 
         # Construct dialog
-        self.dialog = QtGui.QDialog()
-        self.dialog.setModal(True)
+        self.dialog = QtGui.QDialog(FreeCADGui.getMainWindow())
+        self.dialog.setModal(False)
         self.dialog.setWindowTitle("Legify Brick Macro")
 
         # Construct widgets
@@ -30,11 +38,41 @@ class Dialog:
         box_layout.addWidget(self._construct_side_studs_widgets())
         box_layout.addWidget(self._construct_pins_widgets())
         box_layout.addWidget(self._construct_holes_widgets())
+        box_layout.addWidget(self._construct_detail_widgets())
         box_layout.addWidget(self._construct_button_widgets())
 
+        # a selected brick is re-rendered in place instead of adding a new one
+        self.brick = None
+        for obj in FreeCADGui.Selection.getSelection():
+            if hasattr(obj, "LegifyState"):
+                self.brick = obj
+                break
+
+        # Live preview
+        self.closed = False
+        self.preview_name = None
+        self.preview_steps = None
+        self.progress_dialog = None
+
+        self.preview_timer = QtCore.QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(DIALOG_PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self._start_preview)
+
+        # the preview is built on the GUI thread one step per event loop turn, so edits are handled in between
+        self.preview_step_timer = QtCore.QTimer()
+        self.preview_step_timer.setInterval(0)
+        self.preview_step_timer.timeout.connect(self._continue_preview)
+
+        self._connect_preview_triggers()
+        self.dialog.finished.connect(self._on_dialog_finished)
+
         # Show dialog
+        global _open_dialog
+        _open_dialog = self
+
         self.dialog.show()
-        self.dialog.exec_()
+        self._schedule_preview()
 
     def _construct_dimensions_widgets(self):
 
@@ -483,18 +521,72 @@ class Dialog:
 
         return holes_group
 
+    def _construct_detail_widgets(self):
+
+        detail_label = QtGui.QLabel("Level")
+        detail_label.setAlignment(QtCore.Qt.AlignRight)
+        detail_label.setMinimumWidth(100)
+
+        detail_note_label = QtGui.QLabel(u"ℹ")
+        detail_note_label.setFont(self.note_font)
+        detail_note_label.setToolTip(
+            "Preview: no fillets or ribs\nStandard: ribs without fillets\nFull: ribs and fillets\n\n"
+            "select a rendered brick to re-render it at another level")
+        detail_note_label.setMinimumWidth(25)
+
+        detail_combobox = QtGui.QComboBox()
+        detail_combobox.addItem("Preview", Detail.PREVIEW)
+        detail_combobox.addItem("Standard", Detail.STANDARD)
+        detail_combobox.addItem("Full", Detail.FULL)
+        detail_combobox.setFont(self.normal_font)
+        detail_combobox.setMinimumWidth(100)
+        detail_combobox.setCurrentIndex(2)
+
+        detail_level_group = QtGui.QWidget()
+        detail_level_group_layout = QtGui.QHBoxLayout(detail_level_group)
+        detail_level_group_layout.setContentsMargins(0, 0, 0, 0)
+        detail_level_group_layout.addWidget(detail_label)
+        detail_level_group_layout.addWidget(detail_combobox)
+        detail_level_group_layout.addWidget(detail_note_label)
+        detail_level_group_layout.addStretch(1)
+        detail_level_group_layout.setAlignment(detail_label, QtCore.Qt.AlignVCenter)
+        detail_level_group_layout.setAlignment(detail_combobox, QtCore.Qt.AlignVCenter)
+        detail_level_group_layout.setAlignment(detail_note_label, QtCore.Qt.AlignVCenter)
+
+        detail_group = QtGui.QGroupBox("Detail")
+        detail_group.setFont(self.heading_font)
+
+        detail_layout = QtGui.QVBoxLayout(detail_group)
+        detail_layout.addWidget(detail_level_group)
+
+        # Maintain a reference to all form inputs
+        self.detail_combobox = detail_combobox
+
+        return detail_group
+
     def _construct_button_widgets(self):
 
+        preview_status_label = QtGui.QLabel("")
+        preview_status_label.setFont(self.note_font)
+
         buttons = QtGui.QDialogButtonBox()
         buttons.setOrientation(QtCore.Qt.Horizontal)
         buttons.setStandardButtons(QtGui.QDialogButtonBox.Cancel | QtGui.QDialogButtonBox.Ok)
         buttons.accepted.connect(self.on_ok_clicked)
         buttons.rejected.connect(self.on_cancel_clicked)
 
-        return buttons
+        buttons_group = QtGui.QWidget()
+        buttons_group_layout = QtGui.QHBoxLayout(buttons_group)
+        buttons_group_layout.setContentsMargins(0, 0, 0, 0)
+        buttons_group_layout.addWidget(preview_status_label)
+        buttons_group_layout.addStretch(1)
+        buttons_group_layout.addWidget(buttons)
 
-    def on_ok_clicked(self):
-        self.dialog.close()
+        self.preview_status_label = preview_status_label
+
+        return buttons_group
+
+    def _read_options(self):
 
         dimensions = dict([
             ("width", self.brick_width_spinbox.value()),
@@ -530,7 +622,157 @@ class Dialog:
             ("offset", self.holes_offset_checkbox.isChecked()),
         ])
 
-        BrickRenderer(dimensions, top_studs, side_studs, pins, holes).render()
+        detail = self.detail_combobox.itemData(self.detail_combobox.currentIndex())
+
+        return dimensions, top_studs, side_studs, pins, holes, detail
+
+    def _connect_preview_triggers(self):
+
+        for spinbox in (self.brick_width_spinbox, self.brick_depth_spinbox, self.brick_height_spinbox,
+                        self.top_studs_width_count_spinbox, self.top_studs_depth_count_spinbox):
+            spinbox.valueChanged.connect(self._schedule_preview)
+
+        for combobox in (self.top_studs_style_combobox, self.side_studs_style_combobox, self.pins_style_combobox,
+                         self.holes_style_combobox):
+            combobox.currentIndexChanged.connect(self._schedule_preview)
+
+        for checkbox in (self.side_studs_front_checkbox, self.side_studs_back_checkbox,
+                         self.side_studs_left_checkbox, self.side_studs_right_checkbox,
+                         self.pins_front_checkbox, self.pins_back_checkbox, self.pins_left_checkbox,
+                         self.pins_right_checkbox, self.pins_offset_checkbox, self.holes_offset_checkbox):
+            checkbox.toggled.connect(self._schedule_preview)
+
+    def _schedule_preview(self, *args):
+
+        # a preview still being built is superseded, and restarting the timer means only the last of a burst of
+        # changes is rendered
+        self._cancel_preview()
+        self.preview_timer.start()
+
+    def _cancel_preview(self):
+
+        self.preview_step_timer.stop()
+
+        if self.preview_steps is not None:
+            self.preview_steps.close()
+            self.preview_steps = None
+
+    def _start_preview(self):
+
+        from Legify.Solid import SolidBrickRenderer
+
+        options = self._read_options()
+
+        self._cancel_preview()
+        self.preview_status_label.setText("Rendering preview...")
+
+        try:
+            plan_brick(*options[0:5])
+            self.preview_steps = SolidBrickRenderer(*options[0:5], detail=Detail.PREVIEW).build_steps()
+        except Exception as inst:
+            self.preview_status_label.setText(str(inst))
+            return
+
+        self.preview_step_timer.start()
+
+    def _continue_preview(self):
+
+        if self.closed or self.preview_steps is None:
+            return
+
+        try:
+            shape = next(self.preview_steps)
+        except Exception as inst:
+            self._cancel_preview()
+            self.preview_status_label.setText(str(inst))
+            return
+
+        # steps before the last one only yield to the event loop
+        if shape is None:
+            return
+
+        self._cancel_preview()
+        self._show_preview(shape)
+
+    def _show_preview(self, shape):
+
+        doc = activeDocument()
+        if doc is None:
+            return
+
+        # the preview is temporary so it is kept out of the undo history
+        transaction = RenderTransaction(doc, undo=RENDER_UNDO_SUSPENDED)
+        transaction.begin()
+
+        preview = doc.getObject(self.preview_name) if self.preview_name is not None else None
+
+        if preview is None:
+            preview = doc.addObject("Part::Feature", DIALOG_PREVIEW_NAME)
+            self.preview_name = preview.Name
+
+            if self.brick is not None:
+                set_visibility(self.brick, False)
+
+        preview.Shape = shape
+        transaction.scope = preview
+        transaction.recompute()
+        transaction.commit()
+
+        self.preview_status_label.setText("Preview")
+
+    def _remove_preview(self):
+
+        doc = activeDocument()
+
+        if doc is not None and self.preview_name is not None and doc.getObject(self.preview_name) is not None:
+            transaction = RenderTransaction(doc, undo=RENDER_UNDO_SUSPENDED)
+            transaction.begin()
+            doc.removeObject(self.preview_name)
+            transaction.recompute()
+            transaction.commit()
+
+            if self.brick is not None:
+                set_visibility(self.brick, True)
+
+        self.preview_name = None
+
+    def _on_dialog_finished(self, result):
+        global _open_dialog
+
+        self.closed = True
+        self.preview_timer.stop()
+        self._cancel_preview()
+        self._remove_preview()
+
+        _open_dialog = None
+
+    def on_ok_clicked(self):
+
+        options = self._read_options()
+
+        self.dialog.close()
+
+        # the full build has to run on the GUI thread as it creates document objects, so events are only handled
+        # between stages where the build can also be cancelled
+        self.progress_dialog = QtGui.QProgressDialog("Rendering brick...", "Cancel", 0, 0, FreeCADGui.getMainWindow())
+        self.progress_dialog.setWindowTitle("Legify Brick Macro")
+        self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+
+        try:
+            BrickRenderer(*options).render(brick=self.brick, progress=self._on_render_progress)
+        finally:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
+    def _on_render_progress(self, name, index, count):
+
+        self.progress_dialog.setMaximum(count)
+        self.progress_dialog.setValue(index)
+        self.progress_dialog.setLabelText("Rendering {}...".format(name.replace("_", " ")))
+        QtGui.QApplication.processEvents()
+
+        return not self.progress_dialog.wasCanceled()
 
     def on_cancel_clicked(self):
         self.dialog.close()
@@ -0,0 +1,87 @@
+# coding: UTF-8
+
+# Plain constants only, no FreeCAD imports, so that these can be loaded without any of the FreeCAD modules.
+
+# Brick Dimensions
+
+DIMS_STUD_SPACING = 8
+DIMS_PLATE_HEIGHT = 3.2
+DIMS_BRICK_OUTER_REDUCTION = 0.1
+
+DIMS_EDGE_FILLET = 0.1
+DIMS_STUD_FILLET = 0.25
+
+DIMS_TOP_THICKNESS = 1.1
+DIMS_FLAT_SIDE_THICKNESS = 1.5
+DIMS_RIBBED_SIDE_THICKNESS = 1.2
+
+DIMS_SIDE_RIB_WIDTH = 0.7
+DIMS_SIDE_RIB_DEPTH = 0.3
+
+DIMS_STUD_OUTER_RADIUS = 2.45
+DIMS_STUD_INNER_RADIUS = 1.6
+DIMS_STUD_FLAT_THICKNESS = 0.9
+DIMS_STUD_HEIGHT = 1.8
+DIMS_STUD_INSIDE_HOLE_RADIUS = 1.2
+DIMS_STUD_INSIDE_HOLE_TOP_OFFSET = 1.7
+
+DIMS_STICK_OUTER_RADIUS = 1.5
+DIMS_STICK_INNER_RADIUS = 0.75
+DIMS_STICK_RIB_THICKNESS = 0.9
+DIMS_STICK_RIB_BOTTOM_OFFSET = 2.15
+DIMS_STICK_AND_TUBE_BOTTOM_INSET = 0.2
+
+DIMS_TUBE_OUTER_RADIUS = 3.25
+DIMS_TUBE_INNER_RADIUS = 2.45
+DIMS_TUBE_FLAT_THICKNESS = 0.9
+DIMS_TUBE_RIB_THICKNESS = 0.8
+DIMS_TUBE_RIB_BOTTOM_OFFSET = 2.15
+
+DIMS_SIDE_STUD_CENTRE_HEIGHT = 5.7
+
+DIMS_TECHNIC_HOLE_CENTRE_HEIGHT = 5.8
+DIMS_TECHNIC_HOLE_OUTER_RADIUS = 3.55
+DIMS_TECHNIC_HOLE_INNER_RADIUS = 2.4
+DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS = 3.05
+DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH = 0.85
+
+DIMS_PIN_COLLAR_DEPTH = 0.8
+DIMS_PIN_COLLAR_RADIUS = 2.95
+DIMS_PIN_OUTER_RADIUS = 2.35
+DIMS_PIN_INNER_RADIUS = 1.7
+DIMS_PIN_LENGTH = 8
+DIMS_PIN_FLANGE_HEIGHT = 0.25
+DIMS_PIN_FLANGE_DEPTH = 0.75
+DIMS_PIN_NOTCH_WIDTH = 0.9
+DIMS_PIN_NOTCH_DEPTH = 2.8
+DIMS_PIN_NOTCH_OPENING_FILLET_RADIUS = 0.35
+
+# Part Design Constants
+
+SKETCH_GEOMETRY_VERTEX_START_INDEX = 1
+SKETCH_GEOMETRY_VERTEX_END_INDEX = 2
+SKETCH_GEOMETRY_VERTEX_CENTRE_INDEX = 3
+
+# Origin geometry is indexed at -1
+SKETCH_GEOMETRY_ORIGIN_INDEX = -1
+# External geometry is indexed from -3 descending! https://forum.freecadweb.org/viewtopic.php?t=24211
+SKETCH_GEOMETRY_FIRST_EXTERNAL_INDEX = -3
+
+PAD_TYPE_DIMENSION = 0
+PAD_TYPE_THROUGH_ALL = 1
+PAD_TYPE_TO_FIRST = 2
+PAD_TYPE_UP_TO_FACE = 3
+PAD_TYPE_TWO_DIMENSIONS = 4
+
+POCKET_TYPE_DIMENSION = 0
+POCKET_TYPE_THROUGH_ALL = 1
+POCKET_TYPE_TO_FIRST = 2
+POCKET_TYPE_UP_TO_FACE = 3
+POCKET_TYPE_TWO_DIMENSIONS = 4
+
+ORIGIN_X_AXIS_INDEX = 0
+ORIGIN_Y_AXIS_INDEX = 1
+ORIGIN_Z_AXIS_INDEX = 2
+ORIGIN_XY_PLANE_INDEX = 3
+ORIGIN_XZ_PLANE_INDEX = 4
+ORIGIN_YZ_PLANE_INDEX = 5
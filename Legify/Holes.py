@@ -1,6 +1,6 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Placement, Rotation, Vector
+from FreeCAD import Placement, Rotation, Vector
 import Part
 import Sketcher
 from Legify.Common import *
@@ -9,25 +9,23 @@ from Legify.Common import *
 class HolesRenderer:
 
     def __init__(self):
-        Console.PrintMessage("HolesRenderer\n")
+        log.debug("HolesRenderer")
 
         self.doc = None
         self.brick = None
+        self.context = None
 
         self.width = None
         self.depth = None
         self.style = None
         self.offset = None
 
-        self.front_datum_plane = None
-        self.front_inside_datum_plane = None
-        self.back_inside_datum_plane = None
-        self.depth_mirror_datum_plane = None
-        self.top_inside_datum_plane = None
+        self.detail = None
+        self.layout = None
 
     @staticmethod
     def _add_technic_surround(geometries, constraints, hole_offset):
-        Console.PrintMessage("_add_technic_surround_to_sketch({})\n".format(hole_offset))
+        log.debug("_add_technic_surround_to_sketch({})", hole_offset)
 
         segment_count = len(geometries)
 
@@ -78,137 +76,161 @@ class HolesRenderer:
         constraints.append(Sketcher.Constraint("Coincident", segment_count + 3, SKETCH_GEOMETRY_VERTEX_END_INDEX,
                                                segment_count, SKETCH_GEOMETRY_VERTEX_START_INDEX))
 
-    def _render_holes(self):
-        Console.PrintMessage("render_holes()\n")
+    def _fill_holes_pad_sketch(self, sketch):
+
+        geometries = []
+        constraints = []
 
-        hole_count = (self.width - 1) if self.offset else self.width
+        for offset in self.layout.hole_width_offsets.tolist():
+            self._add_technic_surround(geometries, constraints, offset)
+
+        sketch.addGeometry(geometries, False)
+        sketch.addConstraint(constraints)
+
+    def _fill_holes_pocket_sketch(self, sketch):
+
+        hole_count = self.layout.hole_count
         hole_offset = (DIMS_STUD_SPACING / 2) if self.offset else 0
 
+        # TODO: if/else render axle cross-section
+        # self._add_axle_hole_sketch(geometries, constraints, hole_offset + (i * DIMS_STUD_SPACING))
+        add_circle_to_sketch(sketch, DIMS_TECHNIC_HOLE_INNER_RADIUS, hole_offset,
+                             DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, False)
+        self.doc.solve(sketch)
+
+        # create array if needed
+        if hole_count > 1:
+            geometry_indices = [range(0, len(sketch.Geometry) - 1)]
+            sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False, hole_count, 1, True)
+
+    @profiled("HolesRenderer._render_holes")
+    def _render_holes(self):
+        log.debug("render_holes()")
+
         # holes pad with cross-section meeting inside of body
 
         holes_pad_sketch = self.brick.newObject("Sketcher::SketchObject", "holes_pad_sketch")
-        holes_pad_sketch.AttachmentSupport = (self.front_inside_datum_plane, '')
+        holes_pad_sketch.AttachmentSupport = (self.context.datum_plane("front_inside_datum_plane"), '')
         holes_pad_sketch.MapMode = 'FlatFace'
 
-        geometries = []
-        constraints = []
-
         # add top_inside_datum_plane to sketch as an edge so that it can be referenced
         # this will add a line geometry element to the sketch as item 0
-        holes_pad_sketch.addExternal(self.top_inside_datum_plane.Label, '')
+        holes_pad_sketch.addExternal(self.context.datum_plane("top_inside_datum_plane").Label, '')
 
-        for i in range(0, hole_count):
-            self._add_technic_surround(geometries, constraints, hole_offset + (i * DIMS_STUD_SPACING))
-
-        holes_pad_sketch.addGeometry(geometries, False)
-        holes_pad_sketch.addConstraint(constraints)
+        self._fill_holes_pad_sketch(holes_pad_sketch)
 
         holes_pad = self.brick.newObject("PartDesign::Pad", "holes_pad")
         holes_pad.Type = PAD_TYPE_UP_TO_FACE
-        holes_pad.UpToFace = (self.back_inside_datum_plane, [""])
+        holes_pad.UpToFace = (self.context.datum_plane("back_inside_datum_plane"), [""])
         holes_pad.Profile = holes_pad_sketch
 
         holes_pad.Reversed = True
         self.doc.recompute()
-        holes_pad_sketch.ViewObject.Visibility = False
+        set_visibility(holes_pad_sketch, False)
 
         # holes pocket
 
         holes_pocket_sketch = self.brick.newObject("Sketcher::SketchObject", "holes_pocket_sketch")
-        holes_pocket_sketch.AttachmentSupport = (self.front_datum_plane, '')
+        holes_pocket_sketch.AttachmentSupport = (self.context.datum_plane("front_datum_plane"), '')
         holes_pocket_sketch.MapMode = 'FlatFace'
 
-        # TODO: if/else render axle cross-section
-        # self._add_axle_hole_sketch(geometries, constraints, hole_offset + (i * DIMS_STUD_SPACING))
-        add_circle_to_sketch(holes_pocket_sketch, DIMS_TECHNIC_HOLE_INNER_RADIUS, hole_offset,
-                             DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, False)
-        self.doc.recompute()
-
-        # create array if needed
-        if hole_count > 1:
-            geometry_indices = [range(0, len(holes_pocket_sketch.Geometry) - 1)]
-            holes_pocket_sketch.addRectangularArray(geometry_indices,
-                                                    Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                    hole_count, 1, True)
-
-        holes_pocket = self.brick.newObject("PartDesign::Pocket", "holes_pocket")
-        holes_pocket.Type = POCKET_TYPE_THROUGH_ALL
-        holes_pocket.Profile = holes_pocket_sketch
-
-        self.doc.recompute()
-        holes_pocket_sketch.ViewObject.Visibility = False
+        self._fill_holes_pocket_sketch(holes_pocket_sketch)
 
         if self.style == HoleStyle.HOLE:
 
-            # counterbore pocket
+            # through hole and counterbore from the same sketch in a single hole feature
 
-            holes_counterbore_pocket_sketch = self.brick.newObject("Sketcher::SketchObject",
-                                                                   "holes_counterbore_pocket_sketch")
-            holes_counterbore_pocket_sketch.AttachmentSupport = (holes_pocket_sketch, '')
-            holes_counterbore_pocket_sketch.MapMode = 'ObjectXY'
-
-            add_circle_to_sketch(holes_counterbore_pocket_sketch, DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS, hole_offset,
-                                 DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, False)
-            self.doc.recompute()
-
-            # create array if needed
-            if hole_count > 1:
-                geometry_indices = [range(0, len(holes_pocket_sketch.Geometry) - 1)]
-                holes_counterbore_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                    Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                    hole_count, 1, True)
-
-            holes_counterbore_pocket = self.brick.newObject("PartDesign::Pocket", "holes_counterbore_pocket")
-            holes_counterbore_pocket.Type = POCKET_TYPE_DIMENSION
-            holes_counterbore_pocket.Profile = holes_counterbore_pocket_sketch
-            holes_counterbore_pocket.Length = DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH
+            holes_counterbore_hole = self.brick.newObject("PartDesign::Hole", "holes_counterbore_hole")
+            holes_counterbore_hole.Profile = holes_pocket_sketch
+            holes_counterbore_hole.Diameter = 2 * DIMS_TECHNIC_HOLE_INNER_RADIUS
+            holes_counterbore_hole.DepthType = "ThroughAll"
+            holes_counterbore_hole.HoleCutType = "Counterbore"
+            holes_counterbore_hole.HoleCutDiameter = 2 * DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS
+            holes_counterbore_hole.HoleCutDepth = DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH
+            holes_counterbore_hole.DrillPoint = "Flat"
 
             self.doc.recompute()
+            set_visibility(holes_pocket_sketch, False)
 
             # counterbore mirror
 
             # do not use self.brick.newObject("PartDesign::Mirrored", "Mirrored") here as the
             # brick.Tip will not be updated
             holes_counterbore_mirror = self.doc.addObject("PartDesign::Mirrored", "Mirrored")
-            holes_counterbore_mirror.Originals = [holes_counterbore_pocket]
-            holes_counterbore_mirror.MirrorPlane = (self.depth_mirror_datum_plane, [""])
+            holes_counterbore_mirror.Originals = [holes_counterbore_hole]
+            holes_counterbore_mirror.MirrorPlane = (self.context.datum_plane("depth_mirror_datum_plane"), [""])
             self.brick.addObject(holes_counterbore_mirror)
 
             self.doc.recompute()
 
-            # fillet the outer hole of counterbore
-            # NOTE: looks like no filleting required on lower hole of counterbore
+        else:
 
-            edge_names = get_circle_edge_names(self.front_datum_plane, True, 0, holes_counterbore_mirror,
-                                               DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS)
-
-            edge_names.extend(get_circle_edge_names(self.front_datum_plane, False, DIMS_STUD_SPACING
-                                                    + ((self.depth - 1) * DIMS_STUD_SPACING),
-                                                    holes_counterbore_mirror, DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS))
-
-            hole_counterbore_fillets = self.brick.newObject("PartDesign::Fillet", "hole_counterbore_fillets")
-            hole_counterbore_fillets.Radius = DIMS_EDGE_FILLET
-            hole_counterbore_fillets.Base = (holes_counterbore_mirror, edge_names)
+            holes_pocket = self.brick.newObject("PartDesign::Pocket", "holes_pocket")
+            holes_pocket.Type = POCKET_TYPE_THROUGH_ALL
+            holes_pocket.Profile = holes_pocket_sketch
 
             self.doc.recompute()
+            set_visibility(holes_pocket_sketch, False)
 
-            holes_counterbore_pocket_sketch.ViewObject.Visibility = False
-
-    def render(self, context):
-        Console.PrintMessage("render\n")
+    def _setup(self, context):
 
         self.doc = context.doc
         self.brick = context.brick
+        self.context = context
 
         self.width = context.width
         self.depth = context.depth
         self.style = context.hole_style
         self.offset = context.holes_offset
 
-        self.front_datum_plane = context.front_datum_plane
-        self.front_inside_datum_plane = context.front_inside_datum_plane
-        self.back_inside_datum_plane = context.back_inside_datum_plane
-        self.depth_mirror_datum_plane = context.depth_mirror_datum_plane
-        self.top_inside_datum_plane = context.top_inside_datum_plane
+        self.detail = context.detail
+        self.layout = context.layout
+
+    @profiled("HolesRenderer.render")
+    def render(self, context):
+        log.debug("render")
+
+        self._setup(context)
 
         self._render_holes()
+
+    @profiled("HolesRenderer.update")
+    def update(self, context):
+        log.debug("update")
+
+        self._setup(context)
+
+        # the same sketches with the holes of the new width
+        refill_sketch(context.stage_object("holes_pad_sketch"), self._fill_holes_pad_sketch)
+        refill_sketch(context.stage_object("holes_pocket_sketch"), self._fill_holes_pocket_sketch)
+
+    @profiled("HolesRenderer.render_fillets")
+    def render_fillets(self, context):
+        log.debug("render_fillets")
+
+        self._setup(context)
+
+        # fillet the outer hole of counterbore
+        # NOTE: looks like no filleting required on lower hole of counterbore
+        self.doc.recompute(shape_required=True)
+
+        holes = self.brick.Tip
+
+        # both lookups are on the same shape so share the index
+        edge_index = EdgeIndex(holes.Shape)
+
+        front_datum_plane = self.context.datum_plane("front_datum_plane")
+
+        edge_names = get_circle_edge_names(front_datum_plane, True, 0, holes, DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS,
+                                           edge_index)
+
+        edge_names.extend(get_circle_edge_names(front_datum_plane, False, DIMS_STUD_SPACING
+                                                + ((self.depth - 1) * DIMS_STUD_SPACING),
+                                                holes, DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS, edge_index))
+
+        if len(edge_names) > 0:
+            hole_counterbore_fillets = self.brick.newObject("PartDesign::Fillet", "hole_counterbore_fillets")
+            hole_counterbore_fillets.Radius = DIMS_EDGE_FILLET
+            hole_counterbore_fillets.Base = (holes, edge_names)
+
+            self.doc.recompute()
@@ -0,0 +1,194 @@
+# coding: UTF-8
+
+from functools import lru_cache
+import numpy
+from Legify.Dimensions import *
+from Legify.Log import *
+from Legify.Spec import *
+
+LAYOUT_CACHE_SIZE = 256
+
+# (outward direction, whether the side runs along the width) for each side of the brick
+LAYOUT_SIDES = {
+    "front": ((0, -1, 0), True),
+    "back": ((0, 1, 0), True),
+    "left": ((-1, 0, 0), False),
+    "right": ((1, 0, 0), False)
+}
+
+
+def _frozen(array):
+
+    # layouts are shared by every renderer of the same brick so they must not be modified
+    array.flags.writeable = False
+    return array
+
+
+def _offsets(count, start=0):
+    return _frozen(start + (numpy.arange(count) * DIMS_STUD_SPACING))
+
+
+def _grid(width_count, depth_count, width_offset=0, depth_offset=0):
+
+    # N x 2 centres ordered width first, as the nested loops over width and depth did
+    x, y = numpy.meshgrid(width_offset + (numpy.arange(width_count) * DIMS_STUD_SPACING),
+                          depth_offset + (numpy.arange(depth_count) * DIMS_STUD_SPACING), indexing="ij")
+    return _frozen(numpy.column_stack((x.ravel(), y.ravel())))
+
+
+def rib_indices(count):
+
+    # every second tube/stick, centred on the brick
+    if count % 2 == 0:
+        return _frozen(numpy.arange(2, count, 2))
+
+    middle = (count - 1) // 2
+    return _frozen(numpy.concatenate((numpy.arange(middle, 0, -2), numpy.arange(middle + 1, count, 2))))
+
+
+def rib_centres(indices):
+
+    # a rib at index i runs between stud i - 1 and stud i
+    return _frozen((indices - 0.5) * DIMS_STUD_SPACING)
+
+
+class BrickLayout:
+
+    # positions are in the brick coordinate system: the centre of the first stud is at the origin of the XY plane
+
+    def __init__(self, spec):
+        log.debug("BrickLayout({0}x{1}x{2})", spec.width, spec.depth, spec.height)
+
+        self.width = spec.width
+        self.depth = spec.depth
+        self.height = spec.height
+
+        self.outer_offset = (DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION
+
+        # body
+
+        self.side_ribs = self.height > 2 and self.depth > 1 and self.width > 1
+        self.side_rib_width_offsets = _offsets(self.width)
+        self.side_rib_depth_offsets = _offsets(self.depth)
+
+        # tubes and sticks, ribs are also subject to the level of detail
+
+        self.tubes = self.depth > 1 and self.width > 1
+        self.tube_ribs = self.tubes and self.height > 1 and (self.depth > 2 or self.width > 2)
+        self.sticks = not self.tubes and (self.depth > 1 or self.width > 1)
+        self.stick_ribs = self.sticks and self.height > 1 and not spec.hole_style == HoleStyle.HOLE
+
+        if self.tubes:
+            self.tube_centres = _grid(self.width - 1, self.depth - 1, DIMS_STUD_SPACING / 2, DIMS_STUD_SPACING / 2)
+        else:
+            self.tube_centres = _grid(0, 0)
+
+        # ribs along the depth at these width indices and along the width at these depth indices
+        self.tube_rib_width_indices = rib_indices(self.width) if self.width > 2 else _frozen(numpy.arange(0))
+        self.tube_rib_depth_indices = rib_indices(self.depth) if self.depth > 2 else _frozen(numpy.arange(0))
+
+        # sticks run along the width unless the brick is only one stud wide
+        self.sticks_along_width = self.width > 1
+        studs = self.width if self.sticks_along_width else self.depth
+
+        if self.sticks:
+            offsets = _offsets(studs - 1, DIMS_STUD_SPACING / 2)
+            zeros = numpy.zeros(studs - 1)
+            if self.sticks_along_width:
+                self.stick_centres = _frozen(numpy.column_stack((offsets, zeros)))
+            else:
+                self.stick_centres = _frozen(numpy.column_stack((zeros, offsets)))
+        else:
+            self.stick_centres = _grid(0, 0)
+
+        # for stud count between from 2 to 4 each stick has rib, otherwise every second
+        self.stick_rib_indices = _frozen(numpy.arange(1, studs)) if studs < 5 else rib_indices(studs)
+
+        # top studs
+
+        self.top_studs_style = spec.top_studs_style
+
+        if spec.top_studs_style == TopStudStyle.NONE:
+            self.top_studs_offset = (0, 0)
+            self.top_stud_centres = _grid(0, 0)
+        else:
+            self.top_studs_offset = ((self.width - spec.top_studs_width_count) * DIMS_STUD_SPACING / 2,
+                                     (self.depth - spec.top_studs_depth_count) * DIMS_STUD_SPACING / 2)
+            self.top_stud_centres = _grid(spec.top_studs_width_count, spec.top_studs_depth_count,
+                                          self.top_studs_offset[0], self.top_studs_offset[1])
+
+        # Only render inner pocket if closed studs AND studs are not offset
+        self.top_studs_inside = spec.top_studs_style == TopStudStyle.CLOSED and self.top_studs_offset == (0, 0)
+        self.top_stud_inside_centres = _grid(self.width, self.depth) if self.top_studs_inside else _grid(0, 0)
+
+        # side studs and pins
+
+        self.side_stud_sides = self._sides(spec.side_studs_style != SideStudStyle.NONE, spec.side_studs_front,
+                                           spec.side_studs_back, spec.side_studs_left, spec.side_studs_right)
+        self.side_stud_counts = self._counts(self.side_stud_sides, False)
+        self.side_stud_positions = self._positions(self.side_stud_counts, False, DIMS_SIDE_STUD_CENTRE_HEIGHT)
+
+        self.pins_offset = bool(spec.pins_offset)
+        self.pin_sides = self._sides(spec.pins_style != PinStyle.NONE, spec.pins_front, spec.pins_back,
+                                     spec.pins_left, spec.pins_right)
+        self.pin_counts = self._counts(self.pin_sides, self.pins_offset)
+        self.pin_positions = self._positions(self.pin_counts, self.pins_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT)
+
+        # technic holes run from front to back
+
+        self.holes_offset = bool(spec.holes_offset)
+
+        if spec.hole_style == HoleStyle.NONE:
+            self.hole_count = 0
+        else:
+            self.hole_count = (self.width - 1) if self.holes_offset else self.width
+
+        self.hole_width_offsets = _offsets(self.hole_count, (DIMS_STUD_SPACING / 2) if self.holes_offset else 0)
+
+    @staticmethod
+    def _sides(enabled, front, back, left, right):
+
+        if not enabled:
+            return []
+
+        return [side for side, present in (("front", front), ("back", back), ("left", left), ("right", right))
+                if present]
+
+    def _counts(self, sides, offset):
+
+        # each side has its own count: front and back along the width, left and right along the depth
+        counts = {}
+        for side in sides:
+            count = self.width if LAYOUT_SIDES[side][1] else self.depth
+            counts[side] = (count - 1) if offset else count
+        return counts
+
+    def _positions(self, counts, offset, height):
+
+        start = (DIMS_STUD_SPACING / 2) if offset else 0
+        far_width = ((self.width - 1) * DIMS_STUD_SPACING) + self.outer_offset
+        far_depth = ((self.depth - 1) * DIMS_STUD_SPACING) + self.outer_offset
+
+        # side => (N x 3 base points on the outside of the side, outward direction)
+        positions = {}
+        for side, count in counts.items():
+            direction, along_width = LAYOUT_SIDES[side]
+
+            bases = numpy.empty((count, 3))
+            bases[:, 2] = height
+            if along_width:
+                bases[:, 0] = start + (numpy.arange(count) * DIMS_STUD_SPACING)
+                bases[:, 1] = -1 * self.outer_offset if side == "front" else far_depth
+            else:
+                bases[:, 0] = -1 * self.outer_offset if side == "left" else far_width
+                bases[:, 1] = start + (numpy.arange(count) * DIMS_STUD_SPACING)
+
+            positions[side] = (_frozen(bases), direction)
+        return positions
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def brick_layout(spec):
+
+    # specs are normalized so every renderer of an equal brick shares one layout
+    return BrickLayout(spec)
@@ -0,0 +1,91 @@
+# coding: UTF-8
+
+from FreeCAD import Console
+
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+LOG_SILENT = 100
+
+
+class Logger:
+
+    def __init__(self, level=LOG_INFO, buffered=False, buffer_size=500):
+
+        self.level = level
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+
+        self.buffer = []
+
+    def configure(self, level=None, buffered=None):
+
+        # flush anything written under the previous configuration
+        self.flush()
+
+        if level is not None:
+            self.level = level
+        if buffered is not None:
+            self.buffered = buffered
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def debug(self, message, *args):
+        if LOG_DEBUG >= self.level:
+            self._write(LOG_DEBUG, message, args)
+
+    def info(self, message, *args):
+        if LOG_INFO >= self.level:
+            self._write(LOG_INFO, message, args)
+
+    def warning(self, message, *args):
+        if LOG_WARNING >= self.level:
+            self._write(LOG_WARNING, message, args)
+
+    def error(self, message, *args):
+        if LOG_ERROR >= self.level:
+            self._write(LOG_ERROR, message, args)
+
+            # errors are never left sitting in the buffer
+            self.flush()
+
+    def _write(self, level, message, args):
+
+        # arguments are only formatted once the level is known to be enabled
+        text = (message.format(*args) if args else message) + "\n"
+
+        if not self.buffered:
+            self._print(level, text)
+            return
+
+        self.buffer.append((level, text))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+
+        # consecutive messages of the same level are printed in one call
+        start = 0
+        for i in range(1, len(self.buffer) + 1):
+            if i == len(self.buffer) or self.buffer[i][0] != self.buffer[start][0]:
+                self._print(self.buffer[start][0], "".join(text for level, text in self.buffer[start:i]))
+                start = i
+
+        self.buffer = []
+
+    @staticmethod
+    def _print(level, text):
+
+        if level >= LOG_ERROR:
+            Console.PrintError(text)
+        elif level >= LOG_WARNING:
+            Console.PrintWarning(text)
+        elif level >= LOG_INFO:
+            Console.PrintMessage(text)
+        else:
+            Console.PrintLog(text)
+
+
+log = Logger()
@@ -1,6 +1,6 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Placement, Rotation, Vector
+from FreeCAD import Placement, Rotation, Vector
 from Legify.Common import *
 import Part
 import Sketcher
@@ -9,10 +9,11 @@ import Sketcher
 class PinsRenderer:
 
     def __init__(self):
-        Console.PrintMessage("PinsRenderer\n")
+        log.debug("PinsRenderer")
 
         self.doc = None
         self.brick = None
+        self.context = None
 
         self.width = None
         self.depth = None
@@ -23,80 +24,93 @@ class PinsRenderer:
         self.right = None
         self.pins_offset = None
 
-        self.front_datum_plane = None
-        self.back_datum_plane = None
-        self.left_datum_plane = None
-        self.right_datum_plane = None
+        self.layout = None
 
-    def _render_linear_pattern(self, label, features, count):
-        Console.PrintMessage("_render_linear_pattern({}, {})\n".format(label, count))
+    def _pin_offsets(self, backwards):
 
-        # do not use self.brick.newObject("PartDesign::LinearPattern", label + "_pin_linear_pattern") here as the
-        # brick.Tip will not be updated
-        pin_linear_pattern = self.doc.addObject("PartDesign::LinearPattern", label + "_pin_linear_pattern")
+        # (offset of the first pin along the side, offset of its tip from the side)
+        pin_tip_offset = DIMS_PIN_LENGTH
+        if backwards:
+            pin_tip_offset *= -1
 
-        pin_linear_pattern.Originals = features
-        pin_linear_pattern.Direction = (features[0].Profile[0], ['N_Axis'])
-        pin_linear_pattern.Length = DIMS_STUD_SPACING * (count - 1)
-        pin_linear_pattern.Occurrences = count
-        if label == 'back' or label == 'left':
-            pin_linear_pattern.Reversed = True
-        self.brick.addObject(pin_linear_pattern)
+        start = (DIMS_STUD_SPACING / 2) if self.pins_offset else 0
 
-        self.doc.recompute()
+        return start, pin_tip_offset
 
-    def _render_pins(self, label, base_plane, backwards, count):
-        Console.PrintMessage("_render_pins({},{},{})\n".format(label, backwards, count))
+    def _render_pin_datum_line(self, label, base_plane, x_offset, tip_offset):
 
         pin_base_datum_point = self.brick.newObject('PartDesign::Point',
                                                     'pin_base_{}_datum_point'.format(label))
         pin_base_datum_point.AttachmentSupport = [(base_plane, '')]
         pin_base_datum_point.MapMode = 'ObjectOrigin'
-        pin_base_datum_point.ViewObject.Visibility = False
-        if self.pins_offset:
-            pin_base_datum_point.AttachmentOffset = Placement(Vector(DIMS_STUD_SPACING / 2,
-                                                                     DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, 0),
-                                                              Rotation(0, 0, 0))
-        else:
-            pin_base_datum_point.AttachmentOffset = Placement(Vector(0, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, 0),
-                                                              Rotation(0, 0, 0))
-
-        pin_tip_offset = DIMS_PIN_LENGTH
-        if backwards:
-            pin_tip_offset *= -1
+        pin_base_datum_point.AttachmentOffset = Placement(Vector(x_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, 0),
+                                                          Rotation(0, 0, 0))
+        set_visibility(pin_base_datum_point, False)
 
         pin_tip_datum_point = self.brick.newObject('PartDesign::Point',
                                                    'pin_tip_{}_datum_point'.format(label))
         pin_tip_datum_point.AttachmentSupport = [(base_plane, '')]
         pin_tip_datum_point.MapMode = 'ObjectOrigin'
-        pin_tip_datum_point.ViewObject.Visibility = False
-        if self.pins_offset:
-            pin_tip_datum_point.AttachmentOffset = Placement(Vector(DIMS_STUD_SPACING / 2,
-                                                                    DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, pin_tip_offset),
-                                                             Rotation(0, 0, 0))
-        else:
-            pin_tip_datum_point.AttachmentOffset = Placement(Vector(0, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, pin_tip_offset),
-                                                             Rotation(0, 0, 0))
+        pin_tip_datum_point.AttachmentOffset = Placement(Vector(x_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT,
+                                                                tip_offset),
+                                                         Rotation(0, 0, 0))
+        set_visibility(pin_tip_datum_point, False)
 
         pin_datum_line = self.brick.newObject('PartDesign::Line', 'pin_{}_datum_line'.format(label))
         pin_datum_line.AttachmentSupport = [(pin_base_datum_point, ''), (pin_tip_datum_point, '')]
         pin_datum_line.MapMode = 'TwoPointLine'
-        pin_datum_line.ViewObject.Visibility = False
+        set_visibility(pin_datum_line, False)
+
+        return pin_datum_line
+
+    @profiled("PinsRenderer._render_pins")
+    def _render_pins(self, label, base_plane, backwards, count):
+        log.debug("_render_pins({},{},{})", label, backwards, count)
+
+        start, pin_tip_offset = self._pin_offsets(backwards)
+
+        # one datum line for the first pin, the rest of the row are copies of the same shared template along the
+        # X axis of the side plane, all in a single feature instead of a PartDesign::LinearPattern where the
+        # FreeCAD version allows (see render_pins)
+        datum_line = self._render_pin_datum_line(label, base_plane, start, pin_tip_offset)
+
+        render_pins(label, [datum_line], self.brick, self.doc, count, DIMS_STUD_SPACING, base_plane)
+
+    @profiled("PinsRenderer._update_pins")
+    def _update_pins(self, label, base_plane, backwards, count):
+        log.debug("_update_pins({},{},{})", label, backwards, count)
+
+        start, pin_tip_offset = self._pin_offsets(backwards)
+
+        # the datum points of the first pin are moved along the side, the side planes were already moved
+        pin_base_datum_point = self.context.stage_object('pin_base_{}_datum_point'.format(label))
+        pin_base_datum_point.AttachmentOffset = Placement(Vector(start, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT, 0),
+                                                          Rotation(0, 0, 0))
 
-        pin_features = render_pin(label, pin_datum_line, self.brick, self.doc)
+        pin_tip_datum_point = self.context.stage_object('pin_tip_{}_datum_point'.format(label))
+        pin_tip_datum_point.AttachmentOffset = Placement(Vector(start, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT,
+                                                                pin_tip_offset),
+                                                         Rotation(0, 0, 0))
 
-        if count > 1:
-            self._render_linear_pattern(label, pin_features, count)
+        datum_line = self.context.stage_object('pin_{}_datum_line'.format(label))
+
+        if pin_boolean_supported():
+            update_pins(label, self.context.stage_object(label + "_pin_shape"), [datum_line], count,
+                        DIMS_STUD_SPACING, base_plane)
+        else:
+            # the sketched pins follow the datum line, only the row length changes
+            update_pin_linear_pattern(self.context.stage_object(label + "_pin_linear_pattern"), count,
+                                      DIMS_STUD_SPACING)
 
     def _render_axles(self, label, backwards, count):
-        Console.PrintMessage("_render_axles({},{},{})\n".format(label, backwards, count))
+        log.debug("_render_axles({},{},{})", label, backwards, count)
         # TODO: implement axle pin
 
-    def render(self, context):
-        Console.PrintMessage("render\n")
+    def _setup(self, context):
 
         self.doc = context.doc
         self.brick = context.brick
+        self.context = context
 
         self.width = context.width
         self.depth = context.depth
@@ -107,34 +121,47 @@ class PinsRenderer:
         self.right = context.pins_right
         self.pins_offset = context.pins_offset
 
-        self.front_datum_plane = context.front_datum_plane
-        self.back_datum_plane = context.back_datum_plane
-        self.left_datum_plane = context.left_datum_plane
-        self.right_datum_plane = context.right_datum_plane
+        self.layout = context.layout
 
-        if self.front or self.back:
-            count = self.width
-        else:
-            count = self.depth
+    def _sides(self):
+
+        # (side, datum plane name, whether the pins point backwards along the datum plane normal)
+        sides = [("front", "front_datum_plane", False), ("back", "back_datum_plane", True),
+                 ("left", "left_datum_plane", True), ("right", "right_datum_plane", False)]
+
+        return [side for side in sides if getattr(self, side[0])]
+
+    @profiled("PinsRenderer.render")
+    def render(self, context):
+        log.debug("render")
+
+        self._setup(context)
 
-        if self.pins_offset:
-            count = count - 1
+        # front and back have a pin per stud of the width, left and right per stud of the depth
+        counts = self.layout.pin_counts
 
         if self.style == PinStyle.PIN:
-            if self.front:
-                self._render_pins("front", self.front_datum_plane, False, count)
-            if self.back:
-                self._render_pins("back", self.back_datum_plane, True, count)
-            if self.left:
-                self._render_pins("left", self.left_datum_plane, True, count)
-            if self.right:
-                self._render_pins("right", self.right_datum_plane, False, count)
+            for side, plane_name, backwards in self._sides():
+                self._render_pins(side, self.context.datum_plane(plane_name), backwards, counts[side])
         else:
             if self.front:
-                self._render_axles("front", False, count)
+                self._render_axles("front", False, counts["front"])
             if self.back:
-                self._render_axles("back", True, count)
+                self._render_axles("back", True, counts["back"])
             if self.left:
-                self._render_axles("left", False, count)
+                self._render_axles("left", False, counts["left"])
             if self.right:
-                self._render_axles("right", True, count)
+                self._render_axles("right", True, counts["right"])
+
+    @profiled("PinsRenderer.update")
+    def update(self, context):
+        log.debug("update")
+
+        self._setup(context)
+
+        # the same datum lines and pin features with the number of pins along each side of the new width and depth
+        counts = self.layout.pin_counts
+
+        if self.style == PinStyle.PIN:
+            for side, plane_name, backwards in self._sides():
+                self._update_pins(side, self.context.datum_plane(plane_name), backwards, counts[side])
@@ -0,0 +1,115 @@
+# coding: UTF-8
+
+from contextlib import contextmanager
+import functools
+import json
+import time
+from Legify.Log import *
+
+
+class Profiler:
+
+    def __init__(self):
+        log.debug("Profiler")
+
+        self.records = []
+        self.depth = 0
+        self.start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, doc):
+
+        existing = set(obj.Name for obj in doc.Objects)
+        recompute_count = doc.recompute_count
+
+        record = {
+            "name": name,
+            "depth": self.depth,
+            "start": time.perf_counter() - self.start_time
+        }
+        self.records.append(record)
+
+        self.depth += 1
+        try:
+            yield record
+        finally:
+            self.depth -= 1
+
+            record["duration"] = time.perf_counter() - self.start_time - record["start"]
+            record["recomputes"] = doc.recompute_count - recompute_count
+
+            created = [obj for obj in doc.Objects if obj.Name not in existing]
+            record["objects_created"] = len(created)
+
+            # counts are taken from the last solid created by the stage, without forcing a recompute
+            record["faces"] = None
+            record["edges"] = None
+            for obj in reversed(created):
+                shape = getattr(obj, "Shape", None)
+                if shape is not None and not shape.isNull() and len(shape.Solids) > 0:
+                    record["faces"] = len(shape.Faces)
+                    record["edges"] = len(shape.Edges)
+                    break
+
+            log.info("Stage {0}: {1:.3f}s {2} recomputes {3} objects", name, record["duration"], record["recomputes"],
+                     record["objects_created"])
+
+    def report(self):
+        return {"stages": self.records}
+
+    def chrome_trace(self):
+
+        # complete events, loadable in chrome://tracing or Perfetto
+        events = []
+        for record in self.records:
+            events.append({
+                "name": record["name"],
+                "ph": "X",
+                "ts": record["start"] * 1e6,
+                "dur": record.get("duration", 0) * 1e6,
+                "pid": 1,
+                "tid": 1,
+                "args": {
+                    "recomputes": record.get("recomputes"),
+                    "objects_created": record.get("objects_created"),
+                    "faces": record.get("faces"),
+                    "edges": record.get("edges")
+                }
+            })
+        return {"traceEvents": events}
+
+    def write(self, path, chrome_trace=False):
+        log.debug("write({0}, {1})", path, chrome_trace)
+
+        with open(path, "w") as report_file:
+            json.dump(self.chrome_trace() if chrome_trace else self.report(), report_file, indent=2)
+
+
+def _find_profiled_doc(args):
+
+    # the document is passed directly (render_pin) or held by the renderer or context as .doc
+    for arg in args:
+        for candidate in (arg, getattr(arg, "doc", None)):
+            if getattr(candidate, "profiler", None) is not None:
+                return candidate
+    return None
+
+
+def profiled(name):
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+
+            doc = _find_profiled_doc(list(args) + list(kwargs.values()))
+
+            if doc is None:
+                return function(*args, **kwargs)
+
+            with doc.profiler.stage(name, doc):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,16 +1,17 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Vector
+from FreeCAD import Vector
 from Legify.Common import *
 
 
 class SideStudsRenderer:
 
     def __init__(self):
-        Console.PrintMessage("SideStudsRenderer\n")
+        log.debug("SideStudsRenderer")
 
         self.doc = None
         self.brick = None
+        self.context = None
 
         self.width = None
         self.depth = None
@@ -20,13 +21,39 @@ class SideStudsRenderer:
         self.left = None
         self.right = None
 
-        self.front_datum_plane = None
-        self.back_datum_plane = None
-        self.left_datum_plane = None
-        self.right_datum_plane = None
+        self.detail = None
+        self.layout = None
 
+    def _fill_side_studs_outside_pad_sketch(self, sketch, count):
+
+        add_circle_to_sketch(sketch, DIMS_STUD_OUTER_RADIUS, 0, DIMS_SIDE_STUD_CENTRE_HEIGHT, True)
+
+        # the inside in the same sketch so that a single pad renders hollow studs, as for open top studs
+        add_inner_circle_with_flats_to_sketch(sketch, DIMS_STUD_OUTER_RADIUS,
+                                              DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
+                                              0, DIMS_SIDE_STUD_CENTRE_HEIGHT)
+        self.doc.solve(sketch)
+
+        # create array if needed
+        if count > 1:
+            geometry_indices = list(range(0, len(sketch.Geometry)))
+            sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False, count, 1, True)
+
+    def _fill_side_studs_pocket_sketch(self, sketch, count):
+
+        add_inner_circle_with_flats_to_sketch(sketch, DIMS_STUD_OUTER_RADIUS,
+                                              DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
+                                              0, DIMS_SIDE_STUD_CENTRE_HEIGHT)
+        self.doc.solve(sketch)
+
+        # create array if needed
+        if count > 1:
+            geometry_indices = [range(0, len(sketch.Geometry) - 1)]
+            sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False, count, 1, True)
+
+    @profiled("SideStudsRenderer._render_side_studs_outside")
     def _render_side_studs_outside(self, label, plane, count, inverted):
-        Console.PrintMessage("render_side_studs_outside({},{},{})\n".format(label, count, inverted))
+        log.debug("render_side_studs_outside({},{},{})", label, count, inverted)
 
         # side studs outside pad
 
@@ -35,17 +62,7 @@ class SideStudsRenderer:
         side_studs_outside_pad_sketch.AttachmentSupport = (plane, '')
         side_studs_outside_pad_sketch.MapMode = 'FlatFace'
 
-        add_circle_to_sketch(side_studs_outside_pad_sketch, DIMS_STUD_OUTER_RADIUS, 0,
-                             DIMS_SIDE_STUD_CENTRE_HEIGHT, True)
-
-        self.doc.recompute()
-
-        # create array if needed
-        if count > 1:
-            geometry_indices = [range(0, len(side_studs_outside_pad_sketch.Geometry) - 1)]
-            side_studs_outside_pad_sketch.addRectangularArray(geometry_indices,
-                                                              Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                              count, 1, True)
+        self._fill_side_studs_outside_pad_sketch(side_studs_outside_pad_sketch, count)
         self.doc.recompute()
 
         side_studs_outside_pad = self.brick.newObject("PartDesign::Pad", label + "_side_studs_outside_pad")
@@ -55,55 +72,11 @@ class SideStudsRenderer:
         side_studs_outside_pad.Reversed = False if inverted else True
 
         self.doc.recompute()
+        set_visibility(side_studs_outside_pad_sketch, False)
 
-        side_studs_outside_pad_sketch.ViewObject.Visibility = False
-
-        # determine the stud outer edges
-        edge_names = get_arc_edge_names(plane, inverted, DIMS_STUD_HEIGHT, side_studs_outside_pad,
-                                        DIMS_STUD_OUTER_RADIUS)
-
-        if len(edge_names) > 0:
-
-            # side studs outer fillet
-            side_stud_outer_fillets = self.brick.newObject("PartDesign::Fillet", label + "_side_stud_outer_fillets")
-            side_stud_outer_fillets.Radius = DIMS_STUD_FILLET
-            side_stud_outer_fillets.Base = (side_studs_outside_pad, edge_names)
-
-            self.doc.recompute()
-
-        # side studs outside pocket
-
-        side_studs_outside_pocket_sketch = self.brick.newObject("Sketcher::SketchObject",
-                                                                label + "_side_studs_outside_pocket_sketch")
-        side_studs_outside_pocket_sketch.AttachmentSupport = (plane, '')
-        side_studs_outside_pocket_sketch.MapMode = 'FlatFace'
-
-        add_inner_circle_with_flats_to_sketch(side_studs_outside_pocket_sketch, DIMS_STUD_OUTER_RADIUS,
-                                              DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
-                                              0, DIMS_SIDE_STUD_CENTRE_HEIGHT)
-        self.doc.recompute()
-
-        # create array if needed
-        if count > 1:
-            geometry_indices = [range(0, len(side_studs_outside_pocket_sketch.Geometry) - 1)]
-            side_studs_outside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                 Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                 count, 1, True)
-        self.doc.recompute()
-
-        side_studs_outside_pocket = self.brick.newObject("PartDesign::Pocket",
-                                                         label + "_side_studs_outside_pocket")
-        side_studs_outside_pocket.Type = PAD_TYPE_DIMENSION
-        side_studs_outside_pocket.Profile = side_studs_outside_pocket_sketch
-        side_studs_outside_pocket.Length = DIMS_STUD_HEIGHT
-        side_studs_outside_pocket.Reversed = True if inverted else False
-
-        self.doc.recompute()
-
-        side_studs_outside_pocket_sketch.ViewObject.Visibility = False
-
+    @profiled("SideStudsRenderer._render_side_studs_inside")
     def _render_side_studs_inside(self, label, plane, count, inverted):
-        Console.PrintMessage("render_side_studs_inside({},{})\n".format(label, count))
+        log.debug("render_side_studs_inside({},{})", label, count)
 
         # side studs pocket
 
@@ -112,17 +85,7 @@ class SideStudsRenderer:
         side_studs_inside_pocket_sketch.AttachmentSupport = (plane, '')
         side_studs_inside_pocket_sketch.MapMode = 'FlatFace'
 
-        add_inner_circle_with_flats_to_sketch(side_studs_inside_pocket_sketch, DIMS_STUD_OUTER_RADIUS,
-                                              DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
-                                              0, DIMS_SIDE_STUD_CENTRE_HEIGHT)
-        self.doc.recompute()
-
-        # create array if needed
-        if count > 1:
-            geometry_indices = [range(0, len(side_studs_inside_pocket_sketch.Geometry) - 1)]
-            side_studs_inside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                count, 1, True)
+        self._fill_side_studs_pocket_sketch(side_studs_inside_pocket_sketch, count)
         self.doc.recompute()
 
         side_studs_inside_pocket = self.brick.newObject("PartDesign::Pocket", label + "_side_studs_inside_pocket")
@@ -132,13 +95,13 @@ class SideStudsRenderer:
         side_studs_inside_pocket.Length = DIMS_RIBBED_SIDE_THICKNESS + DIMS_STUD_INSIDE_HOLE_TOP_OFFSET
 
         self.doc.recompute()
-        side_studs_inside_pocket_sketch.ViewObject.Visibility = False
+        set_visibility(side_studs_inside_pocket_sketch, False)
 
-    def render(self, context):
-        Console.PrintMessage("render\n")
+    def _setup(self, context):
 
         self.doc = context.doc
         self.brick = context.brick
+        self.context = context
 
         self.width = context.width
         self.depth = context.depth
@@ -148,27 +111,70 @@ class SideStudsRenderer:
         self.left = context.side_studs_left
         self.right = context.side_studs_right
 
-        self.front_datum_plane = context.front_datum_plane
-        self.back_datum_plane = context.back_datum_plane
-        self.left_datum_plane = context.left_datum_plane
-        self.right_datum_plane = context.right_datum_plane
+        self.detail = context.detail
+        self.layout = context.layout
 
-        if self.front:
-            self._render_side_studs_outside("front", self.front_datum_plane, self.width, True)
-            if self.style == SideStudStyle.HOLE:
-                self._render_side_studs_inside("front", self.front_datum_plane, self.width, False)
+    def _sides(self):
 
-        if self.back:
-            self._render_side_studs_outside("back", self.back_datum_plane, self.width, False)
-            if self.style == SideStudStyle.HOLE:
-                self._render_side_studs_inside("back", self.back_datum_plane, self.width, True)
+        # (side, datum plane name, whether the side faces along its datum plane normal)
+        sides = [("front", "front_datum_plane", True), ("back", "back_datum_plane", False),
+                 ("left", "left_datum_plane", False), ("right", "right_datum_plane", True)]
+
+        return [side for side in sides if getattr(self, side[0])]
+
+    @profiled("SideStudsRenderer.render")
+    def render(self, context):
+        log.debug("render")
+
+        self._setup(context)
+
+        counts = self.layout.side_stud_counts
 
-        if self.left:
-            self._render_side_studs_outside("left", self.left_datum_plane, self.depth, False)
+        for side, plane_name, inverted in self._sides():
+            plane = self.context.datum_plane(plane_name)
+            self._render_side_studs_outside(side, plane, counts[side], inverted)
             if self.style == SideStudStyle.HOLE:
-                self._render_side_studs_inside("left", self.left_datum_plane, self.depth, True)
+                self._render_side_studs_inside(side, plane, counts[side], not inverted)
+
+    @profiled("SideStudsRenderer.update")
+    def update(self, context):
+        log.debug("update")
+
+        self._setup(context)
 
-        if self.right:
-            self._render_side_studs_outside("right", self.right_datum_plane, self.depth, True)
+        # the same sketches with the number of studs along each side of the new width and depth
+        counts = self.layout.side_stud_counts
+
+        for side, plane_name, inverted in self._sides():
+            count = counts[side]
+            refill_sketch(context.stage_object(side + "_side_studs_outside_pad_sketch"),
+                          lambda sketch: self._fill_side_studs_outside_pad_sketch(sketch, count))
             if self.style == SideStudStyle.HOLE:
-                self._render_side_studs_inside("right", self.right_datum_plane, self.depth, False)
+                refill_sketch(context.stage_object(side + "_side_studs_inside_pocket_sketch"),
+                              lambda sketch: self._fill_side_studs_pocket_sketch(sketch, count))
+
+    @profiled("SideStudsRenderer.render_fillets")
+    def render_fillets(self, context):
+        log.debug("render_fillets")
+
+        self._setup(context)
+
+        # the stud outer edges on every side in a single fillet
+        self.doc.recompute(shape_required=True)
+
+        studs = self.brick.Tip
+        edge_index = EdgeIndex(studs.Shape)
+
+        edge_names = []
+        for side, plane_name, inverted in self._sides():
+            edge_names.extend(get_arc_edge_names(self.context.datum_plane(plane_name), inverted, DIMS_STUD_HEIGHT,
+                                                 studs, DIMS_STUD_OUTER_RADIUS, edge_index))
+
+        if len(edge_names) > 0:
+
+            # side studs outer fillet
+            side_stud_outer_fillets = self.brick.newObject("PartDesign::Fillet", "side_stud_outer_fillets")
+            side_stud_outer_fillets.Radius = DIMS_STUD_FILLET
+            side_stud_outer_fillets.Base = (studs, edge_names)
+
+            self.doc.recompute()
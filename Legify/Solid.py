@@ -0,0 +1,339 @@
+# coding: UTF-8
+
+from FreeCAD import Placement, Rotation, Vector, activeDocument
+import itertools
+import Part
+from Legify.Brick import *
+from Legify.Common import *
+from Legify.Layout import *
+
+SOLID_BOOLEAN_CHUNK_SIZE = 16
+
+
+class SolidBrickRenderer(BrickRenderer):
+
+    @staticmethod
+    def _make_flats(radius, flat_distance, length, base, direction):
+
+        # circle with four flats on the diagonals (see add_inner_circle_with_flats_to_sketch)
+        cylinder = Part.makeCylinder(radius, length)
+        square = Part.makeBox(2 * flat_distance, 2 * flat_distance, length,
+                              Vector(-1 * flat_distance, -1 * flat_distance, 0))
+        square.rotate(Vector(0, 0, 0), Vector(0, 0, 1), 45)
+
+        flats = cylinder.common(square)
+        flats.Placement = Placement(base, Rotation(Vector(0, 0, 1), direction))
+        return flats
+
+    def _make_rib(self, centre, thickness, bottom_offset, along_depth):
+
+        inside_offset = (DIMS_STUD_SPACING / 2) - DIMS_RIBBED_SIDE_THICKNESS - DIMS_BRICK_OUTER_REDUCTION
+        top_inside = (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS
+
+        fillet_radius = thickness / 2
+        fillet_height = bottom_offset + fillet_radius
+
+        if along_depth:
+            length = ((self.depth - 1) * DIMS_STUD_SPACING) + (2 * inside_offset)
+            block = Part.makeBox(thickness, length, top_inside - fillet_height,
+                                 Vector(centre - fillet_radius, -1 * inside_offset, fillet_height))
+            fillet = Part.makeCylinder(fillet_radius, length, Vector(centre, -1 * inside_offset, fillet_height),
+                                       Vector(0, 1, 0))
+        else:
+            length = ((self.width - 1) * DIMS_STUD_SPACING) + (2 * inside_offset)
+            block = Part.makeBox(length, thickness, top_inside - fillet_height,
+                                 Vector(-1 * inside_offset, centre - fillet_radius, fillet_height))
+            fillet = Part.makeCylinder(fillet_radius, length, Vector(-1 * inside_offset, centre, fillet_height),
+                                       Vector(1, 0, 0))
+
+        return block.fuse(fillet)
+
+    @staticmethod
+    def _boolean_steps(shape, tools, cut=False):
+
+        # tools are made and applied a chunk at a time, yielding in between, so that no single step of a large brick
+        # blocks the caller for long
+        tools = iter(tools)
+
+        while True:
+            chunk = list(itertools.islice(tools, SOLID_BOOLEAN_CHUNK_SIZE))
+            if not chunk:
+                return shape
+
+            shape = shape.cut(chunk) if cut else shape.fuse(chunk)
+            yield None
+
+    def _make_body(self):
+        log.debug("_make_body()")
+
+        outer_offset = (DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION
+        top_inside = (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS
+
+        body = Part.makeBox((self.width * DIMS_STUD_SPACING) - (2 * DIMS_BRICK_OUTER_REDUCTION),
+                            (self.depth * DIMS_STUD_SPACING) - (2 * DIMS_BRICK_OUTER_REDUCTION),
+                            self.height * DIMS_PLATE_HEIGHT,
+                            Vector(-1 * outer_offset, -1 * outer_offset, 0))
+
+        # the walls are as thin as for ribs in previews too, as in BrickRenderer where the ribs are only added later
+        side_thickness = DIMS_RIBBED_SIDE_THICKNESS if self.layout.side_ribs else DIMS_FLAT_SIDE_THICKNESS
+
+        side_ribs = self.layout.side_ribs and self.detail != Detail.PREVIEW
+        inner_offset = outer_offset - side_thickness
+        inner_width = (self.width * DIMS_STUD_SPACING) - (2 * side_thickness) - (2 * DIMS_BRICK_OUTER_REDUCTION)
+        inner_depth = (self.depth * DIMS_STUD_SPACING) - (2 * side_thickness) - (2 * DIMS_BRICK_OUTER_REDUCTION)
+
+        # pocket starts below the body so that no coplanar bottom face is left behind
+        pocket = Part.makeBox(inner_width, inner_depth, top_inside + 1,
+                              Vector(-1 * inner_offset, -1 * inner_offset, -1))
+
+        if side_ribs:
+
+            # one rib per stud on each side, left standing in the pocket
+            ribs = []
+            for rib_x in (self.layout.side_rib_width_offsets - (DIMS_SIDE_RIB_WIDTH / 2)).tolist():
+                ribs.append(Part.makeBox(DIMS_SIDE_RIB_WIDTH, DIMS_SIDE_RIB_DEPTH, top_inside + 1,
+                                         Vector(rib_x, -1 * inner_offset, -1)))
+                ribs.append(Part.makeBox(DIMS_SIDE_RIB_WIDTH, DIMS_SIDE_RIB_DEPTH, top_inside + 1,
+                                         Vector(rib_x, inner_depth - inner_offset - DIMS_SIDE_RIB_DEPTH, -1)))
+            for rib_y in (self.layout.side_rib_depth_offsets - (DIMS_SIDE_RIB_WIDTH / 2)).tolist():
+                ribs.append(Part.makeBox(DIMS_SIDE_RIB_DEPTH, DIMS_SIDE_RIB_WIDTH, top_inside + 1,
+                                         Vector(-1 * inner_offset, rib_y, -1)))
+                ribs.append(Part.makeBox(DIMS_SIDE_RIB_DEPTH, DIMS_SIDE_RIB_WIDTH, top_inside + 1,
+                                         Vector(inner_width - inner_offset - DIMS_SIDE_RIB_DEPTH, rib_y, -1)))
+            pocket = yield from self._boolean_steps(pocket, ribs, cut=True)
+
+        shape = body.cut(pocket)
+        yield None
+
+        return shape
+
+    def _make_tubes_or_sticks(self, shape):
+        log.debug("_make_tubes_or_sticks()")
+
+        tube_ribs = self.layout.tube_ribs
+        stick_ribs = self.layout.stick_ribs
+
+        # ribs are left out of previews, there are no fillets to leave out
+        if self.detail == Detail.PREVIEW:
+            tube_ribs = False
+            stick_ribs = False
+
+        top_inside = (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS
+        length = top_inside - DIMS_STICK_AND_TUBE_BOTTOM_INSET
+
+        additions = []
+        hollows = []
+
+        if tube_ribs:
+            additions.append(self._make_rib(centre, DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET, True)
+                             for centre in rib_centres(self.layout.tube_rib_width_indices).tolist())
+            additions.append(self._make_rib(centre, DIMS_TUBE_RIB_THICKNESS, DIMS_TUBE_RIB_BOTTOM_OFFSET, False)
+                             for centre in rib_centres(self.layout.tube_rib_depth_indices).tolist())
+
+        tube_centres = self.layout.tube_centres.tolist()
+        additions.append(Part.makeCylinder(DIMS_TUBE_OUTER_RADIUS, length,
+                                           Vector(x, y, DIMS_STICK_AND_TUBE_BOTTOM_INSET))
+                         for x, y in tube_centres)
+        hollows.append(self._make_flats(DIMS_TUBE_INNER_RADIUS, DIMS_TUBE_OUTER_RADIUS - DIMS_STUD_FLAT_THICKNESS,
+                                        top_inside + 1, Vector(x, y, -1), Vector(0, 0, 1))
+                       for x, y in tube_centres)
+
+        if stick_ribs:
+            additions.append(self._make_rib(centre, DIMS_STICK_RIB_THICKNESS, DIMS_STICK_RIB_BOTTOM_OFFSET,
+                                            self.layout.sticks_along_width)
+                             for centre in rib_centres(self.layout.stick_rib_indices).tolist())
+
+        stick_centres = self.layout.stick_centres.tolist()
+        additions.append(Part.makeCylinder(DIMS_STICK_OUTER_RADIUS, length,
+                                           Vector(x, y, DIMS_STICK_AND_TUBE_BOTTOM_INSET))
+                         for x, y in stick_centres)
+        hollows.append(Part.makeCylinder(DIMS_STICK_INNER_RADIUS, top_inside + 1, Vector(x, y, -1))
+                       for x, y in stick_centres)
+
+        shape = yield from self._boolean_steps(shape, itertools.chain(*additions))
+
+        # hollows are cut after the ribs have been added as the ribs run through the tubes and sticks
+        shape = yield from self._boolean_steps(shape, itertools.chain(*hollows), cut=True)
+
+        return shape
+
+    def _make_top_studs(self, shape):
+        log.debug("_make_top_studs()")
+
+        top = self.height * DIMS_PLATE_HEIGHT
+        top_inside = top - DIMS_TOP_THICKNESS
+
+        stud_centres = self.layout.top_stud_centres.tolist()
+
+        shape = yield from self._boolean_steps(
+            shape, (Part.makeCylinder(DIMS_STUD_OUTER_RADIUS, DIMS_STUD_HEIGHT, Vector(x, y, top))
+                    for x, y in stud_centres))
+
+        if self.top_studs_style == TopStudStyle.OPEN:
+            shape = yield from self._boolean_steps(
+                shape, (self._make_flats(DIMS_STUD_INNER_RADIUS, DIMS_STUD_OUTER_RADIUS - DIMS_STUD_FLAT_THICKNESS,
+                                         DIMS_STUD_HEIGHT + 1, Vector(x, y, top), Vector(0, 0, 1))
+                        for x, y in stud_centres), cut=True)
+
+        # Only render inner pocket if closed studs AND studs are not offset
+        shape = yield from self._boolean_steps(
+            shape, (Part.makeCylinder(DIMS_STUD_INSIDE_HOLE_RADIUS, DIMS_STUD_INSIDE_HOLE_TOP_OFFSET,
+                                      Vector(x, y, top_inside))
+                    for x, y in self.layout.top_stud_inside_centres.tolist()), cut=True)
+
+        return shape
+
+    @staticmethod
+    def _side_positions(positions):
+
+        # (base point on the side, outward direction) for every stud or pin
+        return [(Vector(*base), Vector(*direction))
+                for bases, direction in positions.values() for base in bases.tolist()]
+
+    def _make_side_studs(self, shape):
+        log.debug("_make_side_studs()")
+
+        positions = self._side_positions(self.layout.side_stud_positions)
+
+        shape = yield from self._boolean_steps(
+            shape, (Part.makeCylinder(DIMS_STUD_OUTER_RADIUS, DIMS_STUD_HEIGHT, base, direction)
+                    for base, direction in positions))
+
+        shape = yield from self._boolean_steps(
+            shape, (self._make_flats(DIMS_STUD_INNER_RADIUS, DIMS_STUD_OUTER_RADIUS - DIMS_STUD_FLAT_THICKNESS,
+                                     DIMS_STUD_HEIGHT, base, direction)
+                    for base, direction in positions), cut=True)
+
+        if self.side_studs_style == SideStudStyle.HOLE:
+            shape = yield from self._boolean_steps(
+                shape, (self._make_flats(DIMS_STUD_INNER_RADIUS, DIMS_STUD_OUTER_RADIUS - DIMS_STUD_FLAT_THICKNESS,
+                                         DIMS_RIBBED_SIDE_THICKNESS + DIMS_STUD_INSIDE_HOLE_TOP_OFFSET,
+                                         base, direction.negative())
+                        for base, direction in positions), cut=True)
+
+        return shape
+
+    def _make_pins(self):
+        log.debug("_make_pins()")
+
+        # oriented in the same way as the pins of BrickRenderer
+        return (place_pin(base, direction) for base, direction in self._side_positions(self.layout.pin_positions))
+
+    def _make_holes(self, shape):
+        log.debug("_make_holes()")
+
+        outer_offset = (DIMS_STUD_SPACING / 2) - DIMS_BRICK_OUTER_REDUCTION
+        inside_offset = outer_offset - DIMS_RIBBED_SIDE_THICKNESS
+        top_inside = (self.height * DIMS_PLATE_HEIGHT) - DIMS_TOP_THICKNESS
+
+        inside_length = ((self.depth - 1) * DIMS_STUD_SPACING) + (2 * inside_offset)
+        outer_length = ((self.depth - 1) * DIMS_STUD_SPACING) + (2 * outer_offset)
+
+        surrounds = []
+        cuts = []
+
+        for x in self.layout.hole_width_offsets.tolist():
+
+            # technic surround from the top inside down to a rounded bottom
+            surrounds.append(Part.makeBox(2 * DIMS_TECHNIC_HOLE_OUTER_RADIUS, inside_length,
+                                          top_inside - DIMS_TECHNIC_HOLE_CENTRE_HEIGHT,
+                                          Vector(x - DIMS_TECHNIC_HOLE_OUTER_RADIUS, -1 * inside_offset,
+                                                 DIMS_TECHNIC_HOLE_CENTRE_HEIGHT)))
+            surrounds.append(Part.makeCylinder(DIMS_TECHNIC_HOLE_OUTER_RADIUS, inside_length,
+                                               Vector(x, -1 * inside_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT),
+                                               Vector(0, 1, 0)))
+
+            # TODO: if/else render axle cross-section
+            cuts.append(Part.makeCylinder(DIMS_TECHNIC_HOLE_INNER_RADIUS, outer_length + 2,
+                                          Vector(x, -1 * outer_offset - 1, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT),
+                                          Vector(0, 1, 0)))
+
+            if self.hole_style == HoleStyle.HOLE:
+                cuts.append(Part.makeCylinder(DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS,
+                                              DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH,
+                                              Vector(x, -1 * outer_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT),
+                                              Vector(0, 1, 0)))
+                cuts.append(Part.makeCylinder(DIMS_TECHNIC_HOLE_COUNTERBORE_RADIUS,
+                                              DIMS_TECHNIC_HOLE_COUNTERBORE_DEPTH,
+                                              Vector(x, outer_length - outer_offset, DIMS_TECHNIC_HOLE_CENTRE_HEIGHT),
+                                              Vector(0, -1, 0)))
+
+        shape = yield from self._boolean_steps(shape, surrounds)
+        shape = yield from self._boolean_steps(shape, cuts, cut=True)
+
+        return shape
+
+    def build_steps(self):
+        log.debug("build_steps")
+
+        # yields between the boolean operations so that a caller can spread a build over several event loop turns
+        self.layout = brick_layout(self.brick_spec)
+
+        shape = yield from self._make_body()
+        shape = yield from self._make_tubes_or_sticks(shape)
+
+        if self.top_studs_style != TopStudStyle.NONE:
+            shape = yield from self._make_top_studs(shape)
+
+        if self.side_studs_style != SideStudStyle.NONE:
+            shape = yield from self._make_side_studs(shape)
+
+        if self.pins_style == PinStyle.PIN:
+            shape = yield from self._boolean_steps(shape, self._make_pins())
+
+        if self.hole_style != HoleStyle.NONE:
+            shape = yield from self._make_holes(shape)
+
+        yield shape.removeSplitter()
+
+    def build(self):
+        log.debug("build")
+
+        shape = None
+        for shape in self.build_steps():
+            pass
+
+        return shape
+
+    def render(self, cache=None, doc=None, brick=None, undo=RENDER_UNDO_TRANSACTION, view=RENDER_VIEW_SUSPENDED,
+               deviation=None):
+
+        transaction = None
+
+        try:
+            if doc is None:
+                doc = activeDocument()
+
+            transaction = RenderTransaction(doc, undo=undo, view=view)
+            transaction.begin()
+
+            if cache is not None and brick is None:
+                cache_key = cache.key(self.__class__.__name__, self.spec())
+                brick = self._render_cached(transaction, cache_key, cache)
+                if brick is not None:
+                    transaction.commit()
+                    transaction.show(brick, deviation)
+                    return brick
+
+            # an existing brick just has its shape replaced
+            if brick is None:
+                brick = transaction.addObject("Part::Feature", "brick")
+            else:
+                cache = None
+
+            brick.Shape = self.build()
+
+            transaction.scope = brick
+            transaction.recompute()
+            transaction.commit()
+            transaction.show(brick, deviation)
+
+            if cache is not None:
+                cache.store(cache_key, brick.Shape)
+
+            return brick
+
+        except Exception as inst:
+            if transaction is not None:
+                transaction.abort()
+            log.error("{}", inst)
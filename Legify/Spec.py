@@ -0,0 +1,382 @@
+# coding: UTF-8
+
+# Validation and normalization of brick parameters. Deliberately free of FreeCAD imports so that specs can be
+# checked and deduplicated without starting FreeCAD.
+
+from collections import namedtuple
+
+
+def _enum(*args):
+    enums = dict(zip(args, range(len(args))))
+    return type("Enum", (), enums)
+
+
+# Brick Options
+
+TopStudStyle = _enum("NONE", "CLOSED", "OPEN")
+SideStudStyle = _enum("NONE", "OPEN", "HOLE")
+PinStyle = _enum("NONE", "PIN", "AXLE")
+HoleStyle = _enum("NONE", "HOLE", "AXLE")
+
+# Rendering Options
+
+# PREVIEW: no fillets or ribs, STANDARD: adds ribs, FULL: adds fillets
+Detail = _enum("PREVIEW", "STANDARD", "FULL")
+
+BRICK_SPEC_FIELDS = (
+    "width", "depth", "height",
+    "top_studs_style", "top_studs_width_count", "top_studs_depth_count",
+    "side_studs_style", "side_studs_front", "side_studs_back", "side_studs_left", "side_studs_right",
+    "pins_style", "pins_front", "pins_back", "pins_left", "pins_right", "pins_offset",
+    "hole_style", "holes_offset"
+)
+
+
+class BrickSpecError(Exception):
+    pass
+
+
+class BrickSpec(namedtuple("BrickSpec", BRICK_SPEC_FIELDS)):
+
+    # options of disabled features are None so equal bricks have equal specs
+
+    __slots__ = ()
+
+    def as_dict(self):
+
+        spec = {
+            "dimensions": {"width": self.width, "depth": self.depth, "height": self.height},
+            "top_studs": {"style": self.top_studs_style},
+            "side_studs": {"style": self.side_studs_style},
+            "pins": {"style": self.pins_style},
+            "holes": {"style": self.hole_style}
+        }
+
+        if self.top_studs_style != TopStudStyle.NONE:
+            spec["top_studs"]["width_count"] = self.top_studs_width_count
+            spec["top_studs"]["depth_count"] = self.top_studs_depth_count
+
+        if self.side_studs_style != SideStudStyle.NONE:
+            spec["side_studs"]["front"] = self.side_studs_front
+            spec["side_studs"]["back"] = self.side_studs_back
+            spec["side_studs"]["left"] = self.side_studs_left
+            spec["side_studs"]["right"] = self.side_studs_right
+
+        if self.pins_style != PinStyle.NONE:
+            spec["pins"]["front"] = self.pins_front
+            spec["pins"]["back"] = self.pins_back
+            spec["pins"]["left"] = self.pins_left
+            spec["pins"]["right"] = self.pins_right
+            spec["pins"]["offset"] = self.pins_offset
+
+        if self.hole_style != HoleStyle.NONE:
+            spec["holes"]["offset"] = self.holes_offset
+
+        return spec
+
+    def describe(self):
+
+        lines = ["Dimensions: {0}x{1}x{2}".format(self.width, self.depth, self.height)]
+
+        if self.top_studs_style == TopStudStyle.NONE:
+            lines.append("Top Studs: NONE")
+        else:
+            lines.append("Top Studs: {0} {1}x{2}".format(
+                "CLOSED" if self.top_studs_style == TopStudStyle.CLOSED else "OPEN",
+                self.top_studs_width_count,
+                self.top_studs_depth_count))
+
+        if self.side_studs_style == SideStudStyle.NONE:
+            lines.append("Side Studs: NONE")
+        else:
+            lines.append("Side Studs: {0} {1}{2}{3}{4}".format(
+                "OPEN" if self.side_studs_style == SideStudStyle.OPEN else "HOLE",
+                "FRONT " if self.side_studs_front else "",
+                "BACK" if self.side_studs_back else "",
+                "LEFT " if self.side_studs_left else "",
+                "RIGHT " if self.side_studs_right else ""))
+
+        if self.pins_style == PinStyle.NONE:
+            lines.append("Pins: NONE")
+        else:
+            lines.append("Pins: {0} {1}{2}{3}{4}{5}".format(
+                "PIN" if self.pins_style == PinStyle.PIN else "AXLE",
+                "FRONT " if self.pins_front else "",
+                "BACK " if self.pins_back else "",
+                "LEFT " if self.pins_left else "",
+                "RIGHT " if self.pins_right else "",
+                "OFFSET" if self.pins_offset else ""))
+
+        if self.hole_style == HoleStyle.NONE:
+            lines.append("Holes: NONE")
+        else:
+            lines.append("Holes: {0} {1}".format(
+                "HOLE" if self.hole_style == HoleStyle.HOLE else "AXLE",
+                "OFFSET" if self.holes_offset else ""))
+
+        return lines
+
+
+class _BrickPlanner:
+
+    def __init__(self):
+
+        for field in BRICK_SPEC_FIELDS:
+            setattr(self, field, None)
+
+        self.adjustments = []
+
+    def _parse_dimensions(self, dimensions):
+
+        width = int(dimensions["width"])
+        depth = int(dimensions["depth"])
+        height = int(dimensions["height"])
+
+        if depth < 1 or depth > 20:
+            raise BrickSpecError("dimensions[\"depth\"] must be: 1..20")
+        if width < 1 or width > 20:
+            raise BrickSpecError("dimensions[\"width\"] must be: 1..20")
+        if height < 1 or height > 9:
+            raise BrickSpecError("dimensions[\"height\"] must be: 1..9")
+
+        self.width = width
+        self.depth = depth
+        self.height = height
+
+    def _parse_top_studs(self, top_studs):
+
+        style = top_studs["style"]
+
+        if style not in (TopStudStyle.NONE, TopStudStyle.CLOSED, TopStudStyle.OPEN):
+            raise BrickSpecError("top_studs[\"style\"] must be: "
+                                 "TopStudStyle.NONE|TopStudStyle.CLOSED|TopStudStyle.OPEN")
+
+        self.top_studs_style = style
+
+        if self.top_studs_style != TopStudStyle.NONE:
+
+            width_count = int(top_studs["width_count"])
+            depth_count = int(top_studs["depth_count"])
+
+            if width_count < 1 or width_count > self.width:
+                raise BrickSpecError("top_studs[\"width_count\"] must be: 1..dimensions[\"width\"]")
+
+            if depth_count < 1 or depth_count > self.depth:
+                raise BrickSpecError("top_studs[\"depth_count\"] must be: 1..dimensions[\"depth\"]")
+
+            self.top_studs_width_count = width_count
+            self.top_studs_depth_count = depth_count
+
+    def _parse_side_studs(self, side_studs):
+
+        style = side_studs["style"]
+
+        if style not in (SideStudStyle.NONE, SideStudStyle.OPEN, SideStudStyle.HOLE):
+            raise BrickSpecError("side_studs[\"style\"] must be: "
+                                 "SideStudStyle.NONE|SideStudStyle.OPEN|SideStudStyle.HOLE")
+
+        if style != SideStudStyle.NONE and self.height < 3:
+            self.adjustments.append("side_studs[\"style\"] set to SideStudStyle.NONE as "
+                                    "dimensions[\"width\"] < 3")
+            style = SideStudStyle.NONE
+
+        front = bool(side_studs["front"])
+        back = bool(side_studs["back"])
+        left = bool(side_studs["left"])
+        right = bool(side_studs["right"])
+
+        if style != SideStudStyle.NONE and not front and not back and not left and not right:
+
+            self.adjustments.append("side_studs[\"style\"] set to SideStudStyle.NONE as "
+                                    "none of Front, Back, Left, Right are True")
+            style = SideStudStyle.NONE
+
+        self.side_studs_style = style
+
+        if self.side_studs_style != SideStudStyle.NONE:
+
+            self.side_studs_front = front
+            self.side_studs_back = back
+            self.side_studs_left = left
+            self.side_studs_right = right
+
+    def _parse_pins(self, pins):
+
+        style = pins["style"]
+
+        if style not in (PinStyle.NONE, PinStyle.PIN, PinStyle.AXLE):
+            raise BrickSpecError("pins[\"style\"] must be: PinStyle.NONE|PinStyle.PIN|PinStyle.AXLE")
+
+        if style != PinStyle.NONE and self.height < 3:
+            self.adjustments.append("pins[\"style\"] set to PinStyle.NONE as "
+                                    "dimensions[\"width\"] < 3")
+            style = PinStyle.NONE
+
+        front = bool(pins["front"])
+        back = bool(pins["back"])
+        left = bool(pins["left"])
+        right = bool(pins["right"])
+
+        if style != PinStyle.NONE and self.side_studs_style != SideStudStyle.NONE:
+
+            if front and self.side_studs_front:
+                self.adjustments.append("pins[\"front\"] set to False as "
+                                        "side_studs[\"style\"] != SideStudStyle.NONE and "
+                                        "side_studs[\"front\"] == True")
+                front = False
+
+            if back and self.side_studs_back:
+                self.adjustments.append("pins[\"back\"] set to False as "
+                                        "side_studs[\"style\"] != SideStudStyle.NONE and "
+                                        "side_studs[\"back\"] == True")
+                back = False
+
+            if left and self.side_studs_left:
+                self.adjustments.append("pins[\"left\"] set to False as "
+                                        "side_studs[\"style\"] != SideStudStyle.NONE and "
+                                        "side_studs[\"left\"] == True")
+                left = False
+
+            if right and self.side_studs_right:
+                self.adjustments.append("pins[\"right\"] set to False as "
+                                        "side_studs[\"style\"] != SideStudStyle.NONE and "
+                                        "side_studs[\"right\"] == True")
+                right = False
+
+        if style != PinStyle.NONE and not front and not back and not left and not right:
+
+            self.adjustments.append("pins[\"style\"] set to PinStyle.NONE as "
+                                    "none of Front, Back, Left, Right are True")
+            style = PinStyle.NONE
+
+        offset = bool(pins["offset"])
+
+        if offset and (left or right) and self.depth == 1:
+
+            self.adjustments.append("pins[\"offset\"] set to False as "
+                                    "Left or Right are True and dimensions[\"depth\"] == 1")
+            style = PinStyle.NONE
+
+        if offset and (front or back) and self.width == 1:
+
+            self.adjustments.append("pins[\"offset\"] set to False as "
+                                    "Front or Back are True and dimensions[\"width\"] == 1")
+            style = PinStyle.NONE
+
+        self.pins_style = style
+
+        if self.pins_style != PinStyle.NONE:
+
+            self.pins_front = front
+            self.pins_back = back
+            self.pins_left = left
+            self.pins_right = right
+
+            self.pins_offset = offset
+
+    def _parse_holes(self, holes):
+
+        style = holes["style"]
+
+        if style not in (HoleStyle.NONE, HoleStyle.HOLE, HoleStyle.AXLE):
+            raise BrickSpecError("holes[\"style\"] must be: HoleStyle.NONE|HoleStyle.HOLE|HoleStyle.AXLE")
+
+        if style != HoleStyle.NONE and self.height < 3:
+            self.adjustments.append("holes[\"style\"] set to HoleStyle.NONE as "
+                                    "dimensions[\"width\"] < 3")
+            style = HoleStyle.NONE
+
+        if style != HoleStyle.NONE and self.side_studs_style != SideStudStyle.NONE:
+
+            if self.side_studs_front or self.side_studs_back:
+
+                self.adjustments.append("holes[\"style\"] set to HoleStyle.NONE as "
+                                        "side_studs[\"style\"] != SideStudStyle.NONE and "
+                                        "side_studs[\"front\"] == True or side_studs[\"back\"] == True")
+                style = HoleStyle.NONE
+
+        if style != HoleStyle.NONE and self.pins_style != PinStyle.NONE:
+
+            if self.pins_front or self.pins_back:
+
+                self.adjustments.append("holes[\"style\"] set to HoleStyle.NONE as "
+                                        "pins[\"style\"] != PinStyle.NONE and "
+                                        "pins[\"front\"] == True or pins[\"back\"] == True")
+                style = HoleStyle.NONE
+
+        offset = bool(holes["offset"])
+
+        if not offset and self.width == 1:
+            self.adjustments.append("holes[\"style\"] set to HoleStyle.NONE as "
+                                    "dimensions[\"width\"] == 1 and holes[\"offset\"] == False")
+            style = HoleStyle.NONE
+
+        self.hole_style = style
+
+        if self.hole_style != HoleStyle.NONE:
+
+            self.holes_offset = offset
+
+
+def plan_brick(dimensions, top_studs, side_studs, pins, holes):
+
+    # returns the normalized BrickSpec and a message for every option that was changed to make it valid
+    planner = _BrickPlanner()
+
+    try:
+        planner._parse_dimensions(dimensions)
+        planner._parse_top_studs(top_studs)
+        planner._parse_side_studs(side_studs)
+        planner._parse_pins(pins)
+        planner._parse_holes(holes)
+    except (KeyError, TypeError, ValueError) as inst:
+        raise BrickSpecError("Invalid brick options: {}".format(inst))
+
+    return BrickSpec(*[getattr(planner, field) for field in BRICK_SPEC_FIELDS]), planner.adjustments
+
+
+def check_detail(detail):
+
+    if detail not in (Detail.PREVIEW, Detail.STANDARD, Detail.FULL):
+        raise BrickSpecError("detail must be: Detail.PREVIEW|Detail.STANDARD|Detail.FULL")
+
+    return detail
+
+
+def _parse_style(enum, value):
+
+    # styles can be given by name e.g. "OPEN" or by value
+    if isinstance(value, str):
+        if not hasattr(enum, value.upper()):
+            raise BrickSpecError("Unknown style: {}".format(value))
+        return getattr(enum, value.upper())
+    return int(value)
+
+
+def parse_spec(spec):
+
+    # same dicts as built by Dialog.on_ok_clicked() with missing options defaulting to NONE / False and detail to FULL
+    dimensions = dict(spec["dimensions"])
+
+    top_studs = dict(spec.get("top_studs", {}))
+    top_studs["style"] = _parse_style(TopStudStyle, top_studs.get("style", TopStudStyle.NONE))
+
+    side_studs = dict(spec.get("side_studs", {}))
+    side_studs["style"] = _parse_style(SideStudStyle, side_studs.get("style", SideStudStyle.NONE))
+
+    pins = dict(spec.get("pins", {}))
+    pins["style"] = _parse_style(PinStyle, pins.get("style", PinStyle.NONE))
+
+    holes = dict(spec.get("holes", {}))
+    holes["style"] = _parse_style(HoleStyle, holes.get("style", HoleStyle.NONE))
+
+    for options in (side_studs, pins):
+        for side in ("front", "back", "left", "right"):
+            options.setdefault(side, False)
+
+    pins.setdefault("offset", False)
+    holes.setdefault("offset", False)
+
+    detail = check_detail(_parse_style(Detail, spec.get("detail", Detail.FULL)))
+
+    return dimensions, top_studs, side_studs, pins, holes, detail
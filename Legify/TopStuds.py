@@ -1,18 +1,22 @@
 # coding: UTF-8
 
-from FreeCAD import Console, Vector
+from FreeCAD import Vector
 import Part
 import Sketcher
 from Legify.Common import *
 
+# above this many studs the geometry is placed unconstrained so that the solver cost does not grow with the grid
+TOP_STUDS_CONSTRAINED_MAX_COUNT = 8
+
 
 class TopStudsRenderer:
 
     def __init__(self):
-        Console.PrintMessage("TopStudsRenderer\n")
+        log.debug("TopStudsRenderer")
 
         self.doc = None
         self.brick = None
+        self.context = None
 
         self.width = None
         self.depth = None
@@ -20,34 +24,58 @@ class TopStudsRenderer:
         self.width_count = None
         self.depth_count = None
 
-        self.top_datum_plane = None
-        self.top_inside_datum_plane = None
+        self.detail = None
+        self.layout = None
+
+    def _fill_top_studs_outside_pad_sketch(self, sketch):
+
+        initial_width_offset, initial_depth_offset = self.layout.top_studs_offset
+
+        if len(self.layout.top_stud_centres) > TOP_STUDS_CONSTRAINED_MAX_COUNT:
+
+            # every stud precomputed from the layout, nothing for the solver to do
+            geometries = []
+            for x, y in self.layout.top_stud_centres.tolist():
+                geometries.extend(circle_geometry(DIMS_STUD_OUTER_RADIUS, x, y, self.style == TopStudStyle.OPEN))
+                if self.style == TopStudStyle.OPEN:
+                    geometries.extend(inner_circle_with_flats_geometry(DIMS_STUD_OUTER_RADIUS, DIMS_STUD_INNER_RADIUS,
+                                                                       DIMS_STUD_FLAT_THICKNESS, x, y))
+            sketch.addGeometry(geometries, False)
+
+        else:
+
+            add_circle_to_sketch(sketch, DIMS_STUD_OUTER_RADIUS, initial_width_offset,
+                                 initial_depth_offset, self.style == TopStudStyle.OPEN)
 
-    def _render_top_studs_outside(self, initial_width_offset, initial_depth_offset):
-        Console.PrintMessage("render_top_studs_outside({},{})\n".format(initial_width_offset, initial_depth_offset))
+            # open studs get the inside in the same sketch so that a single pad renders hollow studs
+            if self.style == TopStudStyle.OPEN:
+                add_inner_circle_with_flats_to_sketch(sketch, DIMS_STUD_OUTER_RADIUS,
+                                                      DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
+                                                      initial_width_offset, initial_depth_offset)
+
+            self.doc.solve(sketch)
+
+            # create array if needed
+            if self.width_count > 1 or self.depth_count > 1:
+                geometry_indices = list(range(0, len(sketch.Geometry)))
+                if self.width_count > 1 and self.depth_count == 1:
+                    sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
+                                               self.width_count, self.depth_count, True)
+                else:
+                    sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
+                                               self.depth_count, self.width_count, True)
+
+    @profiled("TopStudsRenderer._render_top_studs_outside")
+    def _render_top_studs_outside(self):
+        log.debug("render_top_studs_outside()")
 
         # top studs outside pad
 
         top_studs_outside_pad_sketch = self.brick.newObject("Sketcher::SketchObject", "top_studs_outside_pad_sketch")
-        top_studs_outside_pad_sketch.AttachmentSupport = (self.top_datum_plane, '')
+        top_studs_outside_pad_sketch.AttachmentSupport = (self.context.datum_plane("top_datum_plane"), '')
         top_studs_outside_pad_sketch.MapMode = 'FlatFace'
 
-        add_circle_to_sketch(top_studs_outside_pad_sketch, DIMS_STUD_OUTER_RADIUS, initial_width_offset,
-                             initial_depth_offset, self.style == TopStudStyle.OPEN)
-
-        self.doc.recompute()
-
-        # create array if needed
-        if self.width_count > 1 or self.depth_count > 1:
-            geometry_indices = [range(0, len(top_studs_outside_pad_sketch.Geometry) - 1)]
-            if self.width_count > 1 and self.depth_count == 1:
-                top_studs_outside_pad_sketch.addRectangularArray(geometry_indices,
-                                                                 Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                 self.width_count, self.depth_count, True)
-            else:
-                top_studs_outside_pad_sketch.addRectangularArray(geometry_indices,
-                                                                 Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                                 self.depth_count, self.width_count, True)
+        self._fill_top_studs_outside_pad_sketch(top_studs_outside_pad_sketch)
         self.doc.recompute()
 
         top_studs_outside_pad = self.brick.newObject("PartDesign::Pad", "top_studs_outside_pad")
@@ -56,86 +84,48 @@ class TopStudsRenderer:
         top_studs_outside_pad.Length = DIMS_STUD_HEIGHT
 
         self.doc.recompute()
+        set_visibility(top_studs_outside_pad_sketch, False)
 
-        top_studs_outside_pad_sketch.ViewObject.Visibility = False
+    def _fill_top_studs_inside_pocket_sketch(self, sketch):
 
-        # determine the stud outer edges
-        if self.style == TopStudStyle.OPEN:
-            edge_names = get_arc_edge_names(self.top_datum_plane, True, DIMS_STUD_HEIGHT, top_studs_outside_pad,
-                                            DIMS_STUD_OUTER_RADIUS)
-        else:
-            edge_names = get_circle_edge_names(self.top_datum_plane, True, DIMS_STUD_HEIGHT, top_studs_outside_pad,
-                                               DIMS_STUD_OUTER_RADIUS)
-        if len(edge_names) > 0:
-            # top studs outer edge fillet
-            top_stud_outer_fillets = self.brick.newObject("PartDesign::Fillet", "top_stud_outer_fillets")
-            top_stud_outer_fillets.Radius = DIMS_STUD_FILLET
-            top_stud_outer_fillets.Base = (top_studs_outside_pad, edge_names)
+        initial_width_offset, initial_depth_offset = self.layout.top_studs_offset
 
-            self.doc.recompute()
+        if len(self.layout.top_stud_inside_centres) > TOP_STUDS_CONSTRAINED_MAX_COUNT:
 
-        # top studs outside pocket
-        if self.style == TopStudStyle.OPEN:
+            geometries = []
+            for x, y in self.layout.top_stud_inside_centres.tolist():
+                geometries.extend(circle_geometry(DIMS_STUD_INSIDE_HOLE_RADIUS, x, y, False))
+            sketch.addGeometry(geometries, False)
 
-            top_studs_outside_pocket_sketch = self.brick.newObject("Sketcher::SketchObject",
-                                                                   "top_studs_outside_pocket_sketch")
-            top_studs_outside_pocket_sketch.AttachmentSupport = (self.top_datum_plane, '')
-            top_studs_outside_pocket_sketch.MapMode = 'FlatFace'
+        else:
 
-            add_inner_circle_with_flats_to_sketch(top_studs_outside_pocket_sketch, DIMS_STUD_OUTER_RADIUS,
-                                                  DIMS_STUD_INNER_RADIUS, DIMS_STUD_FLAT_THICKNESS,
-                                                  initial_width_offset, initial_depth_offset)
-            self.doc.recompute()
+            add_circle_to_sketch(sketch, DIMS_STUD_INSIDE_HOLE_RADIUS, initial_width_offset, initial_depth_offset,
+                                 False)
+
+            self.doc.solve(sketch)
 
             # create array if needed
-            if self.width_count > 1 or self.depth_count > 1:
-                geometry_indices = [range(0, len(top_studs_outside_pocket_sketch.Geometry) - 1)]
-                if self.width_count > 1 and self.depth_count == 1:
-                    top_studs_outside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                        Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                        self.width_count, self.depth_count, True)
+            if self.width > 1 or self.depth > 1:
+                geometry_indices = [range(0, len(sketch.Geometry) - 1)]
+                if self.width > 1 and self.depth == 1:
+                    sketch.addRectangularArray(geometry_indices, Vector(DIMS_STUD_SPACING, 0, 0), False,
+                                               self.width, self.depth, True)
                 else:
-                    top_studs_outside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                        Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                                        self.depth_count, self.width_count, True)
-            self.doc.recompute()
-
-            top_studs_outside_pocket = self.brick.newObject("PartDesign::Pocket", "top_studs_outside_pocket")
-            top_studs_outside_pocket.Type = PAD_TYPE_DIMENSION
-            top_studs_outside_pocket.Profile = top_studs_outside_pocket_sketch
-            top_studs_outside_pocket.Length = DIMS_STUD_HEIGHT
-            top_studs_outside_pocket.Reversed = True
-
-            self.doc.recompute()
-
-            top_studs_outside_pocket_sketch.ViewObject.Visibility = False
+                    sketch.addRectangularArray(geometry_indices, Vector(0, DIMS_STUD_SPACING, 0), False,
+                                               self.depth, self.width, True)
 
-    def _render_top_studs_inside(self, initial_width_offset, initial_depth_offset):
-        Console.PrintMessage("render_top_studs_inside({},{})\n".format(initial_width_offset, initial_depth_offset))
+    @profiled("TopStudsRenderer._render_top_studs_inside")
+    def _render_top_studs_inside(self):
+        log.debug("render_top_studs_inside()")
 
         # top studs inside pocket
 
         top_studs_inside_pocket_sketch = self.brick \
             .newObject("Sketcher::SketchObject", "top_studs_inside_pocket_sketch")
-        top_studs_inside_pocket_sketch.AttachmentSupport = (self.top_inside_datum_plane, '')
+        top_studs_inside_pocket_sketch.AttachmentSupport = (self.context.datum_plane("top_inside_datum_plane"), '')
         top_studs_inside_pocket_sketch.MapMode = 'FlatFace'
 
-        add_circle_to_sketch(top_studs_inside_pocket_sketch, DIMS_STUD_INSIDE_HOLE_RADIUS,
-                             initial_width_offset, initial_depth_offset, False)
-
-        self.doc.recompute()
-
-        # create array if needed
-        if self.width > 1 or self.depth > 1:
-            geometry_indices = [range(0, len(top_studs_inside_pocket_sketch.Geometry) - 1)]
-            if self.width > 1 and self.depth == 1:
-                top_studs_inside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                   Vector(DIMS_STUD_SPACING, 0, 0), False,
-                                                                   self.width, self.depth, True)
-            else:
-                top_studs_inside_pocket_sketch.addRectangularArray(geometry_indices,
-                                                                   Vector(0, DIMS_STUD_SPACING, 0), False,
-                                                                   self.depth, self.width, True)
+        self._fill_top_studs_inside_pocket_sketch(top_studs_inside_pocket_sketch)
         self.doc.recompute()
 
         top_studs_inside_pocket = self.brick.newObject("PartDesign::Pocket", "top_studs_inside_pocket")
@@ -146,13 +136,13 @@ class TopStudsRenderer:
 
         self.doc.recompute()
 
-        top_studs_inside_pocket_sketch.ViewObject.Visibility = False
+        set_visibility(top_studs_inside_pocket_sketch, False)
 
-    def render(self, context):
-        Console.PrintMessage("render\n")
+    def _setup(self, context):
 
         self.doc = context.doc
         self.brick = context.brick
+        self.context = context
 
         self.width = context.width
         self.depth = context.depth
@@ -160,14 +150,56 @@ class TopStudsRenderer:
         self.width_count = context.top_studs_width_count
         self.depth_count = context.top_studs_depth_count
 
-        self.top_datum_plane = context.top_datum_plane
-        self.top_inside_datum_plane = context.top_inside_datum_plane
+        self.detail = context.detail
+        self.layout = context.layout
+
+    @profiled("TopStudsRenderer.render")
+    def render(self, context):
+        log.debug("render")
 
-        initial_width_offset = (self.width - self.width_count) * DIMS_STUD_SPACING / 2
-        initial_depth_offset = (self.depth - self.depth_count) * DIMS_STUD_SPACING / 2
+        self._setup(context)
 
-        self._render_top_studs_outside(initial_width_offset, initial_depth_offset)
+        self._render_top_studs_outside()
 
         # Only render inner pocket if closed studs AND studs are not offset
-        if self.style == TopStudStyle.CLOSED and initial_width_offset == 0 and initial_depth_offset == 0:
-            self._render_top_studs_inside(initial_width_offset, initial_depth_offset)
+        if self.layout.top_studs_inside:
+            self._render_top_studs_inside()
+
+    @profiled("TopStudsRenderer.update")
+    def update(self, context):
+        log.debug("update")
+
+        self._setup(context)
+
+        # the same sketches with the studs of the new width, depth and stud counts
+        refill_sketch(context.stage_object("top_studs_outside_pad_sketch"), self._fill_top_studs_outside_pad_sketch)
+
+        if self.layout.top_studs_inside:
+            refill_sketch(context.stage_object("top_studs_inside_pocket_sketch"),
+                          self._fill_top_studs_inside_pocket_sketch)
+
+    @profiled("TopStudsRenderer.render_fillets")
+    def render_fillets(self, context):
+        log.debug("render_fillets")
+
+        self._setup(context)
+
+        # the stud outer edges of the shape so far
+        self.doc.recompute(shape_required=True)
+
+        studs = self.brick.Tip
+        top_datum_plane = self.context.datum_plane("top_datum_plane")
+
+        if self.style == TopStudStyle.OPEN:
+            edge_names = get_arc_edge_names(top_datum_plane, True, DIMS_STUD_HEIGHT, studs, DIMS_STUD_OUTER_RADIUS)
+        else:
+            edge_names = get_circle_edge_names(top_datum_plane, True, DIMS_STUD_HEIGHT, studs,
+                                               DIMS_STUD_OUTER_RADIUS)
+
+        if len(edge_names) > 0:
+            # top studs outer edge fillet
+            top_stud_outer_fillets = self.brick.newObject("PartDesign::Fillet", "top_stud_outer_fillets")
+            top_stud_outer_fillets.Radius = DIMS_STUD_FILLET
+            top_stud_outer_fillets.Base = (studs, edge_names)
+
+            self.doc.recompute()
@@ -0,0 +1,150 @@
+# coding: UTF-8
+
+import FreeCAD
+from Legify.Log import *
+
+# a render is a single named undo step or, for batch runs, not recorded for undo at all
+RENDER_UNDO_TRANSACTION = 1
+RENDER_UNDO_SUSPENDED = 0
+
+RENDER_TRANSACTION_NAME = "Legify Brick"
+
+# intermediate features are either drawn as they are created or hidden (and so never tessellated) until the end
+RENDER_VIEW_UPDATE = 1
+RENDER_VIEW_SUSPENDED = 0
+
+
+class _HideCreatedObserver(object):
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def slotCreatedObject(self, view_object):
+
+        # a hidden Part view provider only tessellates its shape once it is shown again
+        obj = view_object.Object
+        if obj.Document == self.doc and obj.TypeId != "PartDesign::Body":
+            view_object.Visibility = False
+
+
+class RenderTransaction(object):
+
+    def __init__(self, doc, deferred=False, profiler=None, undo=RENDER_UNDO_TRANSACTION, view=RENDER_VIEW_UPDATE):
+        log.debug("RenderTransaction({0}, {1}, {2})", deferred, undo, view)
+
+        self.doc = doc
+        self.deferred = deferred
+        self.profiler = profiler
+        self.undo = undo
+        self.view = view
+
+        self.pending = False
+        self.recompute_count = 0
+
+        # once set only the object being built (and what it depends on) is recomputed, not the whole document
+        self.scope = None
+
+        self.open = False
+        self.undo_mode = None
+        self.observer = None
+
+    def __getattr__(self, name):
+        # everything other than recompute handling is passed through to the wrapped document
+        return getattr(self.doc, name)
+
+    def recompute(self, shape_required=False):
+
+        # in deferred mode only recompute when the caller is about to read a Shape
+        if self.deferred and not shape_required:
+            self.pending = True
+            return
+
+        if self.scope is None:
+            self.doc.recompute()
+        else:
+            self.doc.recompute(scope_objects(self.scope))
+        self.pending = False
+        self.recompute_count += 1
+
+    def solve(self, sketch):
+
+        # a sketch only needs to be solved (not the whole document recomputed) before its geometry is arrayed
+        if self.deferred:
+            sketch.solve()
+        else:
+            self.recompute()
+
+    def begin(self, name=RENDER_TRANSACTION_NAME):
+        log.debug("begin({})", name)
+
+        if self.undo == RENDER_UNDO_SUSPENDED:
+            self.undo_mode = self.doc.UndoMode
+            self.doc.UndoMode = 0
+        else:
+            self.doc.openTransaction(name)
+
+        # there are no view providers to hide when running without the GUI
+        if self.view == RENDER_VIEW_SUSPENDED and FreeCAD.GuiUp:
+            import FreeCADGui
+            self.observer = _HideCreatedObserver(self.doc)
+            FreeCADGui.addDocumentObserver(self.observer)
+
+        self.open = True
+
+    def _close(self, commit):
+
+        if not self.open:
+            return
+
+        self.open = False
+
+        if self.observer is not None:
+            import FreeCADGui
+            FreeCADGui.removeDocumentObserver(self.observer)
+            self.observer = None
+
+        if self.undo == RENDER_UNDO_SUSPENDED:
+            self.doc.UndoMode = self.undo_mode
+        elif commit:
+            self.doc.commitTransaction()
+        else:
+            self.doc.abortTransaction()
+
+    def commit(self):
+        log.debug("commit({})", self.recompute_count)
+
+        if self.pending:
+            self.recompute(shape_required=True)
+
+        self._close(True)
+
+    def abort(self):
+        log.debug("abort()")
+
+        # with undo suspended the partial render cannot be rolled back and is left for inspection
+        self._close(False)
+
+    def show(self, obj, deviation=None):
+        log.debug("show({0}, {1})", obj.Name, deviation)
+
+        # set before showing so that the shape is only tessellated once, a coarser deviation helps large bricks
+        if deviation is not None and obj.ViewObject is not None:
+            obj.ViewObject.Deviation = deviation
+
+        set_visibility(obj, True)
+
+
+def scope_objects(obj):
+
+    # a body recompute has to include its features, the dependencies of the listed objects are added by FreeCAD
+    if obj.TypeId == "PartDesign::Body":
+        return [obj] + obj.Group
+
+    return [obj]
+
+
+def set_visibility(obj, visible):
+
+    # there is no view provider when running without the GUI e.g. under FreeCADCmd
+    if obj.ViewObject is not None:
+        obj.ViewObject.Visibility = visible
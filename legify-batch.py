@@ -0,0 +1,63 @@
+# coding: UTF-8
+
+# Render a catalog of bricks without the GUI:
+#
+#   freecadcmd legify-batch.py --pass [--processes N] [--formats step,stl,fcstd] specs.jsonl output_dir
+#
+# Each line of specs.jsonl is a JSON object with the same "dimensions", "top_studs", "side_studs", "pins" and "holes"
+# dicts passed to BrickRenderer by the dialog plus an optional "name" used for the output files.
+
+import sys
+import os.path
+
+# get the path of the current python script
+current_path = os.path.dirname(os.path.realpath(__file__))
+
+# check if this path belongs to the PYTHONPATH variable and if not add it
+if not sys.path.__contains__(str(current_path)):
+    sys.path.append(str(current_path))
+
+import argparse
+import multiprocessing
+from Legify.Batch import *
+
+# FreeCADCmd passes through everything after --pass untouched
+arguments = sys.argv[sys.argv.index("--pass") + 1:] if "--pass" in sys.argv else sys.argv[1:]
+
+parser = argparse.ArgumentParser(prog="legify-batch.py")
+parser.add_argument("input", help="JSONL file of brick specs")
+parser.add_argument("output", help="directory for the rendered files")
+parser.add_argument("--formats", default=",".join(BATCH_FORMATS), help="comma separated: step,stl,fcstd")
+parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+parser.add_argument("--chunk-size", type=int, default=20, help="specs rendered by each worker process")
+parser.add_argument("--freecad-cmd", default="freecadcmd", help="FreeCADCmd executable used for workers")
+parser.add_argument("--solid", action="store_true", help="use SolidBrickRenderer instead of PartDesign")
+parser.add_argument("--cache", default=None, help="shape cache directory shared by the workers")
+parser.add_argument("--verbose", action="store_true", help="log every render step")
+parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+parser.add_argument("--first", type=int, default=0, help=argparse.SUPPRESS)
+parser.add_argument("--last", type=int, default=0, help=argparse.SUPPRESS)
+parser.add_argument("--report", default=None, help=argparse.SUPPRESS)
+
+args = parser.parse_args(arguments)
+
+formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+
+for f in formats:
+    if f not in BATCH_FORMATS:
+        parser.error("unsupported format: {}".format(f))
+
+# headless runs only report warnings and errors unless asked, buffered to keep console writes cheap
+log.configure(level=LOG_DEBUG if args.verbose else LOG_WARNING, buffered=True)
+
+if args.worker:
+    failed = run_worker(os.path.abspath(args.input), args.first, args.last, os.path.abspath(args.output), formats,
+                        args.solid, args.cache, args.report)
+else:
+    failed = run_batch(os.path.abspath(args.input), os.path.abspath(args.output), formats, args.processes,
+                       args.chunk_size, args.freecad_cmd, os.path.realpath(__file__), args.solid, args.cache,
+                       args.verbose)
+
+log.flush()
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,58 @@
+# coding: UTF-8
+
+# Benchmark brick rendering without the GUI and compare against a stored baseline:
+#
+#   freecadcmd legify-benchmark.py --pass [--matrix quick|full] [--baseline baseline.json] results.json
+
+import sys
+import os.path
+
+# get the path of the current python script
+current_path = os.path.dirname(os.path.realpath(__file__))
+
+# check if this path belongs to the PYTHONPATH variable and if not add it
+if not sys.path.__contains__(str(current_path)):
+    sys.path.append(str(current_path))
+
+import argparse
+import json
+from Legify.Benchmark import *
+
+# FreeCADCmd passes through everything after --pass untouched
+arguments = sys.argv[sys.argv.index("--pass") + 1:] if "--pass" in sys.argv else sys.argv[1:]
+
+parser = argparse.ArgumentParser(prog="legify-benchmark.py")
+parser.add_argument("output", help="JSON file for the results")
+parser.add_argument("--matrix", default="quick", choices=("quick", "full"))
+parser.add_argument("--stride", type=int, default=1, help="only run every Nth case of the matrix")
+parser.add_argument("--repeat", type=int, default=1, help="renders per case, the fastest is recorded")
+parser.add_argument("--solid", action="store_true", help="benchmark SolidBrickRenderer instead of PartDesign")
+parser.add_argument("--baseline", default=None, help="results of a previous run to compare against")
+parser.add_argument("--imports", action="store_true", help="also time importing the Legify modules")
+parser.add_argument("--freecad-cmd", default="freecadcmd", help="FreeCADCmd executable used to time imports")
+parser.add_argument("--verbose", action="store_true", help="log every render step")
+parser.add_argument("--threshold", type=float, default=BENCHMARK_DEFAULT_THRESHOLD,
+                    help="relative slowdown flagged as a regression")
+
+args = parser.parse_args(arguments)
+
+# headless runs only report warnings and errors unless asked, buffered to keep console writes cheap
+log.configure(level=LOG_DEBUG if args.verbose else LOG_WARNING, buffered=True)
+
+results = run_benchmark(args.matrix, args.solid, args.repeat, args.stride)
+
+if args.imports:
+    results["imports"] = measure_import_times(args.freecad_cmd)
+
+with open(args.output, "w") as output_file:
+    json.dump(results, output_file, indent=2, sort_keys=True)
+
+regressions = []
+
+if args.baseline:
+    with open(args.baseline) as baseline_file:
+        regressions = compare_benchmark(results, json.load(baseline_file), args.threshold)
+
+log.flush()
+
+sys.exit(1 if regressions else 0)
@@ -0,0 +1,13 @@
+import pytest
+
+pytest.importorskip("FreeCAD")
+
+from Legify.Benchmark import benchmark_matrix
+
+
+def test_quick_matrix_is_a_small_subset_of_full():
+    quick = [key for key, options in benchmark_matrix("quick")]
+    full = [key for key, options in benchmark_matrix("full")]
+
+    assert len(quick) < len(full)
+    assert set(quick) <= set(full)
@@ -0,0 +1,39 @@
+import pytest
+
+FreeCAD = pytest.importorskip("FreeCAD")
+Part = pytest.importorskip("Part")
+
+from FreeCAD import Vector
+from Legify.Common import EdgeIndex, get_circle_edge_names
+
+
+class _Holder:
+
+    def __init__(self, shape):
+        self.Shape = shape
+
+
+def _stud_on_box():
+    box = Part.makeBox(10, 10, 2)
+    stud = Part.makeCylinder(2, 3, Vector(5, 5, 2))
+    return box.fuse(stud)
+
+
+def test_circle_edges_come_from_index():
+    shape = _stud_on_box()
+    edge_index = EdgeIndex(shape)
+
+    plane = _Holder(Part.makePlane(20, 20, Vector(-5, -5, 5)))
+    expected = get_circle_edge_names(plane, True, 0, _Holder(shape), 2)
+    assert len(expected) == 1
+
+    # the feature shape is never scanned when an index is passed
+    names = get_circle_edge_names(plane, True, 0, _Holder(Part.Shape()), 2, edge_index)
+    assert names == expected
+
+
+def test_lookup_by_radius_only_visits_matching_curves():
+    edge_index = EdgeIndex(_stud_on_box())
+
+    assert len(edge_index.circles_with_radius(2)) == 2
+    assert edge_index.circles_with_radius(3) == []